@@ -0,0 +1,74 @@
+"""Benchmark FastJSONResponse against FastAPI's default JSON path.
+
+Run from the backend directory:
+
+    python benchmarks/bench_json_responses.py --rows 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from services.responses import FastJSONResponse, brotli, orjson
+
+WORDS = "great coffee slow service friendly staff cozy place cute cat expensive pastries fresh".split()
+
+
+def make_reviews(count: int):
+    """Rows shaped like the Supabase `reviews` table"""
+    rng = random.Random(42)
+    return [
+        {
+            "id": i,
+            "review_text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))),
+            "rating": rng.randint(1, 5),
+            "timestamp": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00.000000+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def timed(build, repeat: int):
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = build()
+        best = min(best, time.perf_counter() - start)
+        size = len(response.body)
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if orjson else 'no'}, brotli: {'yes' if brotli else 'no'}")
+    for rows in args.rows:
+        payload = {"status": "success", "data": make_reviews(rows), "count": rows}
+        cases = [
+            ("jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(payload))),
+            ("FastJSONResponse", lambda: FastJSONResponse(payload)),
+            ("FastJSONResponse gzip", lambda: FastJSONResponse(payload, accept_encoding="gzip")),
+        ]
+        if brotli is not None:
+            cases.append(("FastJSONResponse br", lambda: FastJSONResponse(payload, accept_encoding="br")))
+
+        print(f"\n{rows:,} rows")
+        baseline = None
+        for name, build in cases:
+            seconds, size = timed(build, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {name:<34} {seconds * 1000:9.1f} ms  {size / 1024:10.1f} KiB  x{baseline / seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Memory and scan cost of the review snapshot against a list of PostgREST dicts.
+
+Run from the backend directory (the usual SUPABASE_* settings must be present,
+nothing is fetched):
+
+    python benchmarks/bench_review_snapshot.py --rows 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.review_snapshot import ReviewSnapshot
+
+WORDS = "great coffee slow service friendly staff cozy place cute cat expensive pastries fresh".split()
+
+
+def make_reviews(count: int):
+    """Rows shaped like the Supabase `reviews` table"""
+    rng = random.Random(42)
+    return [
+        {
+            "id": i + 1,
+            "review_text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40))),
+            "rating": rng.randint(1, 5),
+            "timestamp": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T12:00:00.000000+00:00",
+        }
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    """(result, traced bytes); tracemalloc slows allocation down, so time builds separately"""
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def scan(rows):
+    start = time.perf_counter()
+    total = sum(len(row.get("review_text", "")) + row.get("rating", 0) for row in rows)
+    return time.perf_counter() - start, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    dicts, dict_bytes = measure(lambda: make_reviews(args.rows))
+
+    snapshot = ReviewSnapshot()
+    start = time.perf_counter()
+    snapshot._append(dicts)
+    build_seconds = time.perf_counter() - start
+    usage = snapshot.memory_usage()
+
+    dict_scan, _ = scan(dicts)
+    snapshot_scan, _ = scan(snapshot.rows())
+
+    print(f"{args.rows:,} reviews")
+    print(f"  list of dicts      {dict_bytes / 1024 / 1024:8.1f} MiB  scan {dict_scan * 1000:7.1f} ms")
+    print(f"  review snapshot    {usage['bytes'] / 1024 / 1024:8.1f} MiB  scan {snapshot_scan * 1000:7.1f} ms"
+          f"  (columns {usage['column_bytes'] / 1024 / 1024:.1f} MiB, text {usage['text_bytes'] / 1024 / 1024:.1f} MiB)")
+    print(f"  per 100k reviews   {usage['bytes_per_100k_reviews'] / 1024 / 1024:8.1f} MiB")
+    print(f"  build              {build_seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from supabase_client import supabase
+from services.admission import RequestGuardMiddleware, admission_stats
+from services.deadlines import DeadlineExceeded
+from services.review_events import publish_review
+from services.scheduler import scheduler
+import asyncio
 import logging
 
 # Import route modules
@@ -12,17 +19,54 @@ from routes.sentiment import router as sentiment_router
 from routes.keywords import router as keywords_router
 from routes.uploadcsv import uploadcsv_router  # Add this line
 from routes.files import files_router  # Add this line
+from routes.live_reviews import router as live_reviews_router
+from routes.dashboard import router as dashboard_router
+from routes.review_dedup import router as review_dedup_router, check_duplicate
+from routes.topics import router as topics_router
+from routes.aspects import router as aspects_router
+from routes.search import router as search_router
+from routes.jobs import router as jobs_router
+from routes.snapshot import router as snapshot_router
+from routes.cache_sync import router as cache_router, start_cache_sync, stop_cache_sync
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the job scheduler on startup and drain it on shutdown"""
+    logger.info("SmartCafe AI Backend starting up...")
+    
+    # Test database connection on startup
+    try:
+        response = supabase.table("reviews").select("count", count="exact").limit(1).execute()
+        logger.info("✅ Database connection successful on startup")
+    except Exception as e:
+        logger.error(f"❌ Database connection failed on startup: {e}")
+    
+    # Index seeding, rollup refresh, suggestion precompute and upload retention all run as jobs
+    scheduler.start()
+    # Invalidations published by the other workers
+    start_cache_sync()
+    
+    yield
+    
+    logger.info("SmartCafe AI Backend shutting down...")
+    stop_cache_sync()
+    await scheduler.drain()
+
 app = FastAPI(
     title="SmartCafe AI Backend",
     description="AI-powered cafe management dashboard backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Admission control, deadlines and disconnect cancellation for the expensive routes.
+# Added before CORS so that its 503/504 responses still carry the CORS headers.
+app.add_middleware(RequestGuardMiddleware)
+
 # CORS - Updated for production with more specific configuration
 app.add_middleware(
     CORSMiddleware,
@@ -44,6 +88,7 @@ app.add_middleware(
         "X-Requested-With",
         "Origin",
         "X-CSRF-Token",
+        "X-Request-Timeout",
     ],
 )
 
@@ -55,6 +100,15 @@ app.include_router(sentiment_router)
 app.include_router(keywords_router)
 app.include_router(uploadcsv_router)  # Add this line
 app.include_router(files_router)      # Add this line
+app.include_router(live_reviews_router)
+app.include_router(dashboard_router)
+app.include_router(review_dedup_router)
+app.include_router(topics_router)
+app.include_router(aspects_router)
+app.include_router(search_router)
+app.include_router(jobs_router)
+app.include_router(snapshot_router)
+app.include_router(cache_router)
 
 @app.get("/")
 async def root():
@@ -71,7 +125,8 @@ async def health_check():
             "status": "healthy",
             "database": "connected",
             "message": "All systems operational",
-            "review_count": response.count if hasattr(response, 'count') else 0
+            "review_count": response.count if hasattr(response, 'count') else 0,
+            "admission": admission_stats()
         }
     except Exception as e:
         logger.error(f"Health check failed: {e}")
@@ -105,6 +160,16 @@ async def submit_review(
                 "message": "Rating must be between 1 and 5"
             }
         
+        # Reject copy-paste floods before they reach the database
+        duplicate = check_duplicate(review_text)
+        if duplicate and duplicate["mode"] == "reject":
+            logger.warning(f"Near-duplicate review rejected: {duplicate}")
+            return {
+                "status": "error",
+                "message": "This review looks like a duplicate of an existing review",
+                "duplicate_of": duplicate["duplicate_of"]
+            }
+        
         # Prepare data for insertion
         data = {
             "review_text": review_text.strip(),
@@ -113,17 +178,25 @@ async def submit_review(
         
         logger.info(f"Attempting to insert review with rating: {rating}")
         
-        # Insert into Supabase
-        response = supabase.table("reviews").insert(data).execute()
+        # Insert into Supabase, off the event loop so a slow insert does not stall other requests
+        response = await asyncio.to_thread(supabase.table("reviews").insert(data).execute)
         
         # Check if the insert was successful
         if response.data and len(response.data) > 0:
             logger.info(f"Review inserted successfully: {response.data[0]}")
-            return {
+            
+            # Let live dashboards and in-memory analytics know about it
+            await publish_review(response.data[0])
+            
+            result = {
                 "status": "success",
                 "message": "Review submitted successfully.",
                 "data": response.data[0]
             }
+            if duplicate:
+                logger.warning(f"Near-duplicate review flagged: {duplicate}")
+                result["duplicate_of"] = duplicate["duplicate_of"]
+            return result
         else:
             logger.error(f"Insert response was empty or invalid: {response}")
             return {
@@ -143,25 +216,12 @@ async def submit_review(
 async def not_found_handler(request, exc):
     return {"status": "error", "message": "Endpoint not found", "detail": str(exc)}
 
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request, exc):
+    logger.warning(f"Deadline exceeded for {request.method} {request.url.path}")
+    return JSONResponse(status_code=504, content={"status": "error", "message": "The request took too long to complete"})
+
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     logger.error(f"Internal server error: {exc}")
     return {"status": "error", "message": "Internal server error", "detail": str(exc)}
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
-    """Run on application startup"""
-    logger.info("SmartCafe AI Backend starting up...")
-    
-    # Test database connection on startup
-    try:
-        response = supabase.table("reviews").select("count", count="exact").limit(1).execute()
-        logger.info("✅ Database connection successful on startup")
-    except Exception as e:
-        logger.error(f"❌ Database connection failed on startup: {e}")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Run on application shutdown"""
-    logger.info("SmartCafe AI Backend shutting down...")
@@ -0,0 +1,254 @@
+from fastapi import APIRouter, Query
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
+import logging
+import re
+import threading
+import time
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.deadlines import DeadlineExceeded, run_blocking
+from services.review_snapshot import review_snapshot
+from nltk.sentiment import SentimentIntensityAnalyzer
+from routes.sentiment import classify_sentiment
+from routes.keywords import extract_smart_cafe_keywords
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Words that place a clause under an aspect
+ASPECT_TERMS = {
+    "service": {"service", "staff", "barista", "baristas", "waiter", "waitress", "server", "servers",
+                "manager", "employee", "employees", "cashier", "friendly", "rude", "polite", "helpful"},
+    "coffee": {"coffee", "latte", "lattes", "espresso", "cappuccino", "mocha", "americano", "brew",
+               "tea", "drink", "drinks", "beans", "flat", "cortado"},
+    "price": {"price", "prices", "priced", "expensive", "cheap", "overpriced", "affordable", "cost",
+              "value", "pricey", "worth", "money"},
+    "atmosphere": {"atmosphere", "ambiance", "ambience", "decor", "music", "cozy", "noisy", "loud",
+                   "quiet", "vibe", "seating", "clean", "dirty", "interior", "comfortable", "crowded"},
+    "wait": {"wait", "waited", "waiting", "queue", "line", "slow", "quick", "fast", "forever",
+             "minutes", "delay", "delayed", "prompt"},
+}
+ASPECTS = tuple(ASPECT_TERMS)
+
+# Cafe vocabulary VADER has no valence for. Only the aspect scores use it, through
+# their own analyzer, so overall labels stay on the stock lexicon used by /sentiment
+CAFE_LEXICON = {
+    "slow": -1.2,
+    "sluggish": -1.2,
+    "overpriced": -1.6,
+    "pricey": -0.8,
+    "stale": -1.4,
+    "watery": -1.2,
+    "bland": -1.1,
+    "lukewarm": -1.0,
+    "burnt": -1.3,
+    "crowded": -0.6,
+    "loud": -0.8,
+    "cozy": 1.6,
+    "spotless": 1.6,
+    "tasty": 1.8,
+    "affordable": 1.0,
+}
+aspect_sia = SentimentIntensityAnalyzer()
+for term, valence in CAFE_LEXICON.items():
+    aspect_sia.lexicon.setdefault(term, valence)
+
+# Sentence ends and contrastive conjunctions start a new clause
+CLAUSE_SPLIT_RE = re.compile(r"[.!?;\n]+|,?\s+\b(?:but|however|although|though|yet|whereas)\b\s*", re.IGNORECASE)
+WORD_RE = re.compile(r"\b[a-zA-Z]+\b")
+
+
+def split_clauses(text: str) -> List[str]:
+    """Clauses of `text`, split at sentence ends and contrastive conjunctions"""
+    return [piece.strip() for piece in CLAUSE_SPLIT_RE.split(text) if piece.strip()]
+
+
+def analyze_review(text: str, rating: int) -> Dict[str, Any]:
+    """Overall sentiment, keywords and per-aspect sentiment for one review.
+
+    The overall label comes from `classify_sentiment` on the whole text, so it is
+    the label /sentiment gives the review; only clauses naming an aspect are scored
+    on their own.
+    """
+    text = text or ""
+    label, compound = classify_sentiment(text, rating)
+    words: List[str] = []
+    scores: Dict[str, List[float]] = {}
+    for clause in split_clauses(text):
+        tokens = WORD_RE.findall(clause.lower())
+        words.extend(tokens)
+        mentioned = [aspect for aspect, vocabulary in ASPECT_TERMS.items() if vocabulary.intersection(tokens)]
+        if not mentioned:
+            continue
+        clause_score = aspect_sia.polarity_scores(clause)["compound"]
+        for aspect in mentioned:
+            scores.setdefault(aspect, []).append(clause_score)
+
+    keywords = extract_smart_cafe_keywords(text.lower().strip(), rating, words=words)
+
+    return {
+        "sentiment": label,
+        "compound": compound,
+        "keywords": keywords,
+        "aspects": {aspect: round(sum(values) / len(values), 4) for aspect, values in scores.items()},
+    }
+
+
+# Analyses of just-inserted reviews, so every review_events listener reuses one pass
+_recent_analyses: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+_recent_analyses_lock = threading.Lock()
+RECENT_ANALYSES_SIZE = 256
+
+
+def analysis_for_review(review: Dict[str, Any]) -> Dict[str, Any]:
+    """analyze_review for a stored row, memoized by review id"""
+    review_id = review.get("id")
+    if review_id is not None:
+        with _recent_analyses_lock:
+            cached = _recent_analyses.get(review_id)
+        if cached is not None:
+            return cached
+
+    analysis = analyze_review(review.get("review_text", ""), review.get("rating", 3))
+    if review_id is not None:
+        with _recent_analyses_lock:
+            _recent_analyses[review_id] = analysis
+            while len(_recent_analyses) > RECENT_ANALYSES_SIZE:
+                _recent_analyses.popitem(last=False)
+    return analysis
+
+
+class AspectStore:
+    """Per-review aspect scores plus running per-aspect aggregates"""
+
+    def __init__(self):
+        self.ready = False
+        # review id -> tuple aligned with ASPECTS (None where the aspect is not mentioned)
+        self._by_review: Dict[int, Tuple[Optional[float], ...]] = {}
+        self._totals = {aspect: {"mentions": 0, "score_sum": 0.0, "positive": 0, "negative": 0} for aspect in ASPECTS}
+        # Reviews whose text was evicted from the snapshot before they were scored
+        self._unscored: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def unscored(self) -> int:
+        return len(self._unscored)
+
+    def skip(self, review_id: int) -> None:
+        """Note a review that cannot be scored because its text is gone"""
+        with self._lock:
+            if review_id not in self._by_review:
+                self._unscored.add(review_id)
+
+    def add(self, review_id: Optional[int], aspects: Dict[str, float]) -> None:
+        with self._lock:
+            if review_id is not None:
+                if review_id in self._by_review:
+                    return
+                self._unscored.discard(review_id)
+                self._by_review[review_id] = tuple(aspects.get(aspect) for aspect in ASPECTS)
+            for aspect, score in aspects.items():
+                totals = self._totals[aspect]
+                totals["mentions"] += 1
+                totals["score_sum"] += score
+                if score >= 0.05:
+                    totals["positive"] += 1
+                elif score <= -0.05:
+                    totals["negative"] += 1
+
+    def remove(self, review_ids: Iterable[int]) -> None:
+        with self._lock:
+            for review_id in review_ids:
+                self._unscored.discard(review_id)
+                scores = self._by_review.pop(review_id, None)
+                if scores is None:
+                    continue
+                for aspect, score in zip(ASPECTS, scores):
+                    if score is None:
+                        continue
+                    totals = self._totals[aspect]
+                    totals["mentions"] -= 1
+                    totals["score_sum"] -= score
+                    if score >= 0.05:
+                        totals["positive"] -= 1
+                    elif score <= -0.05:
+                        totals["negative"] -= 1
+
+    def for_review(self, review_id: int) -> Optional[Dict[str, float]]:
+        scores = self._by_review.get(review_id)
+        if scores is None:
+            return None
+        return {aspect: score for aspect, score in zip(ASPECTS, scores) if score is not None}
+
+    def summary(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return summarize_aspects(self._totals)
+
+
+def summarize_aspects(totals: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Dashboard shape for per-aspect totals, most discussed first"""
+    result = []
+    for aspect, total in totals.items():
+        mentions = total["mentions"]
+        result.append({
+            "aspect": aspect,
+            "mentions": mentions,
+            "average_score": round(total["score_sum"] / mentions, 3) if mentions else 0,
+            "positive": total["positive"],
+            "negative": total["negative"],
+            "neutral": mentions - total["positive"] - total["negative"],
+        })
+    result.sort(key=lambda item: item["mentions"], reverse=True)
+    return result
+
+
+aspect_store = AspectStore()
+
+
+def seed_aspect_store():
+    """Score the existing review history (run once at startup)"""
+    started = time.perf_counter()
+    review_snapshot.ensure_fresh()
+    for review in review_snapshot.rows():
+        if review.review_text is None:
+            aspect_store.skip(review.id)
+            continue
+        analysis = analyze_review(review.review_text, review.get("rating", 3))
+        aspect_store.add(review.id, analysis["aspects"])
+    aspect_store.ready = True
+    logger.info(f"Aspect store ready: {len(review_snapshot)} reviews in {time.perf_counter() - started:.2f}s")
+
+
+@on_review_inserted
+def score_new_review(review: Dict):
+    aspect_store.add(review.get("id"), analysis_for_review(review)["aspects"])
+
+
+@on_reviews_deleted
+def unscore_deleted_reviews(reviews: List[Dict]):
+    aspect_store.remove(review.get("id") for review in reviews)
+
+
+@router.get("/aspects")
+async def get_aspects(review_id: Optional[int] = Query(default=None)):
+    """Aspect-level sentiment (service, coffee, price, atmosphere, wait) across all reviews or for one review"""
+    try:
+        if not aspect_store.ready:
+            await run_blocking(seed_aspect_store)
+
+        if review_id is not None:
+            scores = aspect_store.for_review(review_id)
+            if scores is None:
+                return {"status": "error", "message": "Review not found"}
+            return {"status": "success", "review_id": review_id, "aspects": scores}
+
+        return {"status": "success", "aspects": aspect_store.summary(), "text_evicted": aspect_store.unscored}
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Aspect sentiment error: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Aspect analysis failed: {str(e)}",
+            "aspects": []
+        }
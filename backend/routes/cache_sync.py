@@ -0,0 +1,144 @@
+from fastapi import APIRouter
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import threading
+from services.shared_cache import shared_cache
+from services.review_events import on_local_review_inserted, publish_review, publish_reviews_deleted
+from services.review_snapshot import review_snapshot
+from services.file_catalog import file_catalog
+from services.scheduler import scheduler
+from routes.chatbot_reviews import answer_cache
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+_loop = None
+
+# Newest reviews generation this worker has applied: its own writes plus the
+# other workers' announcements it has received
+_synced_generation: Optional[int] = None
+_sync_lock = threading.Lock()
+
+
+def review_cache_key(prefix: str, *parts: Any) -> str:
+    """Shared cache key for data derived from the reviews table.
+
+    Keyed on the reviews generation alone, so every worker shares the entries.
+    A worker keys on the generation it has applied, not the newest one
+    published, and catches its snapshot up first, so it never caches stale
+    results under a generation whose changes it has not seen.
+    """
+    generation = synced_generation()
+    review_snapshot.ensure_fresh()
+    suffix = ":".join(str(part) for part in parts)
+    return f"{prefix}:{generation}:{suffix}"
+
+
+def synced_generation() -> int:
+    global _synced_generation
+    with _sync_lock:
+        if _synced_generation is None:
+            _synced_generation = shared_cache.generation("reviews")
+            # Whatever the snapshot holds may predate that generation
+            review_snapshot.mark_stale()
+        return _synced_generation
+
+
+def _apply_generation(generation: Optional[int]) -> None:
+    global _synced_generation
+    if generation is None:
+        return
+    with _sync_lock:
+        if _synced_generation is None or generation > _synced_generation:
+            _synced_generation = generation
+
+
+def bump_reviews(message: Dict[str, Any]) -> int:
+    """Tell every worker the reviews changed (after this worker applied the change itself)"""
+    generation = shared_cache.bump("reviews", message)
+    with _sync_lock:
+        if _synced_generation is None or generation > _synced_generation + 1:
+            # Another worker's change landed in between and its announcement has not arrived yet
+            review_snapshot.mark_stale()
+    _apply_generation(generation)
+    return generation
+
+
+@on_local_review_inserted
+async def invalidate_review_caches(review: Dict):
+    """Tell every worker that the reviews changed"""
+    await asyncio.to_thread(bump_reviews, {"id": review.get("id")})
+
+
+async def absorb_remote_review(review_id: int):
+    """Feed a review another worker stored to this worker's insert listeners"""
+    try:
+        record = review_snapshot.get(review_id)
+        if record is None:
+            await asyncio.to_thread(review_snapshot.refresh)
+            record = review_snapshot.get(review_id)
+        if record is None:
+            # Deleted again already; the periodic rollup refresh settles anything else
+            return
+        await publish_review(record.to_dict(), remote=True)
+    except Exception as e:
+        logger.error(f"Failed to absorb review {review_id} from another worker: {e}")
+
+
+def _on_remote_reviews(channel: str, message: Dict[str, Any]):
+    """Another worker stored or deleted reviews: drop what this worker derived from the old data"""
+    deleted = message.get("deleted")
+    if deleted:
+        # Rows as this worker knows them, so the listeners can subtract what they added
+        rows = [record.to_dict() for record in map(review_snapshot.get, deleted) if record is not None]
+        # Hidden right away, before the generation below is applied
+        review_snapshot.discard(deleted)
+        if _loop is not None:
+            _loop.call_soon_threadsafe(_loop.create_task, publish_reviews_deleted(rows))
+    review_snapshot.mark_stale()
+    answer_cache.invalidate()
+    _apply_generation(message.get("generation"))
+    if _loop is None:
+        return
+    if message.get("id") is not None:
+        # Dedup index, topic model, live feeds and the rest learn about it as if it was stored here
+        _loop.call_soon_threadsafe(_loop.create_task, absorb_remote_review(message["id"]))
+    if scheduler.running:
+        # Pull the new rows into the snapshot and the rollups built on it
+        _loop.call_soon_threadsafe(scheduler.submit, "refresh_review_analyses")
+
+
+def _on_remote_files(channel: str, message: Dict[str, Any]):
+    file_catalog.invalidate(message.get("cafe_name"), broadcast=False)
+
+
+shared_cache.subscribe("reviews", _on_remote_reviews)
+shared_cache.subscribe("files", _on_remote_files)
+
+
+def start_cache_sync():
+    """Start receiving other workers' invalidations (call from the running event loop)"""
+    global _loop
+    _loop = asyncio.get_running_loop()
+    shared_cache.start()
+    logger.info(f"Shared cache backend: {shared_cache.name}")
+
+
+def stop_cache_sync():
+    shared_cache.close()
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Shared cache backend, hit/miss counters and current generations"""
+    try:
+        stats = await asyncio.to_thread(shared_cache.stats)
+        stats["generations"] = {
+            "reviews": await asyncio.to_thread(shared_cache.generation, "reviews"),
+            "files": await asyncio.to_thread(shared_cache.generation, "files"),
+        }
+        return {"status": "success", **stats}
+    except Exception as e:
+        logger.error(f"Shared cache stats error: {str(e)}")
+        return {"status": "error", "message": f"Cache stats unavailable: {str(e)}"}
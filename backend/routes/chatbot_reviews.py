@@ -5,6 +5,12 @@ from pydantic import BaseModel
 from typing import List, Optional
 from dotenv import load_dotenv
 from supabase_client import supabase
+from services.answer_cache import AnswerCache, normalize_question
+from services.chat_sessions import ChatSession, ChatSessionStore
+from services.deadlines import DeadlineExceeded, call_timeout, run_blocking
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.shared_cache import shared_cache
+import asyncio
 import logging
 
 load_dotenv()
@@ -13,6 +19,14 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+# Standalone questions only: follow-ups ("shorten it") depend on the conversation
+answer_cache = AnswerCache(ttl_seconds=ANSWER_CACHE_TTL_SECONDS)
+
+CHAT_SESSION_DB = os.getenv("CHAT_SESSION_DB")
+CHAT_MAX_SESSIONS = int(os.getenv("CHAT_MAX_SESSIONS", "1000"))
+chat_sessions = ChatSessionStore(max_sessions=CHAT_MAX_SESSIONS, db_path=CHAT_SESSION_DB)
 
 class ChatMessage(BaseModel):
     role: str
@@ -20,13 +34,17 @@ class ChatMessage(BaseModel):
 
 class ChatRequest(BaseModel):
     question: str
+    # Preferred: the server keeps the conversation, the client only sends the new question
+    session_id: Optional[str] = None
+    # Legacy clients may still send the whole conversation instead
     chat_history: Optional[List[ChatMessage]] = []
     coffee_shop_name: Optional[str] = None
 
 async def fetch_recent_reviews():
     """Fetch recent reviews directly from Supabase"""
     try:
-        response = supabase.table("reviews").select("review_text, rating, timestamp").order("timestamp", desc=True).limit(30).execute()
+        query = supabase.table("reviews").select("review_text, rating, timestamp").order("timestamp", desc=True).limit(30)
+        response = await run_blocking(query.execute)
         
         if response.data:
             reviews = response.data
@@ -40,10 +58,29 @@ async def fetch_recent_reviews():
                 )
             return "\n".join(formatted_reviews[:20])
         return "No reviews found in the database."
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error fetching reviews for chatbot: {e}")
         return "Unable to access review data at this time."
 
+@on_review_inserted
+@on_reviews_deleted
+def expire_cached_answers(changed):
+    # The review context changed, so answers built on the old one are stale
+    answer_cache.invalidate()
+
+def shared_answer_key(request: ChatRequest, context_version: int) -> str:
+    """Cross-worker tier: exact normalized question only (near-duplicate matching stays per worker)"""
+    shop = (request.coffee_shop_name or "").strip().lower()
+    return f"chat:{context_version}:{shop}:{normalize_question(request.question)}"
+
+def record_turn(session: ChatSession, question: str, answer: str):
+    """Append a question/answer pair to the session and persist it"""
+    session.add_turn(True, question)
+    session.add_turn(False, answer)
+    chat_sessions.save(session)
+
 @router.post("/chatbot/reviews")
 async def chat_with_review_bot(request: ChatRequest):
     """AI business assistant chatbot"""
@@ -56,6 +93,24 @@ async def chat_with_review_bot(request: ChatRequest):
             }
 
         logger.info(f"Chatbot received question: {request.question}")
+
+        session = None
+        if not request.chat_history:
+            session = chat_sessions.get_or_create(request.session_id, request.coffee_shop_name)
+
+        cacheable = session is not None and not session.turns
+        context_version = await asyncio.to_thread(shared_cache.generation, "reviews")
+        if cacheable:
+            cached_answer = answer_cache.get(request.question, request.coffee_shop_name, context_version)
+            if cached_answer is None:
+                # Another worker may already have answered the same question
+                cached_answer = await asyncio.to_thread(shared_cache.get, shared_answer_key(request, context_version))
+                if cached_answer is not None:
+                    answer_cache.put(request.question, request.coffee_shop_name, context_version, cached_answer)
+            if cached_answer is not None:
+                logger.info("Chatbot answer served from cache")
+                record_turn(session, request.question, cached_answer)
+                return {"status": "success", "answer": cached_answer, "cache": "hit", "session_id": session.session_id}
         
         # Fetch review data
         reviews_data = await fetch_recent_reviews()
@@ -96,7 +151,9 @@ Remember: Be concise by default, and only expand when specifically asked to elab
         # Build conversation
         messages = [{"role": "system", "content": system_prompt}]
         
-        if request.chat_history:
+        if session is not None:
+            messages.extend(session.messages())
+        elif request.chat_history:
             recent_history = request.chat_history[-8:]
             for msg in recent_history:
                 messages.append({"role": msg.role, "content": msg.content})
@@ -112,19 +169,33 @@ Remember: Be concise by default, and only expand when specifically asked to elab
         )
 
         try:
-            response = client.chat.completions.create(
+            # Off the event loop, and never waiting longer than the request has left
+            response = await run_blocking(lambda: client.chat.completions.create(
                 model="mistralai/mistral-7b-instruct:free",
                 messages=messages,
                 max_tokens=400,
                 temperature=0.6,
-                timeout=25
-            )
+                timeout=call_timeout(25)
+            ))
             
             answer = response.choices[0].message.content
             logger.info("Chatbot response generated successfully")
+
+            if cacheable and answer:
+                answer_cache.put(request.question, request.coffee_shop_name, context_version, answer)
+                await asyncio.to_thread(shared_cache.set, shared_answer_key(request, context_version), answer, ANSWER_CACHE_TTL_SECONDS)
+            if session is not None:
+                record_turn(session, request.question, answer)
             
-            return {"status": "success", "answer": answer}
+            return {
+                "status": "success",
+                "answer": answer,
+                "cache": "miss" if cacheable else "bypass",
+                "session_id": session.session_id if session is not None else None
+            }
             
+        except DeadlineExceeded:
+            raise
         except Exception as api_error:
             logger.error(f"OpenRouter API error: {api_error}")
             return {
@@ -132,9 +203,18 @@ Remember: Be concise by default, and only expand when specifically asked to elab
                 "answer": "I'm having trouble connecting to my AI service right now. Please try again in a moment."
             }
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Chatbot error: {str(e)}")
         return {
             "status": "error",
             "answer": "I apologize, but I encountered an error. Please try asking your question again."
         }
+
+@router.delete("/chatbot/sessions/{session_id}")
+async def reset_chat_session(session_id: str):
+    """Forget a chatbot conversation"""
+    if not chat_sessions.delete(session_id):
+        return {"status": "error", "message": "Session not found"}
+    return {"status": "success", "message": "Session cleared"}
@@ -0,0 +1,170 @@
+from fastapi import APIRouter, Query, Request
+from typing import Any, Dict, List
+import asyncio
+import logging
+import os
+from services.deadlines import check_deadline, run_blocking
+from services.review_snapshot import review_snapshot
+from services.responses import fast_json
+from routes.keywords import summarize_keywords
+from routes.aspects import ASPECTS, analyze_review, summarize_aspects
+from routes.sentiment import sentiment_labels
+from routes.review_suggestions import build_suggestions
+from services.file_catalog import file_catalog
+from services.shared_cache import shared_cache
+from routes.cache_sync import review_cache_key
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+DASHBOARD_CACHE_TTL_SECONDS = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "300"))
+# How many reviews to analyse between request deadline checks
+DEADLINE_CHECK_EVERY = 500
+
+
+def fetch_all_reviews() -> List[Any]:
+    """Every review from the shared snapshot, newest first"""
+    review_snapshot.ensure_fresh()
+    return list(review_snapshot.rows(newest_first=True))
+
+
+def analyze_reviews(reviews: List[Any], recent_limit: int = 10) -> Dict[str, Any]:
+    """Compute every review-based dashboard widget in one pass over the rows (blocking).
+
+    Stops with DeadlineExceeded once the request deadline passes, so an
+    abandoned request does not keep a worker thread busy.
+    """
+    sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
+    rating_distribution = {str(star): 0 for star in range(1, 6)}
+    rating_total = 0
+    rated_reviews = 0
+    aspect_totals = {aspect: {"mentions": 0, "score_sum": 0.0, "positive": 0, "negative": 0} for aspect in ASPECTS}
+    all_keywords = []
+    # Reviews whose text the snapshot evicted: kept out of keywords and aspects
+    text_evicted = 0
+
+    for index, review in enumerate(reviews):
+        if index % DEADLINE_CHECK_EVERY == 0:
+            check_deadline()
+        rating = review.get("rating", 3)
+
+        if review.get("review_text") is None:
+            text_evicted += 1
+            # A label taken before the text was evicted still counts
+            stored = sentiment_labels.get(review.get("id"))
+            if stored is not None:
+                sentiment_counts[stored[0]] += 1
+            aspects = {}
+        else:
+            analysis = analyze_review(review.get("review_text"), rating)
+            # The stored label wins, so the pie always matches /sentiment
+            label, _ = sentiment_labels.add(review.get("id"), (analysis["sentiment"], analysis["compound"]))
+            sentiment_counts[label] += 1
+            all_keywords.extend(analysis["keywords"])
+            aspects = analysis["aspects"]
+
+        for aspect, score in aspects.items():
+            totals = aspect_totals[aspect]
+            totals["mentions"] += 1
+            totals["score_sum"] += score
+            if score >= 0.05:
+                totals["positive"] += 1
+            elif score <= -0.05:
+                totals["negative"] += 1
+
+        if review.get("rating"):
+            rating_total += rating
+            rated_reviews += 1
+            if str(rating) in rating_distribution:
+                rating_distribution[str(rating)] += 1
+
+    total = len(reviews)
+    with_text = total - text_evicted
+    return {
+        "recent_reviews": [review.to_dict() for review in reviews[:recent_limit]],
+        "sentiment": {"counts": sentiment_counts, "total": sum(sentiment_counts.values())},
+        "keywords": summarize_keywords(all_keywords, with_text) if with_text else {
+            "keywords": [],
+            "total_keywords_analyzed": 0,
+            "unique_keywords": 0,
+            "total_reviews": 0
+        },
+        "aspects": summarize_aspects(aspect_totals),
+        "ratings": {
+            "average": round(rating_total / rated_reviews, 2) if rated_reviews else 0,
+            "distribution": rating_distribution,
+            "total": rated_reviews
+        },
+        "total_reviews": total,
+        "text_evicted": text_evicted
+    }
+
+
+@router.get("/dashboard")
+async def get_dashboard(
+    request: Request,
+    cafe_name: str = Query(default="SmartCafe AI"),
+    recent_limit: int = Query(default=10, ge=0, le=100),
+    include_suggestions: bool = Query(default=True)
+):
+    """Everything the owner dashboard needs on mount, from a single reviews scan"""
+    # Served from the shared cache when any worker already built it for the current data
+    await run_blocking(review_snapshot.ensure_fresh)
+    cache_key = await asyncio.to_thread(dashboard_cache_key, cafe_name, recent_limit, include_suggestions)
+    dashboard, hit = await shared_cache.get_or_compute_async(
+        cache_key,
+        lambda: build_dashboard(cafe_name, recent_limit, include_suggestions),
+        DASHBOARD_CACHE_TTL_SECONDS,
+        cacheable=lambda result: result["status"] == "success",
+    )
+    return fast_json(request, dict(dashboard, cache="hit" if hit else "miss"))
+
+
+def dashboard_cache_key(cafe_name: str, recent_limit: int, include_suggestions: bool) -> str:
+    return review_cache_key("dashboard", shared_cache.generation("files"), cafe_name, recent_limit, include_suggestions)
+
+
+async def build_dashboard(cafe_name: str, recent_limit: int, include_suggestions: bool) -> Dict[str, Any]:
+    logger.info(f"Building dashboard for {cafe_name}...")
+
+    # Independent pieces run concurrently; the blocking clients each get a worker thread,
+    # and a piece that misses the request deadline is reported as an error
+    tasks = [
+        run_blocking(fetch_all_reviews),
+        run_blocking(file_catalog.query, cafe_name),
+    ]
+    if include_suggestions:
+        tasks.append(run_blocking(build_suggestions))
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    reviews, files = results[0], results[1]
+    errors = {}
+
+    if isinstance(reviews, Exception):
+        logger.error(f"Dashboard reviews error: {reviews}")
+        errors["reviews"] = str(reviews)
+        reviews = []
+    if isinstance(files, Exception):
+        logger.error(f"Dashboard files error: {files}")
+        errors["files"] = str(files)
+        files = []
+
+    # The full VADER/keyword/aspect pass is CPU-bound: keep it off the event loop
+    dashboard = await run_blocking(analyze_reviews, reviews, recent_limit)
+    dashboard["files"] = files["files"] if isinstance(files, dict) else files
+
+    if include_suggestions:
+        suggestions = results[2]
+        if isinstance(suggestions, Exception):
+            logger.error(f"Dashboard suggestions error: {suggestions}")
+            errors["suggestions"] = str(suggestions)
+            suggestions = {"suggestions": "Service temporarily unavailable."}
+        dashboard["suggestions"] = suggestions.get("suggestions")
+        dashboard["insights"] = suggestions.get("insights")
+
+    dashboard["status"] = "partial" if errors else "success"
+    if errors:
+        dashboard["errors"] = errors
+
+    logger.info(f"Dashboard built from {dashboard['total_reviews']} reviews")
+    return dashboard
@@ -1,49 +1,57 @@
-from fastapi import APIRouter, Query
-from fastapi.responses import JSONResponse
-from supabase import create_client, Client
-import os
-from datetime import datetime
+from fastapi import APIRouter, Header, Query, Request
+from fastapi.responses import JSONResponse, Response
+from services.responses import fast_json
+from services.file_catalog import file_catalog, SORT_FIELDS
+from services.storage import get_storage
+from services.columnar import ingest_csv, load_stats, read_rows
+from supabase_client import supabase
+from typing import List, Optional, Tuple
+from datetime import date
+import asyncio
+import re
 
 files_router = APIRouter()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+# Buckets whose objects may be served through /files/content
+SERVED_BUCKETS = {"csv-uploads"}
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing Supabase configuration. Please set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables.")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Largest page served by /uploaded-files/{file_id}/rows
+MAX_ROWS_PAGE_SIZE = 1000
 
 @files_router.get("/uploaded-files")
-async def get_uploaded_files(cafe_name: str = Query(default="SmartCafe AI")):
+async def get_uploaded_files(
+    request: Request,
+    cafe_name: str = Query(default="SmartCafe AI"),
+    limit: Optional[int] = Query(default=None, ge=1, le=1000, description="Page size; every file when omitted"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    sort: str = Query(default="date", description=f"One of: {', '.join(SORT_FIELDS)}"),
+    order: str = Query(default="desc", pattern="^(asc|desc)$"),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    min_size: Optional[int] = Query(default=None, ge=0, description="Minimum file size in bytes"),
+    max_size: Optional[int] = Query(default=None, ge=0, description="Maximum file size in bytes")
+):
+    """Get the uploaded files for a cafe with formatted metadata, optionally one page at a time"""
     try:
-        result = supabase.table('uploaded_files')\
-            .select('*')\
-            .eq('cafe_name', cafe_name)\
-            .order('upload_timestamp', desc=True)\
-            .execute()
-
-        formatted_files = []
-        for file in result.data:
-            size_mb = file['file_size'] / (1024 * 1024)
-            upload_date = datetime.fromisoformat(file['upload_timestamp'].replace('Z', '+00:00'))
-            formatted_date = upload_date.strftime('%Y-%m-%d')
-
-            formatted_files.append({
-                'id': file['id'],
-                'name': file['filename'] if file['filename'] else 'Unknown File',  # Fallback if filename is empty
-                'date': formatted_date,
-                'size': f"{size_mb:.1f} MB",
-                'status': 'uploaded',
-                'supabase_url': file['file_url'],
-                'storage_path': file['storage_path']
-            })
-
+        page = await asyncio.to_thread(
+            file_catalog.query,
+            cafe_name,
+            sort=sort,
+            descending=order == "desc",
+            limit=limit,
+            cursor=cursor,
+            date_from=date_from,
+            date_to=date_to,
+            min_size=min_size,
+            max_size=max_size,
+        )
+    except ValueError as e:
         return JSONResponse(
-            status_code=200,
+            status_code=400,
             content={
-                'status': 'success',
-                'files': formatted_files
+                'status': 'error',
+                'message': f'Invalid file query: {str(e)}',
+                'files': []
             }
         )
     except Exception as e:
@@ -55,3 +63,121 @@ async def get_uploaded_files(cafe_name: str = Query(default="SmartCafe AI")):
                 'files': []
             }
         )
+
+    return fast_json(request, {
+        'status': 'success',
+        **page
+    })
+
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single `bytes=start-end` range into [start, end), None if unsatisfiable"""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(last), 0), size
+    else:
+        start = int(first)
+        end = min(int(last) + 1, size) if last else size
+    if start >= size or start >= end:
+        return None
+    return start, end
+
+@files_router.get("/files/content/{bucket}/{storage_path:path}")
+async def get_file_content(
+    bucket: str,
+    storage_path: str,
+    range_header: Optional[str] = Header(default=None, alias="Range")
+):
+    """Serve a stored file, honouring single byte-range requests"""
+    if bucket not in SERVED_BUCKETS:
+        return JSONResponse(status_code=404, content={'status': 'error', 'message': 'Bucket not found'})
+
+    storage = get_storage(bucket)
+    try:
+        size = await asyncio.to_thread(storage.size, storage_path)
+        headers = {"Accept-Ranges": "bytes"}
+
+        if range_header:
+            byte_range = parse_range(range_header, size)
+            if byte_range is None:
+                return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+            start, end = byte_range
+            content = await asyncio.to_thread(storage.read_range, storage_path, start, end)
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+            return Response(content=content, status_code=206, media_type="text/csv", headers=headers)
+
+        content = await asyncio.to_thread(storage.read, storage_path)
+        return Response(content=content, media_type="text/csv", headers=headers)
+    except (FileNotFoundError, ValueError):
+        return JSONResponse(status_code=404, content={'status': 'error', 'message': 'File not found'})
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                'status': 'error',
+                'message': f'Failed to read file: {str(e)}'
+            }
+        )
+
+async def _ingested_file(file_id: int) -> Optional[Tuple[str, dict]]:
+    """Storage path and columnar stats of an uploaded file, ingesting it if needed; None if unknown"""
+    result = await asyncio.to_thread(
+        supabase.table('uploaded_files').select('id, storage_path').eq('id', file_id).execute
+    )
+    if not result.data:
+        return None
+
+    storage_path = result.data[0]['storage_path']
+    stats = load_stats(storage_path)
+    if stats is None:
+        # Uploaded before the ingest stage existed, or ingest failed - build it now
+        stats = await asyncio.to_thread(ingest_csv, get_storage('csv-uploads'), storage_path)
+    return storage_path, stats
+
+@files_router.get("/uploaded-files/{file_id}/summary")
+async def get_file_summary(file_id: int):
+    """Schema and column stats for an uploaded CSV, from its columnar sidecar"""
+    try:
+        ingested = await _ingested_file(file_id)
+        if ingested is None:
+            return JSONResponse(status_code=404, content={'status': 'error', 'message': 'File not found'})
+
+        return {'status': 'success', 'file_id': file_id, 'summary': ingested[1]}
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                'status': 'error',
+                'message': f'Failed to summarize file: {str(e)}'
+            }
+        )
+
+@files_router.get("/uploaded-files/{file_id}/rows")
+async def get_file_rows(
+    file_id: int,
+    columns: Optional[List[str]] = Query(default=None, description="Columns to return (all when omitted)"),
+    offset: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1, le=MAX_ROWS_PAGE_SIZE)
+):
+    """A page of rows from the columnar sidecar; only the requested columns are read"""
+    try:
+        ingested = await _ingested_file(file_id)
+        if ingested is None:
+            return JSONResponse(status_code=404, content={'status': 'error', 'message': 'File not found'})
+
+        page = await asyncio.to_thread(read_rows, ingested[0], columns, offset, limit)
+        return {'status': 'success', 'file_id': file_id, **page}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={'status': 'error', 'message': str(e)})
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                'status': 'error',
+                'message': f'Failed to read file rows: {str(e)}'
+            }
+        )
@@ -1,32 +1,43 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
 from supabase_client import supabase
+from services.delta import apply_since, next_watermark
+from services.responses import fast_json
 import logging
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 @router.get("/get-reviews")
-async def get_reviews():
+async def get_reviews(
+    request: Request,
+    since: Optional[str] = Query(default=None, description="Only return reviews newer than this watermark (review id or ISO timestamp)")
+):
     """Fetch all reviews from Supabase, ordered by most recent first"""
     try:
-        logger.info("Fetching reviews from Supabase...")
+        logger.info(f"Fetching reviews from Supabase (since={since})...")
         
         # Use 'timestamp' column as shown in your table
-        response = supabase.table("reviews").select("*").order("timestamp", desc=True).execute()
+        query = supabase.table("reviews").select("*")
+        response = apply_since(query, since).order("timestamp", desc=True).execute()
         
         if response.data is not None:
             logger.info(f"Successfully fetched {len(response.data)} reviews")
-            return {
+            return fast_json(request, {
                 "status": "success",
                 "data": response.data,
-                "count": len(response.data)
-            }
+                "count": len(response.data),
+                "delta": since is not None,
+                "watermark": next_watermark(response.data, since)
+            })
         else:
             logger.warning("No reviews found in database")
             return {
                 "status": "success", 
                 "data": [],
-                "count": 0
+                "count": 0,
+                "delta": since is not None,
+                "watermark": since
             }
             
     except Exception as e:
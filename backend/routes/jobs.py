@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Query
+from fastapi.responses import JSONResponse
+from typing import Optional
+from services.scheduler import scheduler
+
+router = APIRouter()
+
+
+@router.get("/jobs")
+async def list_jobs(
+    name: Optional[str] = Query(default=None),
+    status: Optional[str] = Query(default=None, pattern="^(pending|running|succeeded|failed|cancelled)$"),
+    limit: int = Query(default=50, ge=1, le=200)
+):
+    """Registered background jobs and their most recent runs"""
+    return {
+        "status": "success",
+        "scheduler_running": scheduler.running,
+        "workers": scheduler.max_workers,
+        "definitions": scheduler.definitions(),
+        "jobs": [job.to_dict() for job in scheduler.jobs(name, status)[:limit]],
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of one job run"""
+    job = scheduler.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"status": "error", "message": "Job not found"})
+    return {"status": "success", "job": job.to_dict()}
+
+
+@router.post("/jobs/{name}/run")
+async def run_job(name: str):
+    """Queue an on-demand run (merged with an identical run that has not started yet)"""
+    definition = next((d for d in scheduler.definitions() if d["name"] == name), None)
+    if definition is None or not definition["manual"]:
+        return JSONResponse(status_code=404, content={"status": "error", "message": f"No runnable job named '{name}'"})
+    if not scheduler.running:
+        return JSONResponse(status_code=503, content={"status": "error", "message": "Job scheduler is not running"})
+
+    job = scheduler.submit(name)
+    return JSONResponse(status_code=202, content={"status": "success", "job": job.to_dict()})
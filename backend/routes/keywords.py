@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from collections import Counter, defaultdict
 import nltk
 import re
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
-from nltk.sentiment import SentimentIntensityAnalyzer
-from supabase_client import supabase
+from services.deadlines import DeadlineExceeded, run_blocking
+from services.review_snapshot import review_snapshot
+from services.shared_cache import shared_cache
+from routes.cache_sync import review_cache_key
+import asyncio
 import logging
 
 router = APIRouter()
@@ -16,13 +19,9 @@ logger = logging.getLogger(__name__)
 try:
     nltk.data.find('tokenizers/punkt')
     nltk.data.find('corpora/stopwords')
-    sia = SentimentIntensityAnalyzer()
 except LookupError:
     nltk.download('punkt')
     nltk.download('stopwords')
-    nltk.download('vader_lexicon')
-    from nltk.sentiment import SentimentIntensityAnalyzer
-    sia = SentimentIntensityAnalyzer()
 
 @router.get("/keyword-trends")
 async def keyword_analysis():
@@ -30,57 +29,14 @@ async def keyword_analysis():
     try:
         logger.info("Starting intelligent keyword analysis...")
         
-        # Fetch reviews directly from Supabase
-        response = supabase.table("reviews").select("*").execute()
-        
-        if not response.data:
-            return {
-                "keywords": [],
-                "total_keywords_analyzed": 0,
-                "unique_keywords": 0,
-                "total_reviews": 0
-            }
-        
-        reviews = response.data
-        logger.info(f"Analyzing {len(reviews)} reviews for meaningful keywords")
-        
-        # Extract smart keywords from all reviews
-        all_keywords = []
-        for review in reviews:
-            text = review.get("review_text", "")
-            rating = review.get("rating", 3)
-            
-            # Get cafe-specific keywords
-            keywords = extract_smart_cafe_keywords(text, rating)
-            all_keywords.extend(keywords)
-        
-        # Count keyword frequencies
-        keyword_counts = Counter(all_keywords)
-        
-        # Get top 8 most relevant keywords
-        top_keywords = keyword_counts.most_common(8)
-        
-        # Format results with additional context
-        results = []
-        total_reviews = len(reviews)
-        
-        for keyword, count in top_keywords:
-            percentage = round((count / total_reviews) * 100, 1)
-            results.append({
-                "keyword": keyword.title(),  # Capitalize for better presentation
-                "count": count,
-                "percentage": percentage,
-                "relevance_score": calculate_relevance_score(keyword, count, total_reviews)
-            })
-        
-        logger.info(f"Generated {len(results)} relevant keywords")
-        return {
-            "keywords": results,
-            "total_keywords_analyzed": len(all_keywords),
-            "unique_keywords": len(set(all_keywords)),
-            "total_reviews": total_reviews
-        }
+        # Reviews come from the shared in-memory snapshot; results are shared across workers
+        await run_blocking(review_snapshot.ensure_fresh)
+        cache_key = await asyncio.to_thread(review_cache_key, "keyword-trends")
+        result, _ = await run_blocking(shared_cache.get_or_compute, cache_key, compute_keyword_trends)
+        return result
         
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"Keywords analysis error: {str(e)}")
         return {
@@ -90,8 +46,76 @@ async def keyword_analysis():
             "total_reviews": 0
         }
 
-def extract_smart_cafe_keywords(text: str, rating: int) -> List[str]:
-    """Extract only meaningful, cafe-relevant keywords from review text"""
+def compute_keyword_trends() -> Dict[str, Any]:
+    """Keyword trends over every review in the snapshot"""
+    if not len(review_snapshot):
+        return {
+            "keywords": [],
+            "total_keywords_analyzed": 0,
+            "unique_keywords": 0,
+            "total_reviews": 0
+        }
+    
+    logger.info(f"Analyzing {len(review_snapshot)} reviews for meaningful keywords")
+    
+    # Extract smart keywords from all reviews
+    all_keywords = []
+    total_reviews = 0
+    text_evicted = 0
+    for review in review_snapshot.rows():
+        text = review.get("review_text")
+        if text is None:
+            # Evicted from the snapshot: left out rather than counted as a review without keywords
+            text_evicted += 1
+            continue
+        total_reviews += 1
+        rating = review.get("rating", 3)
+        
+        # Get cafe-specific keywords
+        keywords = extract_smart_cafe_keywords(text, rating)
+        all_keywords.extend(keywords)
+    
+    result = summarize_keywords(all_keywords, total_reviews) if total_reviews else {
+        "keywords": [],
+        "total_keywords_analyzed": 0,
+        "unique_keywords": 0,
+        "total_reviews": 0
+    }
+    result["text_evicted"] = text_evicted
+    logger.info(f"Generated {len(result['keywords'])} relevant keywords")
+    return result
+
+def summarize_keywords(all_keywords: List[str], total_reviews: int, top_n: int = 8) -> Dict[str, Any]:
+    """Rank extracted keywords into the /keyword-trends response shape"""
+    # Count keyword frequencies
+    keyword_counts = Counter(all_keywords)
+    
+    # Get top N most relevant keywords
+    top_keywords = keyword_counts.most_common(top_n)
+    
+    # Format results with additional context
+    results = []
+    for keyword, count in top_keywords:
+        percentage = round((count / total_reviews) * 100, 1)
+        results.append({
+            "keyword": keyword.title(),  # Capitalize for better presentation
+            "count": count,
+            "percentage": percentage,
+            "relevance_score": calculate_relevance_score(keyword, count, total_reviews)
+        })
+    
+    return {
+        "keywords": results,
+        "total_keywords_analyzed": len(all_keywords),
+        "unique_keywords": len(keyword_counts),
+        "total_reviews": total_reviews
+    }
+
+def extract_smart_cafe_keywords(text: str, rating: int, words: Optional[List[str]] = None) -> List[str]:
+    """Extract only meaningful, cafe-relevant keywords from review text.
+
+    `words` lets callers that already tokenized the lowercased text skip re-tokenizing.
+    """
     if not text or len(text.strip()) < 3:
         return []
     
@@ -165,7 +189,8 @@ def extract_smart_cafe_keywords(text: str, rating: int) -> List[str]:
     }
     
     # Tokenize and check for quality adjectives
-    words = re.findall(r'\b[a-zA-Z]+\b', text)
+    if words is None:
+        words = re.findall(r'\b[a-zA-Z]+\b', text)
     for word in words:
         if word.lower() in quality_adjectives and len(word) > 3:
             keywords.append(word.lower())
@@ -0,0 +1,127 @@
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from typing import Dict, List
+from datetime import datetime
+import asyncio
+import logging
+from services.broadcaster import Broadcaster, DROPPED, next_message
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.review_snapshot import review_snapshot
+from routes.sentiment import review_sentiment, sentiment_labels
+from routes.aspects import analysis_for_review
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+KEEPALIVE_SECONDS = 15
+
+review_broadcaster = Broadcaster(max_queue_size=100)
+
+# Whether every snapshot review has been labelled, so the label store's totals cover the table
+_counts_seeded = False
+
+
+def _load_sentiment_counts() -> Dict[str, int]:
+    """Label every review once (a full scan the first time only) and return the totals"""
+    global _counts_seeded
+    review_snapshot.ensure_fresh()
+    for review in review_snapshot.rows():
+        review_sentiment(review)
+    _counts_seeded = True
+    return sentiment_labels.counts()
+
+
+@on_review_inserted
+async def broadcast_new_review(review: Dict):
+    """Push a newly submitted review and the updated totals to live dashboards"""
+    if not _counts_seeded:
+        if not review_broadcaster.subscriber_count:
+            # Nobody is listening - seed lazily once a dashboard connects
+            return
+        await asyncio.to_thread(_load_sentiment_counts)
+
+    analysis = analysis_for_review(review)
+    # Totals and the review's label both come from the label store /sentiment sums
+    label, compound = review_sentiment(review)
+    counts = sentiment_labels.counts()
+
+    review_broadcaster.publish({
+        "type": "review",
+        "review": {
+            "id": review.get("id"),
+            "review_text": review.get("review_text", ""),
+            "rating": review.get("rating", 3),
+            "timestamp": review.get("timestamp") or datetime.now().isoformat(),
+            "sentiment": label,
+            "compound": compound,
+            "keywords": analysis["keywords"],
+            "aspects": analysis["aspects"],
+        },
+        "counts": counts,
+        "total": sum(counts.values()),
+    })
+
+
+@on_reviews_deleted
+def broadcast_deleted_reviews(reviews: List[Dict]):
+    """Take deleted reviews out of the running totals and tell live dashboards"""
+    if not _counts_seeded:
+        return
+    sentiment_labels.remove(review.get("id") for review in reviews)
+    counts = sentiment_labels.counts()
+    review_broadcaster.publish({
+        "type": "deleted",
+        "ids": [review.get("id") for review in reviews],
+        "counts": counts,
+        "total": sum(counts.values()),
+    })
+
+
+@router.websocket("/ws/reviews")
+async def reviews_websocket(websocket: WebSocket):
+    """Live feed of new reviews for owner dashboards"""
+    await websocket.accept()
+    queue = review_broadcaster.subscribe()
+    try:
+        while True:
+            payload = await next_message(queue, KEEPALIVE_SECONDS)
+            if payload is DROPPED:
+                await websocket.close(code=1013, reason="Client too slow, please reconnect")
+                break
+            if payload == "":
+                payload = '{"type": "keepalive"}'
+            await websocket.send_text(payload)
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Live review websocket error: {e}")
+    finally:
+        review_broadcaster.unsubscribe(queue)
+
+
+@router.get("/reviews/stream")
+async def reviews_event_stream(request: Request):
+    """Server-Sent Events version of the live review feed"""
+    queue = review_broadcaster.subscribe()
+
+    async def event_generator():
+        try:
+            while True:
+                payload = await next_message(queue, KEEPALIVE_SECONDS)
+                if payload is DROPPED:
+                    yield "event: dropped\ndata: {}\n\n"
+                    break
+                if payload == "":
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {payload}\n\n"
+        finally:
+            review_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, Query
+from typing import Dict, List, Optional
+import asyncio
+import logging
+import os
+import time
+from supabase_client import supabase
+from services.dedup import DuplicateIndex, find_duplicate_groups
+from services.review_events import on_review_inserted, on_reviews_deleted, publish_reviews_deleted
+from services.review_snapshot import review_snapshot
+from services.scheduler import scheduled_job
+from routes.cache_sync import bump_reviews
+from routes.uploadcsv import METADATA_DELETE_BATCH_SIZE
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# "reject" refuses near-duplicates, "flag" stores them but reports the match, "off" disables the check
+DUPLICATE_REVIEW_MODE = os.getenv("DUPLICATE_REVIEW_MODE", "reject").lower()
+
+duplicate_index = DuplicateIndex()
+
+
+def fetch_review_texts():
+    """All review ids and texts, oldest first"""
+    review_snapshot.ensure_fresh()
+    return list(review_snapshot.rows())
+
+
+@scheduled_job("seed_duplicate_index", run_on_start=True, manual=False)
+def seed_duplicate_index():
+    """Index the existing review history (run once at startup)"""
+    started = time.perf_counter()
+    duplicate_index.build(fetch_review_texts())
+    logger.info(f"Duplicate index ready: {len(duplicate_index)} reviews in {time.perf_counter() - started:.2f}s")
+    return {"reviews": len(duplicate_index)}
+
+
+def check_duplicate(review_text: str) -> Optional[Dict]:
+    """Near-duplicate match for a submission, or None"""
+    if DUPLICATE_REVIEW_MODE == "off" or not duplicate_index.ready:
+        return None
+    match = duplicate_index.find_duplicate(review_text)
+    if match is None:
+        return None
+    review_id, score = match
+    return {"duplicate_of": review_id, "similarity": round(score, 3), "mode": DUPLICATE_REVIEW_MODE}
+
+
+@on_review_inserted
+def index_new_review(review: Dict):
+    duplicate_index.add(review.get("id"), review.get("review_text", ""))
+
+
+@on_reviews_deleted
+def unindex_deleted_reviews(reviews: List[Dict]):
+    duplicate_index.remove(review.get("id") for review in reviews)
+
+
+@router.post("/reviews/dedupe")
+async def dedupe_reviews(
+    dry_run: bool = Query(default=True, description="Only report duplicates; set false to delete them")
+):
+    """Batch near-duplicate detection over the whole review history"""
+    try:
+        reviews = await asyncio.to_thread(fetch_review_texts)
+        duplicates = await asyncio.to_thread(find_duplicate_groups, reviews)
+
+        deleted = 0
+        if duplicates and not dry_run:
+            duplicate_ids = list(duplicates)
+            deleted_ids = []
+            try:
+                # Bounded id lists keep each DELETE's URL short
+                for i in range(0, len(duplicate_ids), METADATA_DELETE_BATCH_SIZE):
+                    batch = duplicate_ids[i:i + METADATA_DELETE_BATCH_SIZE]
+                    await asyncio.to_thread(supabase.table("reviews").delete().in_("id", batch).execute)
+                    deleted_ids.extend(batch)
+            finally:
+                if deleted_ids:
+                    # Snapshot, indexes, rollups and live counts all drop the deleted rows, even if a later batch failed
+                    removed = set(deleted_ids)
+                    await publish_reviews_deleted([review.to_dict() for review in reviews if review.id in removed])
+                    await asyncio.to_thread(bump_reviews, {"deleted": deleted_ids})
+            deleted = len(deleted_ids)
+
+        logger.info(f"Dedupe scanned {len(reviews)} reviews, found {len(duplicates)} duplicates (dry_run={dry_run})")
+        return {
+            "status": "success",
+            "scanned": len(reviews),
+            "duplicate_count": len(duplicates),
+            "deleted": deleted,
+            "duplicates": [
+                {"id": review_id, "duplicate_of": original_id, "similarity": round(score, 3)}
+                for review_id, (original_id, score) in duplicates.items()
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Dedupe error: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Dedupe failed: {str(e)}"
+        }
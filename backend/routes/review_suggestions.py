@@ -1,23 +1,121 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from openai import OpenAI
+from typing import Any, Dict, List, Optional
+import asyncio
 import os
 import logging
+import time
 from supabase_client import supabase
+from services.insights import format_insights, generate_insights, insight_aggregates
+from services.deadlines import DeadlineExceeded, call_timeout, run_blocking
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.shared_cache import shared_cache
+from services.scheduler import scheduled_job, scheduler
+from routes.aspects import analysis_for_review
+from routes.search import seed_review_analyses
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+SUGGESTIONS_REFRESH_MINUTES = float(os.getenv("SUGGESTIONS_REFRESH_MINUTES", "30"))
+
+# Latest LLM write-up and the review generation it was written for, shared by all workers
+ENRICHMENT_CACHE_KEY = "suggestions:enrichment"
+# Last failed LLM call: the version it was for, how many failed in a row and when to try again
+ENRICHMENT_FAILURE_KEY = "suggestions:enrichment-failure"
+# Wait after a failed LLM call, doubled for each further failure up to the maximum
+ENRICHMENT_RETRY_SECONDS = float(os.getenv("ENRICHMENT_RETRY_SECONDS", "300"))
+ENRICHMENT_MAX_RETRY_SECONDS = float(os.getenv("ENRICHMENT_MAX_RETRY_SECONDS", "3600"))
+
+@on_review_inserted
+def update_insight_aggregates(review):
+    insight_aggregates.add(review, analysis_for_review(review))
+
+@on_reviews_deleted
+def remove_from_insight_aggregates(reviews: List[Dict]):
+    for review in reviews:
+        insight_aggregates.remove(review.get("id"))
+
+def build_suggestions():
+    """Rule-based suggestions from the running aggregates (blocking only on first use)"""
+    if not insight_aggregates.ready:
+        seed_review_analyses()
+    insights = generate_insights(insight_aggregates.snapshot())
+    return {"suggestions": format_insights(insights), "insights": insights, "source": "rules"}
 
 @router.get("/suggestions")
-async def get_suggestions():
-    """Generate AI suggestions based on recent reviews"""
+async def get_suggestions(enrich: bool = Query(default=True, description="Also refresh the LLM write-up in the background")):
+    """Ranked strengths, weaknesses and actions, with an optional LLM write-up once it is ready"""
+    try:
+        result = await run_blocking(build_suggestions)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Unexpected error in suggestions: {str(e)}")
+        return {"suggestions": f"Service temporarily unavailable: {str(e)}"}
+
+    version = await asyncio.to_thread(shared_cache.generation, "reviews")
+    enrichment = await asyncio.to_thread(shared_cache.get, ENRICHMENT_CACHE_KEY) or {}
+    failure = await asyncio.to_thread(shared_cache.get, ENRICHMENT_FAILURE_KEY) or {}
+    if not OPENROUTER_API_KEY or not enrich:
+        result["enrichment"] = "disabled"
+    elif enrichment.get("version") == version and enrichment.get("text"):
+        result["enrichment"] = "ready"
+    elif failure.get("retry_at", 0) > time.time():
+        # The last LLM call failed: serve the rule-based insights until the backoff expires
+        result["enrichment"] = "failed"
+        result["enrichment_retry_at"] = failure["retry_at"]
+    else:
+        result["enrichment"] = "pending"
+        # Identical pending runs are merged by the scheduler
+        if scheduler.running:
+            scheduler.submit("precompute_suggestions")
+
+    # An older write-up is still useful while the refreshed one is being generated
+    if enrichment.get("text") and result["enrichment"] != "disabled":
+        result["ai_suggestions"] = enrichment["text"]
+    return result
+
+@scheduled_job("precompute_suggestions", interval_seconds=SUGGESTIONS_REFRESH_MINUTES * 60)
+def precompute_suggestions():
+    """Refresh the rule-based insights and, when the reviews changed, the LLM write-up"""
+    version = shared_cache.generation("reviews")
+    insights = build_suggestions()["insights"]
+    enrichment = shared_cache.get(ENRICHMENT_CACHE_KEY) or {}
+    if not OPENROUTER_API_KEY or enrichment.get("version") == version:
+        return {"enriched": False, "version": version}
+    failure = shared_cache.get(ENRICHMENT_FAILURE_KEY) or {}
+    if failure.get("retry_at", 0) > time.time():
+        # Newer reviews do not buy another paid call while the LLM keeps failing
+        return {"enriched": False, "version": version, "retry_at": failure["retry_at"]}
+
+    text = generate_suggestions(insights)
+    if text:
+        shared_cache.set(ENRICHMENT_CACHE_KEY, {"version": version, "text": text}, ttl=0)
+        if failure:
+            shared_cache.delete(ENRICHMENT_FAILURE_KEY)
+        return {"enriched": True, "version": version}
+    failure = record_enrichment_failure(version, failure)
+    return {"enriched": False, "version": version, "retry_at": failure["retry_at"]}
+
+def record_enrichment_failure(version: int, previous: Dict[str, Any]) -> Dict[str, Any]:
+    """Back off exponentially after consecutive failed LLM calls"""
+    attempts = previous.get("attempts", 0) + 1
+    delay = min(ENRICHMENT_RETRY_SECONDS * 2 ** (attempts - 1), ENRICHMENT_MAX_RETRY_SECONDS)
+    failure = {"version": version, "attempts": attempts, "retry_at": time.time() + delay}
+    shared_cache.set(ENRICHMENT_FAILURE_KEY, failure, ttl=0)
+    logger.warning(f"AI suggestions failed for review generation {version} ({attempts} in a row), retrying in {delay:.0f}s")
+    return failure
+
+def generate_suggestions(insights: Optional[Dict[str, Any]] = None) -> Optional[str]:
+    """Ask the LLM to turn recent reviews and the rule-based findings into prose (blocking)"""
     try:
         logger.info("=== Starting AI Suggestions Generation ===")
         
         if not OPENROUTER_API_KEY:
             logger.error("❌ OpenRouter API key not found")
-            return {"suggestions": "AI suggestions are temporarily unavailable. API key not configured."}
+            return None
         
         logger.info("✅ OpenRouter API key found")
         
@@ -29,17 +127,18 @@ async def get_suggestions():
             logger.info(f"✅ Fetched {len(reviews)} reviews successfully")
         except Exception as db_error:
             logger.error(f"❌ Database error: {db_error}")
-            return {"suggestions": f"Database connection failed: {str(db_error)}"}
+            return None
         
         if not reviews:
             logger.info("ℹ️ No reviews found")
-            return {"suggestions": "No reviews available for analysis yet. Once customers start leaving reviews, I'll provide personalized business suggestions based on their feedback."}
+            return None
 
         # Format reviews for AI
         review_text = "\n".join([
             f"Review: \"{r.get('review_text', '')}\" | Rating: {r.get('rating', 0)}/5"
             for r in reviews
         ])
+        findings = format_insights(insights) if insights else "None"
 
         logger.info(f"📝 Formatted {len(reviews)} reviews for AI analysis")
 
@@ -48,6 +147,9 @@ async def get_suggestions():
 
 {review_text}
 
+Findings computed from all reviews:
+{findings}
+
 Please provide:
 1. What customers love (positive trends)
 2. Areas that need improvement
@@ -78,58 +180,17 @@ Keep it concise and practical."""
                 ],
                 max_tokens=500,
                 temperature=0.7,
-                timeout=30
+                timeout=call_timeout(30)
             )
             
             suggestion_text = response.choices[0].message.content
             logger.info(f"✅ AI suggestions generated successfully ({len(suggestion_text)} chars)")
-            return {"suggestions": suggestion_text}
+            return suggestion_text
                 
         except Exception as api_error:
             logger.error(f"❌ OpenRouter API error: {api_error}")
-            return {"suggestions": generate_fallback_suggestions(reviews)}
+            return None
         
     except Exception as e:
         logger.error(f"❌ Unexpected error in suggestions: {str(e)}")
-        return {"suggestions": f"Service temporarily unavailable: {str(e)}"}
-
-def generate_fallback_suggestions(reviews):
-    """Generate basic suggestions when AI API fails"""
-    if not reviews:
-        return "No review data available for analysis."
-    
-    total_reviews = len(reviews)
-    ratings = [r.get('rating', 0) for r in reviews if r.get('rating')]
-    avg_rating = sum(ratings) / len(ratings) if ratings else 0
-    
-    # Analyze rating distribution
-    high_ratings = sum(1 for r in ratings if r >= 4)
-    low_ratings = sum(1 for r in ratings if r <= 2)
-    
-    suggestions = f"""📊 **Analysis of {total_reviews} Recent Reviews**
-
-**Overall Performance:**
-- Average Rating: {avg_rating:.1f}/5
-- Positive Reviews (4-5 stars): {high_ratings}
-- Negative Reviews (1-2 stars): {low_ratings}
-
-**Positive Feedback Trends:**
-"""
-    
-    if avg_rating >= 4.0:
-        suggestions += "- Customers are generally very satisfied with your service\n- Maintain your current quality standards\n- Consider expanding what's working well\n"
-    elif avg_rating >= 3.0:
-        suggestions += "- Some customers appreciate your offerings\n- There's room for improvement in service delivery\n- Focus on consistency\n"
-    else:
-        suggestions += "- Limited positive feedback in recent reviews\n- Immediate attention needed for service quality\n- Consider customer service training\n"
-    
-    suggestions += "\n**Areas for Improvement:**\n"
-    
-    if low_ratings > high_ratings:
-        suggestions += "- Address customer complaints promptly\n- Review service procedures\n- Train staff on customer service excellence\n"
-    elif avg_rating < 4.0:
-        suggestions += "- Focus on exceeding customer expectations\n- Improve consistency in service delivery\n- Consider menu quality and variety\n"
-    else:
-        suggestions += "- Continue current practices\n- Look for opportunities to innovate\n- Maintain staff training programs\n"
-    
-    return suggestions
+        return None
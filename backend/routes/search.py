@@ -0,0 +1,123 @@
+from fastapi import APIRouter, Query, Request
+from typing import Dict, List, Optional
+from datetime import date, datetime, time as dt_time, timezone
+import logging
+import os
+import threading
+import time
+from services.deadlines import DeadlineExceeded, run_blocking
+from services.responses import fast_json
+from services.search_index import ReviewSearchIndex
+from services.insights import insight_aggregates
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.review_snapshot import review_snapshot
+from services.scheduler import scheduled_job
+from routes.aspects import analyze_review, analysis_for_review, aspect_store
+from routes.sentiment import sentiment_labels
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+ROLLUP_REFRESH_MINUTES = float(os.getenv("ROLLUP_REFRESH_MINUTES", "15"))
+
+search_index = ReviewSearchIndex()
+
+# Snapshot's fetched-through id at the last rollup; later refreshes rescan only the rows above it
+_rollup_watermark: Optional[str] = None
+_rollup_lock = threading.Lock()
+
+
+@scheduled_job("refresh_review_analyses", interval_seconds=ROLLUP_REFRESH_MINUTES * 60, run_on_start=True)
+def seed_review_analyses():
+    """Load the search index, aspect store and insight aggregates, then top them up with reviews added since"""
+    with _rollup_lock:
+        return _refresh_review_analyses()
+
+
+def _refresh_review_analyses():
+    global _rollup_watermark
+    started = time.perf_counter()
+    review_snapshot.ensure_fresh()
+
+    items = []
+    text_evicted = 0
+    for record in review_snapshot.rows(since=_rollup_watermark):
+        # Reviews submitted through this worker were already indexed by the listeners
+        if record.id in search_index:
+            continue
+        if record.review_text is None:
+            # Text evicted before this review was analysed: keep it out rather than score it as empty
+            aspect_store.skip(record.id)
+            text_evicted += 1
+            continue
+        review = record.to_dict()
+        analysis = analyze_review(review["review_text"], review.get("rating", 3))
+        # Labels are taken while the snapshot still holds the text
+        sentiment_labels.add(review.get("id"), (analysis["sentiment"], analysis["compound"]))
+        aspect_store.add(review.get("id"), analysis["aspects"])
+        insight_aggregates.add(review, analysis)
+        items.append((review, analysis))
+
+    search_index.build(items)
+    aspect_store.ready = True
+    insight_aggregates.ready = True
+    # Not the highest id: rows below it can still arrive out of order, and
+    # rescanning them is cheap since indexed ids are skipped
+    _rollup_watermark = str(review_snapshot.complete_through or "") or _rollup_watermark
+    logger.info(f"Review rollups refreshed: {len(items)} new of {len(search_index)} reviews, {text_evicted} without text, in {time.perf_counter() - started:.2f}s")
+    return {"new_reviews": len(items), "total_reviews": len(search_index), "text_evicted": text_evicted, "watermark": _rollup_watermark}
+
+
+@on_review_inserted
+def index_review_for_search(review: Dict):
+    search_index.add(review, analysis_for_review(review))
+
+
+@on_reviews_deleted
+def unindex_deleted_reviews(reviews: List[Dict]):
+    search_index.remove(review.get("id") for review in reviews)
+
+
+@router.get("/reviews/search")
+async def search_reviews(
+    request: Request,
+    q: str = Query(default="", description="Free-text terms (all must match)"),
+    rating: Optional[List[int]] = Query(default=None),
+    sentiment: Optional[List[str]] = Query(default=None),
+    keyword: Optional[List[str]] = Query(default=None),
+    aspect: Optional[List[str]] = Query(default=None),
+    date_from: Optional[date] = Query(default=None),
+    date_to: Optional[date] = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=200),
+    cursor: Optional[int] = Query(default=None, description="next_cursor from the previous page")
+):
+    """Search reviews by text with rating/sentiment/keyword/aspect/date facets, newest first"""
+    try:
+        if not search_index.ready:
+            await run_blocking(seed_review_analyses)
+
+        started = time.perf_counter()
+        result = search_index.search(
+            text=q,
+            filters={
+                "rating": [str(r) for r in rating or []],
+                "sentiment": [s.lower() for s in sentiment or []],
+                "keyword": [k.lower() for k in keyword or []],
+                "aspect": [a.lower() for a in aspect or []],
+            },
+            date_from=datetime.combine(date_from, dt_time.min, tzinfo=timezone.utc).timestamp() if date_from else None,
+            date_to=datetime.combine(date_to, dt_time.max, tzinfo=timezone.utc).timestamp() if date_to else None,
+            limit=limit,
+            cursor=cursor,
+        )
+        result["took_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return fast_json(request, {"status": "success", **result})
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Review search error: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Search failed: {str(e)}",
+            "results": []
+        }
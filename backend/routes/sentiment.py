@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import List, Dict, Any, Optional, Tuple
 from nltk.sentiment import SentimentIntensityAnalyzer
-from supabase_client import supabase
+from services.deadlines import DeadlineExceeded, run_blocking
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.review_snapshot import review_snapshot
+from services.shared_cache import shared_cache
+from routes.cache_sync import review_cache_key
+from services.responses import fast_json
+import asyncio
 import logging
+import threading
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -16,69 +23,185 @@ except:
     from nltk.sentiment import SentimentIntensityAnalyzer
     sia = SentimentIntensityAnalyzer()
 
+def classify_sentiment(text: str, rating: int) -> Tuple[str, float]:
+    """Label a review as positive/neutral/negative and return its VADER compound score"""
+    # Use both VADER sentiment and rating for more accurate classification
+    scores = sia.polarity_scores(text or "")
+    compound = scores['compound']
+    return sentiment_label(compound, rating), compound
+
+class SentimentLabels:
+    """Per-review (label, compound) with running counts, so totals are sums instead of VADER rescans"""
+
+    def __init__(self):
+        self._by_review: Dict[int, Tuple[str, float]] = {}
+        self._counts = {"positive": 0, "neutral": 0, "negative": 0}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._by_review)
+
+    def get(self, review_id: int) -> Optional[Tuple[str, float]]:
+        return self._by_review.get(review_id)
+
+    def add(self, review_id: Optional[int], labelled: Tuple[str, float]) -> Tuple[str, float]:
+        """Store a review's label unless it has one already; returns the stored label"""
+        if review_id is None:
+            return labelled
+        with self._lock:
+            stored = self._by_review.get(review_id)
+            if stored is not None:
+                return stored
+            self._by_review[review_id] = labelled
+            self._counts[labelled[0]] += 1
+            return labelled
+
+    def remove(self, review_ids) -> None:
+        with self._lock:
+            for review_id in review_ids:
+                labelled = self._by_review.pop(review_id, None)
+                if labelled is not None:
+                    self._counts[labelled[0]] -= 1
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+sentiment_labels = SentimentLabels()
+
+def review_sentiment(review: Any) -> Optional[Tuple[str, float]]:
+    """Stored label of a review row or snapshot record, classified on first sight.
+
+    None when the snapshot evicted the review's text before it was ever labelled.
+    """
+    stored = sentiment_labels.get(review.get("id"))
+    if stored is not None:
+        return stored
+    text = review.get("review_text")
+    if text is None:
+        return None
+    return sentiment_labels.add(review.get("id"), classify_sentiment(text, review.get("rating", 3)))
+
+@on_review_inserted
+def label_new_review(review: Dict):
+    review_sentiment(review)
+
+@on_reviews_deleted
+def unlabel_deleted_reviews(reviews: List[Dict]):
+    sentiment_labels.remove(review.get("id") for review in reviews)
+
+def sentiment_label(compound: float, rating: int) -> str:
+    """Combine a VADER compound score with the star rating"""
+    if compound >= 0.05 and rating >= 4:
+        return "positive"
+    if compound <= -0.05 or rating <= 2:
+        return "negative"
+    return "neutral"
+
+MAX_LABELS_PAGE_SIZE = 1000
+
 @router.get("/sentiment")
-async def sentiment_analysis():
-    """Returns sentiment analysis on all reviews"""
+async def sentiment_analysis(
+    request: Request,
+    since: Optional[str] = Query(default=None, description="Only analyse reviews newer than this watermark (review id or ISO timestamp)"),
+    include_labels: bool = Query(default=False, description="Also return per-review labels (paginated, without review text)"),
+    page: int = Query(default=1, ge=1),
+    page_size: int = Query(default=100, ge=1, le=MAX_LABELS_PAGE_SIZE)
+):
+    """Returns sentiment counts for all reviews, plus a page of per-review labels on request"""
     try:
-        logger.info("Fetching reviews for sentiment analysis...")
-        
-        # Use 'timestamp' column as shown in your table
-        response = supabase.table("reviews").select("*").order("timestamp", desc=True).execute()
+        logger.info(f"Fetching reviews for sentiment analysis (since={since}, include_labels={include_labels})...")
         
-        if not response.data:
-            logger.info("No reviews found for sentiment analysis")
-            return {
-                "counts": {"positive": 0, "neutral": 0, "negative": 0},
-                "labels": [],
-                "total": 0
-            }
-        
-        reviews = response.data
-        logger.info(f"Analyzing sentiment for {len(reviews)} reviews")
+        # Newest first, straight from the shared in-memory snapshot
+        await run_blocking(review_snapshot.ensure_fresh)
+        cache_key = await asyncio.to_thread(review_cache_key, "sentiment", since, include_labels, page, page_size)
+        result, _ = await run_blocking(
+            shared_cache.get_or_compute, cache_key,
+            lambda: compute_sentiment(since, include_labels, page, page_size)
+        )
+        return fast_json(request, result)
 
-        # Sentiment calculation
-        sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
-        sentiment_labels = []
-        
-        for review in reviews:
-            text = review.get("review_text", "")
-            rating = review.get("rating", 3)
-            
-            # Use both VADER sentiment and rating for more accurate classification
-            scores = sia.polarity_scores(text)
-            compound = scores['compound']
-            
-            # Combine VADER score with rating for better accuracy
-            if compound >= 0.05 and rating >= 4:
-                label = "positive"
-            elif compound <= -0.05 or rating <= 2:
-                label = "negative"
-            else:
-                label = "neutral"
-            
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Sentiment analysis error: {str(e)}")
+        return empty_sentiment_result(since, include_labels, page, page_size)
+
+def compute_sentiment(since: Optional[str], include_labels: bool, page: int, page_size: int) -> Dict[str, Any]:
+    """Sentiment counts over the snapshot, plus one page of per-review labels on request.
+
+    Counts add up stored labels; only reviews that have never been labelled are run through VADER.
+    """
+    review_ids = review_snapshot.ids(since, newest_first=True)
+    
+    if not review_ids:
+        logger.info("No reviews found for sentiment analysis")
+        return empty_sentiment_result(since, include_labels, page, page_size)
+    
+    logger.info(f"Analyzing sentiment for {len(review_ids)} reviews")
+
+    # Only the requested page of labels is materialized
+    page_start = (page - 1) * page_size
+    page_end = page_start + page_size
+
+    # Sentiment calculation
+    sentiment_counts = {"positive": 0, "neutral": 0, "negative": 0}
+    page_labels = []
+    text_evicted = 0
+    
+    for index, review_id in enumerate(review_ids):
+        labelled = sentiment_labels.get(review_id)
+        in_page = include_labels and page_start <= index < page_end
+        if labelled is None or in_page:
+            review = review_snapshot.get(review_id)
+            if review is None:
+                # Deleted since the ids were taken
+                continue
+            labelled = review_sentiment(review)
+        # Evicted before it was labelled: left out of the counts rather than scored as empty text
+        label, compound = labelled or (None, None)
+        if label is None:
+            text_evicted += 1
+        else:
             sentiment_counts[label] += 1
-            sentiment_labels.append({
-                "id": review.get("id"),
-                "review_text": text,
+        
+        if in_page:
+            page_labels.append({
+                "id": review.id,
                 "sentiment": label,
                 "compound": compound,
-                "timestamp": review.get("timestamp"),
-                "rating": rating,
+                "rating": review.get("rating", 3),
+                "timestamp": review.timestamp,
             })
 
-        result = {
-            "counts": sentiment_counts,
-            "labels": sentiment_labels,
-            "total": len(reviews)
-        }
-        
-        logger.info(f"Sentiment analysis complete: {sentiment_counts}")
-        return result
+    result = {
+        "counts": sentiment_counts,
+        "total": sum(sentiment_counts.values()),
+        "text_evicted": text_evicted,
+        "delta": since is not None,
+        "watermark": str(review_ids[0])
+    }
+    if include_labels:
+        result.update({
+            "labels": page_labels,
+            "page": page,
+            "page_size": page_size,
+            "has_more": page_end < len(review_ids)
+        })
+    
+    logger.info(f"Sentiment analysis complete: {sentiment_counts}")
+    return result
 
-    except Exception as e:
-        logger.error(f"Sentiment analysis error: {str(e)}")
-        return {
-            "counts": {"positive": 0, "neutral": 0, "negative": 0},
-            "labels": [],
-            "total": 0
-        }
+def empty_sentiment_result(since: Optional[str], include_labels: bool, page: int, page_size: int) -> Dict[str, Any]:
+    """Sentiment response for when there is nothing to analyse"""
+    result = {
+        "counts": {"positive": 0, "neutral": 0, "negative": 0},
+        "total": 0,
+        "text_evicted": 0,
+        "delta": since is not None,
+        "watermark": since
+    }
+    if include_labels:
+        result.update({"labels": [], "page": page, "page_size": page_size, "has_more": False})
+    return result
@@ -0,0 +1,44 @@
+from fastapi import APIRouter
+from typing import Dict, List
+import asyncio
+import logging
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.review_snapshot import review_snapshot, REVIEW_SNAPSHOT_MAX_AGE_SECONDS
+from services.scheduler import scheduled_job
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@scheduled_job("refresh_review_snapshot", interval_seconds=REVIEW_SNAPSHOT_MAX_AGE_SECONDS, run_on_start=True)
+def refresh_review_snapshot():
+    """Pull reviews added since the snapshot watermark (e.g. by other workers)"""
+    added = review_snapshot.refresh()
+    return {"new_reviews": added, "watermark": review_snapshot.watermark}
+
+
+@on_review_inserted
+def append_to_snapshot(review: Dict):
+    review_snapshot.add(review)
+
+
+@on_reviews_deleted
+def discard_from_snapshot(reviews: List[Dict]):
+    review_snapshot.discard(review.get("id") for review in reviews)
+
+
+@router.get("/reviews/snapshot")
+async def snapshot_stats():
+    """Size of the in-memory review snapshot shared by the analytics routes"""
+    try:
+        if not review_snapshot.ready:
+            await asyncio.to_thread(review_snapshot.refresh)
+        return {
+            "status": "success",
+            "watermark": review_snapshot.watermark,
+            "live_reviews": len(review_snapshot),
+            "memory": review_snapshot.memory_usage()
+        }
+    except Exception as e:
+        logger.error(f"Review snapshot error: {str(e)}")
+        return {"status": "error", "message": f"Snapshot unavailable: {str(e)}"}
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Query
+from typing import Dict, List
+import logging
+import time
+from services.topics import TopicModel
+from services.review_events import on_review_inserted, on_reviews_deleted
+from services.deadlines import DeadlineExceeded, run_blocking
+from services.review_snapshot import review_snapshot
+from services.scheduler import scheduled_job, scheduler
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+topic_model = TopicModel()
+
+
+@scheduled_job("seed_topic_model", run_on_start=True, manual=False)
+def seed_topic_model():
+    """Cluster the existing review history, oldest first (run once at startup)"""
+    started = time.perf_counter()
+    review_snapshot.ensure_fresh()
+    topic_model.partial_fit(review_snapshot.rows())
+    topic_model.ready = True
+    logger.info(f"Topic model ready: {topic_model.documents} reviews in {time.perf_counter() - started:.2f}s")
+    return {"reviews": topic_model.documents}
+
+
+@on_review_inserted
+def cluster_new_review(review: Dict):
+    topic_model.partial_fit([review])
+
+
+@on_reviews_deleted
+def uncluster_deleted_reviews(reviews: List[Dict]):
+    topic_model.remove(review.get("id") for review in reviews)
+
+
+@router.get("/topics")
+async def get_topics(
+    top_terms: int = Query(default=6, ge=1, le=20),
+    min_members: int = Query(default=1, ge=0)
+):
+    """Emerging review themes discovered by incremental clustering"""
+    try:
+        if not topic_model.ready:
+            if scheduler.running:
+                # Share the startup seed (or a queued one) instead of clustering the history twice
+                await scheduler.submit_or_join("seed_topic_model", trigger="on_demand").wait()
+            else:
+                await run_blocking(seed_topic_model)
+
+        topics = [t for t in topic_model.topics(top_terms) if t["member_count"] >= min_members]
+        return {
+            "status": "success",
+            "topics": topics,
+            "total_reviews": topic_model.documents
+        }
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        logger.error(f"Topic clustering error: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Topic clustering failed: {str(e)}",
+            "topics": []
+        }
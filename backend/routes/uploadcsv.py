@@ -1,8 +1,16 @@
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException
+from fastapi import APIRouter, BackgroundTasks, File, UploadFile, Form, HTTPException
 from fastapi.responses import JSONResponse
-from supabase import create_client, Client
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from supabase_client import supabase
+from services.file_catalog import file_catalog
+from services.storage import get_storage
+from services.columnar import ingest_csv, remove_sidecar
+from services.scheduler import scheduled_job, scheduler
+import asyncio
+import logging
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 import uuid
 import re
 import unicodedata
@@ -36,32 +44,54 @@ def secure_filename(filename: str) -> str:
 # Create router instead of Blueprint
 uploadcsv_router = APIRouter()
 
-# Supabase configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
-
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise ValueError("Missing Supabase configuration. Please set SUPABASE_URL and SUPABASE_SERVICE_KEY environment variables.")
-
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+logger = logging.getLogger(__name__)
 
 # Configuration
 ALLOWED_EXTENSIONS = {'csv'}
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB limit
 
+# Bulk deletion: paths per storage remove() call and how many calls run at once
+STORAGE_REMOVE_BATCH_SIZE = 100
+STORAGE_REMOVE_CONCURRENCY = 4
+# PostgREST caps a select at ~1000 rows and long `in` filters overflow the URL
+SELECT_PAGE_SIZE = 1000
+METADATA_DELETE_BATCH_SIZE = 200
+
+# Retention for uploaded order exports (disabled unless CSV_RETENTION_DAYS is set)
+CSV_RETENTION_DAYS = int(os.getenv("CSV_RETENTION_DAYS", "0"))
+CSV_RETENTION_INTERVAL_HOURS = float(os.getenv("CSV_RETENTION_INTERVAL_HOURS", "24"))
+
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+@scheduled_job("columnarize_csv", manual=False)
+def build_columnar_cache(file_id, storage_path: str):
+    """Ingest stage: write the columnar sidecar and reference it from uploaded_files"""
+    stats = ingest_csv(get_storage('csv-uploads'), storage_path)
+
+    if file_id is not None:
+        try:
+            supabase.table('uploaded_files').update({
+                'columnar_path': storage_path,
+                'row_count': stats['row_count'],
+                'column_stats': stats['columns'],
+            }).eq('id', file_id).execute()
+        except Exception as e:
+            # Older schemas lack these columns; the sidecar's stats.json still has everything
+            logger.warning(f"Could not record columnar stats for file {file_id}: {e}")
+    return {'file_id': file_id, 'row_count': stats['row_count']}
+
+
 @uploadcsv_router.post("/upload-csv")
 async def upload_csv(
+    background_tasks: BackgroundTasks,
     csv_file: UploadFile = File(...),
     cafe_name: str = Form(default="default_cafe")
 ):
-    """Upload CSV file to Supabase Storage"""
+    """Upload CSV file to storage and record its metadata"""
     try:
         # Validate file type
         if not allowed_file(csv_file.filename):
@@ -73,11 +103,13 @@ async def upload_csv(
                 }
             )
 
-        # Read file content
-        file_content = await csv_file.read()
+        # Measure the spooled upload instead of loading it into memory
+        csv_file.file.seek(0, os.SEEK_END)
+        file_size = csv_file.file.tell()
+        csv_file.file.seek(0)
         
         # Validate file size
-        if len(file_content) > MAX_FILE_SIZE:
+        if file_size > MAX_FILE_SIZE:
             return JSONResponse(
                 status_code=400,
                 content={
@@ -95,32 +127,15 @@ async def upload_csv(
         unique_id = str(uuid.uuid4())[:8]
         filename = f"{cafe_name_clean}_{timestamp}_{unique_id}_{original_filename}"
 
-        # Upload to Supabase Storage
-        bucket_name = 'csv-uploads'
+        # Upload to the configured storage backend
+        storage = get_storage('csv-uploads')
         storage_path = f"orders/{filename}"
 
-        # Upload file to Supabase Storage
-        result = supabase.storage.from_(bucket_name).upload(
-            path=storage_path,
-            file=file_content,
-            file_options={
-                "content-type": "text/csv",
-                "upsert": False
-            }
-        )
-
-        # Check if upload was successful
-        if hasattr(result, 'error') and result.error:
-            return JSONResponse(
-                status_code=500,
-                content={
-                    'status': 'error',
-                    'message': f'Upload failed: {result.error.message}'
-                }
-            )
+        # Stream the file into storage (raises on failure)
+        await asyncio.to_thread(storage.upload_fileobj, storage_path, csv_file.file, "text/csv")
 
         # Get public URL
-        file_url = supabase.storage.from_(bucket_name).get_public_url(storage_path)
+        file_url = storage.public_url(storage_path)
 
         # Store file metadata in database
         file_metadata = {
@@ -128,13 +143,22 @@ async def upload_csv(
             'storage_path': storage_path,
             'file_url': file_url,
             'cafe_name': cafe_name,
-            'file_size': len(file_content),
+            'file_size': file_size,
             'upload_timestamp': datetime.now().isoformat(),
             'file_type': 'csv'
         }
 
         # Insert metadata into database
         db_result = supabase.table('uploaded_files').insert(file_metadata).execute()
+        file_catalog.invalidate(cafe_name)
+        file_id = db_result.data[0]['id'] if db_result.data else None
+
+        # Columnarize on the job pool; fall back to a response background task without a scheduler
+        job_id = None
+        if scheduler.running:
+            job_id = scheduler.submit("columnarize_csv", file_id, storage_path).job_id
+        else:
+            background_tasks.add_task(build_columnar_cache, file_id, storage_path)
 
         return JSONResponse(
             status_code=200,
@@ -144,8 +168,9 @@ async def upload_csv(
                 'file_url': file_url,
                 'filename': filename,
                 'storage_path': storage_path,
-                'file_id': db_result.data[0]['id'] if db_result.data else None,
-                'file_size': len(file_content)
+                'file_id': file_id,
+                'file_size': file_size,
+                'columnar_job_id': job_id
             }
         )
 
@@ -161,57 +186,9 @@ async def upload_csv(
 
 
 
-@uploadcsv_router.get("/uploaded-files")
-async def get_uploaded_files(cafe_name: str = "default_cafe"):
-    """Get list of uploaded files for a cafe with formatted metadata"""
-    try:
-        result = supabase.table('uploaded_files')\
-            .select('*')\
-            .eq('cafe_name', cafe_name)\
-            .order('upload_timestamp', desc=True)\
-            .execute()
-
-        formatted_files = []
-        for file in result.data:
-            size_mb = file.get('file_size', 0) / (1024 * 1024)
-            upload_date_str = file.get('upload_timestamp')
-            try:
-                upload_date = datetime.fromisoformat(upload_date_str.replace('Z', '+00:00'))
-                formatted_date = upload_date.strftime('%Y-%m-%d')
-            except Exception:
-                formatted_date = upload_date_str or ''
-
-            formatted_files.append({
-                'id': file['id'],
-                'name': file.get('filename', 'Unknown File'),
-                'date': formatted_date,
-                'size': f"{size_mb:.1f} MB",
-                'status': 'uploaded',
-                'supabase_url': file.get('file_url', ''),
-                'storage_path': file.get('storage_path', ''),
-            })
-
-        return JSONResponse(
-            status_code=200,
-            content={
-                'status': 'success',
-                'files': formatted_files
-            }
-        )
-    except Exception as e:
-        return JSONResponse(
-            status_code=500,
-            content={
-                'status': 'error',
-                'message': f'Failed to retrieve files: {str(e)}',
-                'files': []
-            }
-        )
-
-
 @uploadcsv_router.delete("/delete-file/{file_id}")
 async def delete_file(file_id: int):
-    """Delete a file from Supabase Storage and database"""
+    """Delete a file from storage and database"""
     try:
         # Get file info from database
         result = supabase.table('uploaded_files')\
@@ -229,13 +206,14 @@ async def delete_file(file_id: int):
             )
 
         file_info = result.data[0]
-        bucket_name = 'csv-uploads'
         
-        # Delete from Supabase Storage
-        supabase.storage.from_(bucket_name).remove([file_info['storage_path']])
+        # Delete from storage
+        await asyncio.to_thread(get_storage('csv-uploads').remove, [file_info['storage_path']])
+        remove_sidecar(file_info['storage_path'])
         
         # Delete from database
         supabase.table('uploaded_files').delete().eq('id', file_id).execute()
+        file_catalog.invalidate(file_info.get('cafe_name'))
 
         return JSONResponse(
             status_code=200,
@@ -253,3 +231,144 @@ async def delete_file(file_id: int):
                 'message': f'Failed to delete file: {str(e)}'
             }
         )
+
+
+class BulkDeleteRequest(BaseModel):
+    file_ids: Optional[List[int]] = None
+    cafe_name: Optional[str] = None
+    uploaded_before: Optional[datetime] = None
+    # 0 or less would match every file of the cafe
+    older_than_days: Optional[int] = Field(default=None, ge=1)
+
+
+async def bulk_delete_files(
+    file_ids: Optional[List[int]] = None,
+    cafe_name: Optional[str] = None,
+    uploaded_before: Optional[datetime] = None,
+    path_prefix: Optional[str] = None
+):
+    """Delete many files: paged selects, concurrent batched storage removes, batched metadata deletes"""
+    def select_page(after_id: int, ids: Optional[List[int]]):
+        query = supabase.table('uploaded_files').select('id, storage_path, cafe_name')
+        if ids:
+            query = query.in_('id', ids)
+        if cafe_name:
+            query = query.eq('cafe_name', cafe_name)
+        if uploaded_before:
+            query = query.lt('upload_timestamp', uploaded_before.isoformat())
+        if path_prefix:
+            query = query.like('storage_path', f"{path_prefix}%")
+        # Keyset paging by id, so the listing is complete past the PostgREST row cap
+        return query.gt('id', after_id).order('id').limit(SELECT_PAGE_SIZE).execute().data or []
+
+    files = []
+    id_chunks = [file_ids[i:i + METADATA_DELETE_BATCH_SIZE] for i in range(0, len(file_ids), METADATA_DELETE_BATCH_SIZE)] if file_ids else [None]
+    for ids in id_chunks:
+        after_id = 0
+        while True:
+            page = await asyncio.to_thread(select_page, after_id, ids)
+            files.extend(page)
+            if len(page) < SELECT_PAGE_SIZE:
+                break
+            after_id = page[-1]['id']
+    if not files:
+        return {'deleted': 0, 'failed': 0, 'deleted_ids': [], 'failed_ids': []}
+
+    storage = get_storage('csv-uploads')
+    batches = [
+        files[i:i + STORAGE_REMOVE_BATCH_SIZE]
+        for i in range(0, len(files), STORAGE_REMOVE_BATCH_SIZE)
+    ]
+    semaphore = asyncio.Semaphore(STORAGE_REMOVE_CONCURRENCY)
+
+    async def remove_batch(batch):
+        async with semaphore:
+            await asyncio.to_thread(storage.remove, [f['storage_path'] for f in batch if f.get('storage_path')])
+
+    outcomes = await asyncio.gather(*(remove_batch(batch) for batch in batches), return_exceptions=True)
+
+    # Only drop metadata for objects that were actually removed from storage
+    deleted_ids, failed_ids = [], []
+    for batch, outcome in zip(batches, outcomes):
+        ids = [f['id'] for f in batch]
+        if isinstance(outcome, Exception):
+            logger.error(f"Storage batch removal failed for {len(ids)} files: {outcome}")
+            failed_ids.extend(ids)
+        else:
+            deleted_ids.extend(ids)
+            for f in batch:
+                if f.get('storage_path'):
+                    remove_sidecar(f['storage_path'])
+
+    for i in range(0, len(deleted_ids), METADATA_DELETE_BATCH_SIZE):
+        await asyncio.to_thread(
+            supabase.table('uploaded_files').delete().in_('id', deleted_ids[i:i + METADATA_DELETE_BATCH_SIZE]).execute
+        )
+
+    for cafe in {f.get('cafe_name') for f in files}:
+        file_catalog.invalidate(cafe)
+
+    logger.info(f"Bulk delete removed {len(deleted_ids)} files ({len(failed_ids)} failed)")
+    return {
+        'deleted': len(deleted_ids),
+        'failed': len(failed_ids),
+        'deleted_ids': deleted_ids,
+        'failed_ids': failed_ids
+    }
+
+
+@uploadcsv_router.post("/delete-files")
+async def delete_files(request: BulkDeleteRequest):
+    """Delete many files by id list and/or upload date"""
+    uploaded_before = request.uploaded_before
+    if request.older_than_days is not None:
+        uploaded_before = datetime.now() - timedelta(days=request.older_than_days)
+
+    if not request.file_ids and not uploaded_before:
+        return JSONResponse(
+            status_code=400,
+            content={
+                'status': 'error',
+                'message': 'Provide file_ids, uploaded_before or older_than_days'
+            }
+        )
+
+    try:
+        summary = await bulk_delete_files(
+            file_ids=request.file_ids,
+            cafe_name=request.cafe_name,
+            uploaded_before=uploaded_before
+        )
+        return JSONResponse(
+            status_code=200,
+            content={
+                'status': 'success' if not summary['failed'] else 'partial',
+                'message': f"Deleted {summary['deleted']} files",
+                **summary
+            }
+        )
+    except Exception as e:
+        return JSONResponse(
+            status_code=500,
+            content={
+                'status': 'error',
+                'message': f'Failed to delete files: {str(e)}'
+            }
+        )
+
+
+async def prune_old_uploads(retention_days: int = CSV_RETENTION_DAYS):
+    """Retention policy: drop order exports older than `retention_days`"""
+    cutoff = datetime.now() - timedelta(days=retention_days)
+    logger.info(f"Pruning order uploads older than {cutoff.isoformat()}")
+    return await bulk_delete_files(uploaded_before=cutoff, path_prefix='orders/')
+
+
+# Only registered when enabled: a manual run with retention 0 would prune everything
+if CSV_RETENTION_DAYS > 0:
+    scheduler.register(
+        "upload_retention",
+        prune_old_uploads,
+        interval_seconds=CSV_RETENTION_INTERVAL_HOURS * 3600,
+        run_on_start=True,
+    )
@@ -0,0 +1,258 @@
+"""Admission control, deadlines and disconnect cancellation for expensive routes.
+
+`RequestGuardMiddleware` is plain ASGI middleware. For every route listed in
+ROUTE_POLICIES it:
+
+* admits at most `max_in_flight` requests at a time and lets up to
+  `max_queue` more wait; anything beyond that gets an immediate 503 with a
+  Retry-After estimated from recent service times
+* sets the request deadline (the route default, shortened by an
+  `X-Request-Timeout` header) and answers 504 if the handler overruns it
+* cancels the handler as soon as the client disconnects
+
+A cancelled handler's worker threads cannot be stopped and keep running
+(holding locks such as the rollup lock). The slot is therefore only released
+once every thread the request started through `run_blocking` has finished, so
+abandoned work still counts against `max_in_flight`.
+
+Routes that are not listed, such as /submit-review, pass straight through, so
+an overloaded analytics route can never queue up the cheap ones. Routes that
+write (dedupe, uploads) get admission control only: cancelling them halfway
+would leave the database and the caches out of step.
+"""
+import asyncio
+import logging
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from services.deadlines import BlockingCalls, request_calls, request_deadline
+from services.responses import dumps
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "on").lower() != "off"
+# Weight of the newest sample in the per-route service time average
+SERVICE_TIME_SMOOTHING = 0.2
+MAX_RETRY_AFTER_SECONDS = 60
+
+
+class RoutePolicy:
+    __slots__ = ("deadline_seconds", "max_in_flight", "max_queue")
+
+    def __init__(self, deadline_seconds: Optional[float], max_in_flight: int, max_queue: int):
+        self.deadline_seconds = deadline_seconds
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+
+
+# (method, path) -> policy
+ROUTE_POLICIES: Dict[tuple, RoutePolicy] = {
+    ("POST", "/chatbot/reviews"): RoutePolicy(deadline_seconds=30, max_in_flight=4, max_queue=8),
+    ("GET", "/suggestions"): RoutePolicy(deadline_seconds=15, max_in_flight=4, max_queue=8),
+    ("GET", "/dashboard"): RoutePolicy(deadline_seconds=20, max_in_flight=4, max_queue=16),
+    ("GET", "/sentiment"): RoutePolicy(deadline_seconds=20, max_in_flight=4, max_queue=16),
+    ("GET", "/keyword-trends"): RoutePolicy(deadline_seconds=20, max_in_flight=4, max_queue=16),
+    ("GET", "/topics"): RoutePolicy(deadline_seconds=15, max_in_flight=4, max_queue=16),
+    ("GET", "/aspects"): RoutePolicy(deadline_seconds=15, max_in_flight=4, max_queue=16),
+    ("GET", "/reviews/search"): RoutePolicy(deadline_seconds=10, max_in_flight=16, max_queue=32),
+    # Writers: never cancelled once admitted
+    ("POST", "/reviews/dedupe"): RoutePolicy(deadline_seconds=None, max_in_flight=1, max_queue=0),
+    ("POST", "/upload-csv"): RoutePolicy(deadline_seconds=None, max_in_flight=2, max_queue=4),
+}
+
+
+class _RouteGate:
+    """Concurrency slots and queue accounting for one route"""
+
+    def __init__(self, policy: RoutePolicy):
+        self.policy = policy
+        self.slots = asyncio.Semaphore(policy.max_in_flight)
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.service_time = 1.0
+
+    def full(self) -> bool:
+        return self.in_flight + self.waiting >= self.policy.max_in_flight + self.policy.max_queue
+
+    def retry_after(self) -> int:
+        """Rough time until a slot frees up for a newcomer"""
+        backlog = (self.waiting + 1) / self.policy.max_in_flight
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(self.service_time * backlog)))
+
+    def record(self, seconds: float) -> None:
+        self.service_time += SERVICE_TIME_SMOOTHING * (seconds - self.service_time)
+
+    def release(self, started: float) -> None:
+        self.in_flight -= 1
+        self.slots.release()
+        self.record(time.monotonic() - started)
+
+
+def _client_timeout(scope) -> Optional[float]:
+    for name, value in scope.get("headers") or []:
+        if name == b"x-request-timeout":
+            try:
+                return float(value)
+            except ValueError:
+                return None
+    return None
+
+
+# (method, path) -> gate, created on a route's first request
+route_gates: Dict[tuple, _RouteGate] = {}
+
+
+def admission_stats() -> Dict[str, Dict]:
+    return {
+        f"{method} {path}": {
+            "in_flight": gate.in_flight,
+            "waiting": gate.waiting,
+            "rejected": gate.rejected,
+            "avg_service_seconds": round(gate.service_time, 3),
+        }
+        for (method, path), gate in route_gates.items()
+    }
+
+
+class RequestGuardMiddleware:
+    def __init__(self, app, enabled: bool = ADMISSION_CONTROL):
+        self.app = app
+        self.enabled = enabled
+
+    def _gate(self, key: tuple) -> Optional[_RouteGate]:
+        gate = route_gates.get(key)
+        if gate is None and key in ROUTE_POLICIES:
+            gate = route_gates[key] = _RouteGate(ROUTE_POLICIES[key])
+        return gate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled:
+            return await self.app(scope, receive, send)
+        gate = self._gate((scope["method"], scope["path"]))
+        if gate is None:
+            return await self.app(scope, receive, send)
+
+        policy = gate.policy
+        budget = policy.deadline_seconds
+        client_timeout = _client_timeout(scope)
+        if budget is not None and client_timeout is not None and client_timeout > 0:
+            budget = min(budget, client_timeout)
+        deadline = time.monotonic() + budget if budget is not None else None
+
+        # Shed load before doing any work at all
+        if gate.full():
+            gate.rejected += 1
+            logger.warning(f"Shedding {scope['method']} {scope['path']}: {gate.in_flight} in flight, {gate.waiting} queued")
+            return await _send_error(send, 503, "Server is busy, please retry shortly", {"retry-after": str(gate.retry_after())})
+
+        gate.waiting += 1
+        try:
+            if gate.slots.locked():
+                # Time spent queueing counts against the deadline
+                await asyncio.wait_for(gate.slots.acquire(), timeout=budget)
+            else:
+                await gate.slots.acquire()
+        except asyncio.TimeoutError:
+            gate.rejected += 1
+            return await _send_error(send, 503, "Server is busy, please retry shortly", {"retry-after": str(gate.retry_after())})
+        finally:
+            gate.waiting -= 1
+
+        gate.in_flight += 1
+        started = time.monotonic()
+        calls = BlockingCalls()
+        deadline_token = request_deadline.set(deadline)
+        calls_token = request_calls.set(calls)
+        try:
+            if deadline is None:
+                await self.app(scope, receive, send)
+            else:
+                await _run_guarded(self.app, scope, receive, send, deadline)
+        finally:
+            request_calls.reset(calls_token)
+            request_deadline.reset(deadline_token)
+            # Threads the handler stopped waiting for keep the slot until they finish
+            calls.when_idle(lambda: gate.release(started))
+
+
+async def _send_error(send, status: int, message: str, headers: Optional[Dict[str, str]] = None) -> None:
+    body = dumps({"status": "error", "message": message})
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    raw_headers += [(name.encode(), value.encode()) for name, value in (headers or {}).items()]
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _has_body(scope) -> bool:
+    for name, value in scope.get("headers") or []:
+        if name == b"transfer-encoding" or (name == b"content-length" and value.strip() not in (b"", b"0")):
+            return True
+    return False
+
+
+async def _run_guarded(app, scope, receive, send, deadline: float) -> None:
+    """Run the app, cancelling it on client disconnect or when the deadline passes"""
+    body_done = asyncio.Event()
+    disconnected = asyncio.Event()
+    response_started = False
+    # Without a body the watcher can listen for the disconnect right away; the
+    # app still gets its (empty) request message first
+    pending_empty_body = not _has_body(scope)
+    if pending_empty_body:
+        body_done.set()
+
+    async def guarded_receive():
+        nonlocal pending_empty_body
+        if pending_empty_body:
+            pending_empty_body = False
+            return {"type": "http.request", "body": b"", "more_body": False}
+        if body_done.is_set():
+            # The body is consumed; after that the only message left is the disconnect
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+        elif not message.get("more_body", False):
+            body_done.set()
+        return message
+
+    async def guarded_send(message):
+        nonlocal response_started
+        if message["type"] == "http.response.start":
+            response_started = True
+        await send(message)
+
+    async def watch_disconnect():
+        await body_done.wait()
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            disconnected.set()
+
+    app_task = asyncio.create_task(app(scope, guarded_receive, guarded_send))
+    watcher = asyncio.create_task(watch_disconnect())
+    disconnect_wait = asyncio.create_task(disconnected.wait())
+    try:
+        done, _ = await asyncio.wait(
+            {app_task, disconnect_wait},
+            timeout=max(0.0, deadline - time.monotonic()),
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if app_task in done:
+            app_task.result()
+            return
+
+        app_task.cancel()
+        await asyncio.gather(app_task, return_exceptions=True)
+        if disconnect_wait in done:
+            logger.info(f"Client went away, cancelled {scope['method']} {scope['path']}")
+        else:
+            logger.warning(f"Deadline exceeded for {scope['method']} {scope['path']}")
+            if not response_started:
+                await _send_error(send, 504, "The request took too long to complete")
+    finally:
+        watcher.cancel()
+        disconnect_wait.cancel()
@@ -0,0 +1,157 @@
+"""Answer cache for the review chatbot.
+
+Questions are normalized (lower-cased, punctuation and filler words dropped,
+light plural stemming) and compared by character-trigram Jaccard similarity, so
+"What do customers love?" and "what do my customers love most" share an entry.
+Words that flip or scope the meaning (negations, time periods, numbers) are
+not left to the fuzzy score: a near match must carry exactly the same ones, so
+"what should we improve" never answers "what should we not improve".
+Entries are scoped by coffee shop and review-context version: when a new review
+changes what the bot would see, the old answers stop matching and are dropped.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+
+SIMILARITY_THRESHOLD = 0.8
+MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 3600
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+FILLER_WORDS = {
+    "a", "an", "the", "do", "does", "did", "is", "are", "my", "our", "me", "us", "i", "we",
+    "please", "can", "could", "you", "tell", "about", "of", "to", "for", "in", "at", "on",
+    "most", "really", "any", "some",
+}
+# Must match exactly between a question and a fuzzy hit
+NEGATION_WORDS = {"not", "no", "never", "nothing", "none", "without", "least", "worst", "isnt", "arent", "dont", "doesnt"}
+PERIOD_WORDS = {
+    "today", "yesterday", "tonight", "week", "weekend", "weekday", "month", "year", "quarter", "season",
+    "day", "morning", "afternoon", "evening", "night", "daily", "weekly", "monthly", "yearly",
+    "this", "last", "past", "previous", "next", "recent", "recently", "lately", "ago", "since",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september",
+    "october", "november", "december", "spring", "summer", "autumn", "fall", "winter",
+}
+_CONTRACTION_RE = re.compile(r"n['’]t\b")
+
+
+def normalize_question(question: str) -> str:
+    words = []
+    text = _CONTRACTION_RE.sub(" not", (question or "").lower())
+    for word in _WORD_RE.findall(text):
+        if word in FILLER_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return " ".join(words)
+
+
+def guard_words(normalized: str) -> FrozenSet[str]:
+    """Negations, time periods and numbers in a normalized question"""
+    return frozenset(
+        word for word in normalized.split()
+        if word in NEGATION_WORDS or word in PERIOD_WORDS or word.isdigit()
+    )
+
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    padded = f" {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+class _Entry:
+    __slots__ = ("scope", "grams", "guards", "answer", "created")
+
+    def __init__(self, scope: Tuple[str, int], grams: FrozenSet[str], guards: FrozenSet[str], answer: Any):
+        self.scope = scope
+        self.grams = grams
+        self.guards = guards
+        self.answer = answer
+        self.created = time.monotonic()
+
+
+class AnswerCache:
+    """LRU of answers keyed by (shop, context version, normalized question)"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 threshold: float = SIMILARITY_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._entries: "OrderedDict[Tuple[str, int, str], _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _scope(shop: Optional[str], version: int) -> Tuple[str, int]:
+        return ((shop or "").strip().lower(), version)
+
+    def get(self, question: str, shop: Optional[str], version: int) -> Optional[Any]:
+        """Cached answer for this question or a near-duplicate of it"""
+        normalized = normalize_question(question)
+        if not normalized:
+            return None
+        scope = self._scope(shop, version)
+        now = time.monotonic()
+
+        with self._lock:
+            key = scope + (normalized,)
+            entry = self._entries.get(key)
+            if entry is None:
+                grams = trigrams(normalized)
+                guards = guard_words(normalized)
+                best = 0.0
+                for candidate_key, candidate in self._entries.items():
+                    if candidate.scope != scope or candidate.guards != guards:
+                        continue
+                    score = jaccard(grams, candidate.grams)
+                    if score >= self.threshold and score > best:
+                        key, entry, best = candidate_key, candidate, score
+
+            if entry is not None and now - entry.created > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.answer
+
+    def put(self, question: str, shop: Optional[str], version: int, answer: Any) -> None:
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        scope = self._scope(shop, version)
+        with self._lock:
+            key = scope + (normalized,)
+            self._entries[key] = _Entry(scope, trigrams(normalized), guard_words(normalized), answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, current_version: Optional[int] = None) -> None:
+        """Drop everything, or only entries built against an older review context"""
+        with self._lock:
+            if current_version is None:
+                self._entries.clear()
+                return
+            for key in [key for key, entry in self._entries.items() if entry.scope[1] != current_version]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
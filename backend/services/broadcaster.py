@@ -0,0 +1,71 @@
+"""Single-publisher, many-subscriber fan-out for live dashboard updates"""
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Sentinel pushed to a subscriber that fell too far behind
+DROPPED = None
+
+
+class Broadcaster:
+    """Fan messages out to subscriber queues without ever blocking the publisher.
+
+    Every message is serialized once and the same string is handed to every
+    subscriber. Each subscriber gets a bounded queue; a client whose queue is
+    full is considered too slow and is dropped instead of slowing everyone else.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self.max_queue_size = max_queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.dropped_clients = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._subscribers.add(queue)
+        logger.info(f"Live subscriber connected ({self.subscriber_count} total)")
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.discard(queue)
+            logger.info(f"Live subscriber disconnected ({self.subscriber_count} total)")
+
+    def publish(self, message: Dict[str, Any]) -> int:
+        """Queue a message for every subscriber, returns how many received it"""
+        if not self._subscribers:
+            return 0
+
+        payload = json.dumps(message, default=str)
+        delivered = 0
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(payload)
+                delivered += 1
+            except asyncio.QueueFull:
+                self._drop(queue)
+        return delivered
+
+    def _drop(self, queue: asyncio.Queue) -> None:
+        """Disconnect a slow subscriber, replacing its backlog with the drop sentinel"""
+        self._subscribers.discard(queue)
+        self.dropped_clients += 1
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(DROPPED)
+        logger.warning("Dropped slow live subscriber (queue full)")
+
+
+async def next_message(queue: asyncio.Queue, timeout: float) -> Optional[str]:
+    """Wait for the next payload; returns '' on timeout so callers can send keepalives"""
+    try:
+        return await asyncio.wait_for(queue.get(), timeout=timeout)
+    except asyncio.TimeoutError:
+        return ""
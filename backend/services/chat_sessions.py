@@ -0,0 +1,147 @@
+"""Server-side chatbot sessions.
+
+A session keeps the last few turns verbatim and folds anything older into a
+short running summary, so the prompt stays a fixed size however long the
+conversation gets and the browser only has to send the new question. Sessions
+live in a bounded LRU; when a SQLite path is configured they are also written
+through to disk and reloaded on a miss (e.g. after a restart or eviction).
+"""
+import json
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+MAX_SESSIONS = 1000
+# Turns (user or assistant messages) kept verbatim; matches the old 8-message window
+MAX_RECENT_TURNS = 8
+MAX_SUMMARY_CHARS = 1200
+MAX_SUMMARY_SNIPPET = 160
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s")
+
+# Compact turn storage: (is_user, text)
+Turn = Tuple[bool, str]
+
+
+def _snippet(text: str) -> str:
+    """First sentence of a message, clipped"""
+    text = " ".join((text or "").split())
+    first = _SENTENCE_END_RE.split(text, 1)[0]
+    if len(first) > MAX_SUMMARY_SNIPPET:
+        first = first[:MAX_SUMMARY_SNIPPET - 3].rstrip() + "..."
+    return first
+
+
+class ChatSession:
+    __slots__ = ("session_id", "shop", "summary", "turns", "updated")
+
+    def __init__(self, session_id: str, shop: Optional[str] = None, summary: str = "",
+                 turns: Optional[List[Turn]] = None, updated: Optional[float] = None):
+        self.session_id = session_id
+        self.shop = shop
+        self.summary = summary
+        self.turns: Deque[Turn] = deque(turns or [])
+        self.updated = updated or time.time()
+
+    def add_turn(self, is_user: bool, text: str) -> None:
+        self.turns.append((is_user, text))
+        self.updated = time.time()
+        while len(self.turns) > MAX_RECENT_TURNS:
+            self._roll_up(*self.turns.popleft())
+
+    def _roll_up(self, is_user: bool, text: str) -> None:
+        """Fold one old turn into the running summary, dropping the oldest lines past the cap"""
+        line = f"{'Owner asked' if is_user else 'You answered'}: {_snippet(text)}"
+        lines = self.summary.split("\n") if self.summary else []
+        lines.append(line)
+        while len(lines) > 1 and sum(len(part) + 1 for part in lines) > MAX_SUMMARY_CHARS:
+            lines.pop(0)
+        self.summary = "\n".join(lines)
+
+    def messages(self) -> List[Dict[str, str]]:
+        """Chat-completion messages for the summary and the recent turns"""
+        messages = []
+        if self.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"})
+        for is_user, text in self.turns:
+            messages.append({"role": "user" if is_user else "assistant", "content": text})
+        return messages
+
+    def to_row(self) -> Tuple[str, Optional[str], str, str, float]:
+        return (self.session_id, self.shop, self.summary, json.dumps(list(self.turns)), self.updated)
+
+    @classmethod
+    def from_row(cls, row: Tuple) -> "ChatSession":
+        session_id, shop, summary, turns, updated = row
+        return cls(session_id, shop, summary or "", [(bool(u), t) for u, t in json.loads(turns or "[]")], updated)
+
+
+class ChatSessionStore:
+    """Bounded LRU of sessions with optional SQLite write-through"""
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, db_path: Optional[str] = None):
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS chat_sessions ("
+                "session_id TEXT PRIMARY KEY, shop TEXT, summary TEXT, turns TEXT, updated REAL)"
+            )
+            self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _load(self, session_id: str) -> Optional[ChatSession]:
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT session_id, shop, summary, turns, updated FROM chat_sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        return ChatSession.from_row(row) if row else None
+
+    def _remember(self, session: ChatSession) -> None:
+        self._sessions[session.session_id] = session
+        self._sessions.move_to_end(session.session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def get_or_create(self, session_id: Optional[str], shop: Optional[str] = None) -> ChatSession:
+        """Existing session (memory, then disk) or a fresh one; unknown ids start a new session under that id"""
+        with self._lock:
+            if session_id:
+                session = self._sessions.get(session_id) or self._load(session_id)
+                if session is not None:
+                    self._remember(session)
+                    return session
+            session = ChatSession(session_id or uuid.uuid4().hex, shop)
+            self._remember(session)
+            return session
+
+    def save(self, session: ChatSession) -> None:
+        if self._db is None:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO chat_sessions (session_id, shop, summary, turns, updated) VALUES (?, ?, ?, ?, ?)",
+                session.to_row(),
+            )
+            self._db.commit()
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            found = self._sessions.pop(session_id, None) is not None
+            if self._db is not None:
+                cursor = self._db.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+                self._db.commit()
+                found = found or cursor.rowcount > 0
+            return found
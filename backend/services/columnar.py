@@ -0,0 +1,416 @@
+"""Columnar cache for uploaded order CSVs.
+
+After an upload, `ingest_csv` makes two streaming passes over the file (a
+remote object is downloaded once into a temporary file first):
+
+1. infer a type per column (int64 -> float64 -> string) and collect stats
+   (row count, min/max, null count, distinct values for small string domains);
+   integers beyond int64 make the column float64, and non-finite values such
+   as "inf" or "nan" make it a string column;
+2. write one `.npy` file per column into COLUMNAR_CACHE_DIR.
+
+Numbers are stored as plain little-endian arrays. Strings with few distinct
+values are dictionary-encoded as int32 codes; other strings are
+offset-packed (an int64 offsets `.npy` plus one UTF-8 blob). The files use the
+standard NumPy format, so `numpy.load(..., mmap_mode='r')` works, but nothing
+here needs numpy: `open_table` memory-maps only the columns that are asked for,
+which is how `read_rows` serves pages of an uploaded file.
+"""
+import array
+import ast
+import csv
+import io
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from services.storage import COPY_CHUNK_SIZE, LocalStorage, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+COLUMNAR_CACHE_DIR = os.getenv(
+    "COLUMNAR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "columnar")
+)
+
+# String columns with at most this many distinct values are dictionary-encoded
+DICTIONARY_MAX_VALUES = 4096
+WRITE_BATCH_ROWS = 65536
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+NPY_DTYPES = {"q": "<i8", "d": "<f8", "i": "<i4"}
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+def _npy_header(typecode: str, length: int) -> bytes:
+    """NumPy format 1.0 header for a 1-D little-endian array"""
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (NPY_DTYPES[typecode], length)
+    padding = 64 - (len(NPY_MAGIC) + 2 + len(header) + 1) % 64
+    header = header + " " * padding + "\n"
+    return NPY_MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class _NpyWriter:
+    """Streams values of one typecode into a .npy file of known length"""
+
+    def __init__(self, path: str, typecode: str, length: int):
+        self.typecode = typecode
+        self.file = open(path, "wb")
+        self.file.write(_npy_header(typecode, length))
+        self.buffer = array.array(typecode)
+
+    def append(self, value) -> None:
+        self.buffer.append(value)
+        if len(self.buffer) >= WRITE_BATCH_ROWS:
+            self.flush()
+
+    def flush(self) -> None:
+        if sys.byteorder == "big":
+            self.buffer.byteswap()
+        self.buffer.tofile(self.file)
+        self.buffer = array.array(self.typecode)
+
+    def close(self) -> None:
+        self.flush()
+        self.file.close()
+
+
+def _parse_number(value: str, kind: str):
+    """Return int/float for numeric kinds, None when the value does not fit (beyond int64, inf, nan)"""
+    try:
+        number = int(value) if kind == "int" else float(value)
+    except ValueError:
+        return None
+    if kind == "int":
+        return number if INT64_MIN <= number <= INT64_MAX else None
+    return number if math.isfinite(number) else None
+
+
+def _sidecar_dir(storage_path: str) -> str:
+    base, _ = os.path.splitext(storage_path.lstrip("/"))
+    path = os.path.realpath(os.path.join(COLUMNAR_CACHE_DIR, base))
+    if os.path.commonpath([path, os.path.realpath(COLUMNAR_CACHE_DIR)]) != os.path.realpath(COLUMNAR_CACHE_DIR):
+        raise ValueError(f"Path escapes columnar cache: {storage_path}")
+    return path
+
+
+@contextmanager
+def _local_copy(storage: StorageBackend, storage_path: str) -> Iterator[str]:
+    """Local path of the CSV: the stored file itself, or a single download into a temp file"""
+    if isinstance(storage, LocalStorage):
+        yield storage.local_path(storage_path)
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as out, storage.open_read(storage_path) as raw:
+            shutil.copyfileobj(raw, out, COPY_CHUNK_SIZE)
+        yield path
+    finally:
+        os.remove(path)
+
+
+def _rows(path: str) -> Iterator[List[str]]:
+    with open(path, "rb") as raw:
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+        yield from csv.reader(text)
+
+
+def _infer_schema(path: str) -> Dict[str, Any]:
+    """Pass 1: column types and stats"""
+    rows = _rows(path)
+    header = next(rows, None)
+    if not header:
+        return {"row_count": 0, "columns": []}
+
+    names = [name.strip() or f"column_{i}" for i, name in enumerate(header)]
+    columns = [
+        {"name": name, "kind": "int", "nulls": 0, "min": None, "max": None, "values": {}}
+        for name in names
+    ]
+    row_count = 0
+
+    for row in rows:
+        if not row:
+            continue
+        row_count += 1
+        for index, column in enumerate(columns):
+            value = row[index].strip() if index < len(row) else ""
+            if value == "":
+                column["nulls"] += 1
+                continue
+
+            if column["kind"] in ("int", "float"):
+                number = _parse_number(value, column["kind"])
+                if number is None and column["kind"] == "int":
+                    number = _parse_number(value, "float")
+                    if number is not None:
+                        column["kind"] = "float"
+                if number is None:
+                    # Numeric stats no longer apply once a column turns out to be text
+                    column.update({"kind": "string", "min": None, "max": None})
+                else:
+                    column["min"] = number if column["min"] is None else min(column["min"], number)
+                    column["max"] = number if column["max"] is None else max(column["max"], number)
+
+            # Distinct values are tracked for every column, so a late switch to string keeps them
+            values = column["values"]
+            if values is not None:
+                values[value] = values.get(value, 0) + 1
+                if len(values) > DICTIONARY_MAX_VALUES:
+                    column["values"] = None
+
+    for column in columns:
+        if column["kind"] == "string":
+            column["encoding"] = "dictionary" if column["values"] is not None else "offsets"
+        else:
+            column["encoding"] = "plain"
+            # Missing integers become NaN, which needs a float column
+            if column["kind"] == "int" and column["nulls"]:
+                column["kind"] = "float"
+                if column["min"] is not None:
+                    column["min"], column["max"] = float(column["min"]), float(column["max"])
+
+    return {"row_count": row_count, "columns": columns}
+
+
+def ingest_csv(storage: StorageBackend, storage_path: str) -> Dict[str, Any]:
+    """Build the columnar sidecar for an uploaded CSV and return its stats summary"""
+    with _local_copy(storage, storage_path) as path:
+        return _ingest(path, storage_path)
+
+
+def _ingest(path: str, storage_path: str) -> Dict[str, Any]:
+    schema = _infer_schema(path)
+    row_count = schema["row_count"]
+    columns = schema["columns"]
+
+    target = _sidecar_dir(storage_path)
+    tmp_target = target + ".tmp"
+    shutil.rmtree(tmp_target, ignore_errors=True)
+    os.makedirs(tmp_target)
+
+    # Pass 2: stream every column into its own file
+    writers = []
+    for index, column in enumerate(columns):
+        stem = os.path.join(tmp_target, f"{index}")
+        if column["encoding"] == "plain":
+            typecode = "q" if column["kind"] == "int" else "d"
+            writers.append({"values": _NpyWriter(stem + ".npy", typecode, row_count)})
+        elif column["encoding"] == "dictionary":
+            categories = sorted(column["values"])
+            column["categories"] = categories
+            writers.append({
+                "codes": _NpyWriter(stem + ".npy", "i", row_count),
+                "lookup": {value: code for code, value in enumerate(categories)},
+            })
+        else:
+            writers.append({
+                "offsets": _NpyWriter(stem + ".offsets.npy", "q", row_count + 1),
+                "blob": open(stem + ".bin", "wb"),
+                "position": 0,
+            })
+            writers[-1]["offsets"].append(0)
+
+    rows = _rows(path)
+    next(rows, None)
+    for row in rows:
+        if not row:
+            continue
+        for index, (column, writer) in enumerate(zip(columns, writers)):
+            value = row[index].strip() if index < len(row) else ""
+            if column["encoding"] == "plain":
+                if value == "":
+                    writer["values"].append(float("nan"))
+                else:
+                    number = _parse_number(value, column["kind"])
+                    writer["values"].append(number if number is not None else float("nan"))
+            elif column["encoding"] == "dictionary":
+                writer["codes"].append(writer["lookup"][value] if value else -1)
+            else:
+                encoded = value.encode("utf-8")
+                writer["blob"].write(encoded)
+                writer["position"] += len(encoded)
+                writer["offsets"].append(writer["position"])
+
+    for writer in writers:
+        for key in ("values", "codes", "offsets"):
+            if key in writer:
+                writer[key].close()
+        if "blob" in writer:
+            writer["blob"].close()
+
+    stats = {
+        "source": storage_path,
+        "row_count": row_count,
+        "columns": [
+            {
+                "name": column["name"],
+                "index": index,
+                "type": column["kind"],
+                "encoding": column["encoding"],
+                "null_count": column["nulls"],
+                "min": column["min"],
+                "max": column["max"],
+                "distinct": len(column["values"]) if column["values"] is not None else None,
+                "categories": column.get("categories"),
+            }
+            for index, column in enumerate(columns)
+        ],
+    }
+    with open(os.path.join(tmp_target, "stats.json"), "w") as f:
+        json.dump(stats, f)
+
+    # Swap the finished sidecar into place
+    shutil.rmtree(target, ignore_errors=True)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    os.replace(tmp_target, target)
+    logger.info(f"Columnar sidecar written for {storage_path}: {row_count} rows, {len(columns)} columns")
+    return stats
+
+
+def remove_sidecar(storage_path: str) -> None:
+    shutil.rmtree(_sidecar_dir(storage_path), ignore_errors=True)
+
+
+def load_stats(storage_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(_sidecar_dir(storage_path), "stats.json")) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _map_npy(path: str, mappings: List[mmap.mmap]) -> memoryview:
+    """Zero-copy typed view over a .npy file written by this module"""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    mappings.append(mapped)
+
+    header_len = struct.unpack("<H", mapped[8:10])[0]
+    header = ast.literal_eval(mapped[10:10 + header_len].decode("latin1"))
+    typecode = {dtype: code for code, dtype in NPY_DTYPES.items()}[header["descr"]]
+    view = memoryview(mapped)[10 + header_len:]
+    if sys.byteorder == "big":
+        # Rare platform: fall back to a swapped copy
+        values = array.array(typecode, view.tobytes())
+        values.byteswap()
+        return memoryview(values)
+    return view.cast(typecode)
+
+
+class _DictionaryColumn:
+    def __init__(self, codes: memoryview, categories: List[str]):
+        self.codes = codes
+        self.categories = categories
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        code = self.codes[index]
+        return self.categories[code] if code >= 0 else None
+
+
+class _OffsetStringColumn:
+    def __init__(self, offsets: memoryview, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self.blob[self.offsets[index]:self.offsets[index + 1]]).decode("utf-8")
+
+
+class ColumnarTable:
+    """Memory-mapped view of a sidecar; columns are mapped on first access"""
+
+    def __init__(self, storage_path: str, stats: Dict[str, Any]):
+        self.directory = _sidecar_dir(storage_path)
+        self.stats = stats
+        self.row_count = stats["row_count"]
+        self._by_name = {column["name"]: column for column in stats["columns"]}
+        self._columns: Dict[str, Any] = {}
+        self._mappings: List[mmap.mmap] = []
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self._by_name)
+
+    def column(self, name: str):
+        """Numbers come back as a typed memoryview, strings as a lazy sequence"""
+        if name in self._columns:
+            return self._columns[name]
+
+        meta = self._by_name[name]
+        stem = os.path.join(self.directory, str(meta["index"]))
+        if self.row_count == 0:
+            column = []
+        elif meta["encoding"] == "plain":
+            column = _map_npy(stem + ".npy", self._mappings)
+        elif meta["encoding"] == "dictionary":
+            column = _DictionaryColumn(_map_npy(stem + ".npy", self._mappings), meta["categories"])
+        else:
+            offsets = _map_npy(stem + ".offsets.npy", self._mappings)
+            with open(stem + ".bin", "rb") as f:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+            if blob:
+                self._mappings.append(blob)
+            column = _OffsetStringColumn(offsets, blob)
+
+        self._columns[name] = column
+        return column
+
+    def close(self) -> None:
+        self._columns.clear()
+        for mapped in self._mappings:
+            try:
+                mapped.close()
+            except BufferError:
+                # A caller still holds a view; the map is released once it goes away
+                pass
+        self._mappings.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_table(storage_path: str) -> Optional[ColumnarTable]:
+    """Open the sidecar for an uploaded file, or None if it has not been ingested"""
+    stats = load_stats(storage_path)
+    return ColumnarTable(storage_path, stats) if stats else None
+
+
+def _json_value(value: Any) -> Any:
+    # Missing numbers are stored as NaN
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def read_rows(storage_path: str, names: Optional[List[str]] = None, offset: int = 0, limit: int = 100) -> Optional[Dict[str, Any]]:
+    """Rows [offset, offset + limit) of the named columns (all by default); only those columns are mapped"""
+    table = open_table(storage_path)
+    if table is None:
+        return None
+    with table:
+        names = names or table.column_names
+        unknown = [name for name in names if name not in table.column_names]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        columns = [table.column(name) for name in names]
+        end = min(offset + limit, table.row_count)
+        rows = [[_json_value(column[index]) for column in columns] for index in range(offset, end)]
+        del columns
+    return {"columns": names, "rows": rows, "offset": offset, "row_count": table.row_count, "has_more": end < table.row_count}
@@ -0,0 +1,136 @@
+"""Per-request deadlines.
+
+The request guard middleware stores an absolute deadline in a context
+variable. Context variables are copied into `asyncio.to_thread` workers, so
+blocking Supabase and LLM code can ask how much time is left and size its own
+timeouts to match, instead of outliving the request it serves.
+
+Threads cannot be interrupted: when a request stops waiting for one, the
+thread runs to completion anyway (still holding whatever locks it took).
+`run_blocking` counts its threads in the request's `BlockingCalls`, so the
+middleware can keep the request's admission slot until they have finished.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, List, Optional
+
+# Absolute time.monotonic() deadline of the current request, if any
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+# Never hand out a timeout so small that a call cannot possibly succeed
+MIN_TIMEOUT_SECONDS = 1.0
+
+
+class DeadlineExceeded(Exception):
+    """The current request ran out of time"""
+
+
+class BlockingCalls:
+    """Worker threads a request started, including the ones it stopped waiting for (event loop only)"""
+
+    def __init__(self):
+        self.running = 0
+        self._on_idle: List[Callable[[], None]] = []
+
+    def when_idle(self, callback: Callable[[], None]) -> None:
+        """Call `callback` once no thread is running any more (right away if none is)"""
+        if self.running:
+            self._on_idle.append(callback)
+        else:
+            callback()
+
+    def _started(self) -> None:
+        self.running += 1
+
+    def _finished(self) -> None:
+        self.running -= 1
+        if not self.running:
+            callbacks, self._on_idle = self._on_idle, []
+            for callback in callbacks:
+                callback()
+
+
+# Threads of the current request, if the request guard tracks them
+request_calls: ContextVar[Optional[BlockingCalls]] = ContextVar("request_calls", default=None)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """Seconds left for the current request (`default` outside of a request)"""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return default
+    return deadline - time.monotonic()
+
+
+def check_deadline() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def call_timeout(default: float) -> float:
+    """Timeout for an outbound call: `default`, capped by what is left of the request"""
+    check_deadline()
+    left = remaining()
+    if left is None:
+        return default
+    return max(MIN_TIMEOUT_SECONDS, min(default, left))
+
+
+async def run_blocking(func: Callable, *args: Any) -> Any:
+    """asyncio.to_thread that stops waiting once the request deadline passes.
+
+    The worker thread cannot be interrupted and finishes in the background.
+    The request is answered on time, and the thread stays counted in its
+    `BlockingCalls` until it really ends.
+    """
+    check_deadline()
+    calls = request_calls.get()
+    work = asyncio.to_thread(func, *args) if calls is None else _tracked_thread(calls, func, args)
+    left = remaining()
+    if left is None:
+        return await work
+    try:
+        return await asyncio.wait_for(work, timeout=left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def _tracked_thread(calls: BlockingCalls, func: Callable, args: tuple) -> asyncio.Future:
+    """Run `func` in the default executor, reporting to `calls` when the thread is done with it"""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    lock = threading.Lock()
+    started = abandoned = False
+
+    def run():
+        nonlocal started
+        with lock:
+            if abandoned:
+                return None
+            started = True
+        try:
+            return context.run(func, *args)
+        finally:
+            try:
+                loop.call_soon_threadsafe(calls._finished)
+            except RuntimeError:
+                # The event loop is already closed (shutdown)
+                pass
+
+    def on_done(future):
+        nonlocal abandoned
+        with lock:
+            if started:
+                return
+            # Cancelled while still queued: the thread will never run it
+            abandoned = True
+        calls._finished()
+
+    calls._started()
+    future = loop.run_in_executor(None, run)
+    future.add_done_callback(on_done)
+    return future
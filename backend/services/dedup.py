@@ -0,0 +1,179 @@
+"""Near-duplicate review detection with MinHash + LSH banding.
+
+Each review is reduced to a set of word shingles, hashed into a small MinHash
+signature and bucketed by bands. A lookup only compares against reviews that
+share a band bucket, and buckets are capped, so checks stay constant-time as
+the table grows.
+"""
+import random
+import re
+import threading
+import zlib
+from array import array
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+NUM_PERM = 64
+BANDS = 16
+ROWS_PER_BAND = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.7
+
+# Very short reviews ("Great coffee!") are legitimately repeated
+MIN_TOKENS = 4
+MAX_SHINGLES = 256
+MAX_BUCKET_SIZE = 32
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+_rng = random.Random(1337)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def shingles(tokens: List[str]) -> List[int]:
+    """Hashed word bigrams (unigrams for one-word texts)"""
+    if len(tokens) < 2:
+        grams = tokens
+    else:
+        grams = [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    hashed = {zlib.crc32(gram.encode()) for gram in grams}
+    return list(hashed)[:MAX_SHINGLES]
+
+
+def signature(shingle_hashes: List[int]) -> array:
+    """64 x 32-bit MinHash signature"""
+    prime, mask = _MERSENNE_PRIME, _MAX_HASH
+    return array("I", [
+        min((a * h + b) % prime for h in shingle_hashes) & mask
+        for a, b in _PERMUTATIONS
+    ])
+
+
+def similarity(sig_a: array, sig_b: array) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _band_keys(sig: array) -> List[Tuple[int, int]]:
+    return [
+        (band, hash(tuple(sig[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])))
+        for band in range(BANDS)
+    ]
+
+
+class DuplicateIndex:
+    """Incrementally maintained LSH index over review texts"""
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.ready = False
+        self._signatures: Dict[int, array] = {}
+        self._exact: Dict[int, int] = {}
+        self._buckets: Dict[Tuple[int, int], deque] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    @staticmethod
+    def fingerprint(text: str) -> Optional[Tuple[int, array]]:
+        """(exact hash, signature) for a review, None if it is too short to judge"""
+        tokens = tokenize(text)
+        if len(tokens) < MIN_TOKENS:
+            return None
+        return zlib.crc32(" ".join(tokens).encode()), signature(shingles(tokens))
+
+    def find_duplicate(self, text: str) -> Optional[Tuple[int, float]]:
+        """(review id, similarity) of the closest indexed near-duplicate, if any"""
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None:
+            return None
+        exact, sig = fingerprint
+
+        with self._lock:
+            if exact in self._exact:
+                return self._exact[exact], 1.0
+
+            best = None
+            seen = set()
+            for key in _band_keys(sig):
+                for review_id in self._buckets.get(key, ()):
+                    if review_id in seen:
+                        continue
+                    seen.add(review_id)
+                    score = similarity(sig, self._signatures[review_id])
+                    if score >= self.threshold and (best is None or score > best[1]):
+                        best = (review_id, score)
+            return best
+
+    def add(self, review_id: int, text: str) -> None:
+        fingerprint = self.fingerprint(text)
+        if fingerprint is None or review_id is None:
+            return
+        exact, sig = fingerprint
+
+        with self._lock:
+            if review_id in self._signatures:
+                # Already indexed, e.g. by the seeding pass or another worker's announcement
+                return
+            self._signatures[review_id] = sig
+            self._exact.setdefault(exact, review_id)
+            for key in _band_keys(sig):
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    # Bounded buckets keep lookups O(1); the oldest ids fall out first
+                    bucket = self._buckets[key] = deque(maxlen=MAX_BUCKET_SIZE)
+                bucket.append(review_id)
+
+    def remove(self, review_ids: Iterable[int]) -> None:
+        """Forget deleted reviews so they stop matching new submissions"""
+        review_ids = set(review_ids)
+        with self._lock:
+            removed = [(review_id, self._signatures.pop(review_id)) for review_id in review_ids if review_id in self._signatures]
+            if not removed:
+                return
+            self._exact = {exact: review_id for exact, review_id in self._exact.items() if review_id not in review_ids}
+            for review_id, sig in removed:
+                for key in _band_keys(sig):
+                    bucket = self._buckets.get(key)
+                    if bucket is None:
+                        continue
+                    try:
+                        bucket.remove(review_id)
+                    except ValueError:
+                        # Already pushed out of the capped bucket
+                        pass
+                    if not bucket:
+                        del self._buckets[key]
+
+    def build(self, reviews: Iterable[Dict]) -> None:
+        """Index existing history (rows with `id` and `review_text`)"""
+        for review in reviews:
+            self.add(review.get("id"), review.get("review_text", ""))
+        self.ready = True
+
+
+def find_duplicate_groups(reviews: Iterable[Dict], threshold: float = SIMILARITY_THRESHOLD) -> Dict[int, Tuple[int, float]]:
+    """Batch mode: map every near-duplicate review id to (original id, similarity).
+
+    Reviews are processed in the given order, so pass them oldest first to keep
+    the earliest copy as the original.
+    """
+    index = DuplicateIndex(threshold)
+    duplicates = {}
+    for review in reviews:
+        review_id, text = review.get("id"), review.get("review_text", "")
+        match = index.find_duplicate(text)
+        if match:
+            duplicates[review_id] = match
+        else:
+            index.add(review_id, text)
+    return duplicates
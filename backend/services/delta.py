@@ -0,0 +1,31 @@
+"""Helpers for `since=<watermark>` delta queries against the reviews table"""
+from typing import Any, Dict, List, Optional
+
+
+def apply_since(query, since: Optional[str]):
+    """Restrict a Supabase query to rows newer than the client's watermark.
+
+    A purely numeric watermark is treated as a review id, anything else as an
+    ISO timestamp.
+    """
+    if not since:
+        return query
+
+    since = since.strip()
+    if since.isdigit():
+        return query.gt("id", int(since))
+    return query.gt("timestamp", since)
+
+
+def next_watermark(rows: List[Dict[str, Any]], since: Optional[str] = None) -> Optional[str]:
+    """Return the watermark the client should send on its next delta request"""
+    ids = [row["id"] for row in rows if isinstance(row.get("id"), int)]
+    if ids:
+        return str(max(ids))
+
+    timestamps = [row["timestamp"] for row in rows if row.get("timestamp")]
+    if timestamps:
+        return max(timestamps)
+
+    # Nothing new - the client keeps its current watermark
+    return since
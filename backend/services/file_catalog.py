@@ -0,0 +1,213 @@
+"""Cached, paginated catalog of uploaded CSV files per cafe.
+
+Rows are read from `uploaded_files` once per cafe, timestamps are parsed once
+and the entries are kept pre-sorted for every supported sort key, so a page is
+a bisect plus a short scan. Writers (`upload_csv`, `delete_file`) call
+`invalidate` so the next read reloads.
+"""
+import base64
+import bisect
+import json
+import logging
+import threading
+import time
+from datetime import date, datetime, time as dt_time, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from supabase_client import supabase
+from services.shared_cache import shared_cache
+
+logger = logging.getLogger(__name__)
+
+SORT_FIELDS = ("date", "size", "name")
+# Types of the (sort value, id) key behind each sort field's cursors
+SORT_KEY_TYPES = {"date": ((int, float), int), "size": (int, int), "name": (str, int)}
+CACHE_TTL_SECONDS = 300
+# PostgREST caps a response at its max-rows setting (1000 by default), so loads are paged
+SELECT_PAGE_SIZE = 1000
+
+
+def _parse_timestamp(value: Optional[str]) -> float:
+    """Upload timestamp as epoch seconds; naive timestamps are treated as UTC"""
+    if not value:
+        return 0.0
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _format_file(row: Dict[str, Any], uploaded_at: float) -> Dict[str, Any]:
+    """Shape a row the way the dashboard file list expects it"""
+    size_mb = (row.get('file_size') or 0) / (1024 * 1024)
+    if uploaded_at:
+        formatted_date = datetime.fromtimestamp(uploaded_at, tz=timezone.utc).strftime('%Y-%m-%d')
+    else:
+        formatted_date = row.get('upload_timestamp') or ''
+
+    return {
+        'id': row['id'],
+        'name': row.get('filename') or 'Unknown File',
+        'date': formatted_date,
+        'size': f"{size_mb:.1f} MB",
+        'status': 'uploaded',
+        'supabase_url': row.get('file_url', ''),
+        'storage_path': row.get('storage_path', ''),
+    }
+
+
+def encode_cursor(sort: str, key: Tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort, *key]).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple:
+    """Key a cursor points at; ValueError if it is malformed or was issued for another sort"""
+    try:
+        issued_for, *key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("cursor is not valid")
+    if issued_for != sort:
+        raise ValueError(f"cursor was issued for sort={issued_for}, not sort={sort}")
+    if len(key) != 2 or not all(isinstance(part, kind) for part, kind in zip(key, SORT_KEY_TYPES[sort])):
+        raise ValueError("cursor is not valid")
+    return tuple(key)
+
+
+class _CafeFiles:
+    """One cafe's files, pre-sorted by every supported sort key"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self.loaded_at = time.monotonic()
+        self.entries = []
+        for row in rows:
+            uploaded_at = _parse_timestamp(row.get('upload_timestamp'))
+            self.entries.append({
+                'id': row['id'],
+                'uploaded_at': uploaded_at,
+                'file_size': row.get('file_size') or 0,
+                'name_key': (row.get('filename') or '').lower(),
+                'file': _format_file(row, uploaded_at),
+            })
+
+        self.sorted = {}
+        self.keys = {}
+        for field in SORT_FIELDS:
+            ordered = sorted(self.entries, key=lambda entry: self.sort_key(entry, field))
+            self.sorted[field] = ordered
+            self.keys[field] = [self.sort_key(entry, field) for entry in ordered]
+
+    @staticmethod
+    def sort_key(entry: Dict[str, Any], field: str) -> Tuple:
+        if field == "size":
+            return (entry['file_size'], entry['id'])
+        if field == "name":
+            return (entry['name_key'], entry['id'])
+        return (entry['uploaded_at'], entry['id'])
+
+
+class FileCatalog:
+    """Per-cafe in-memory cache in front of the `uploaded_files` table"""
+
+    def __init__(self, ttl_seconds: float = CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._cafes: Dict[str, _CafeFiles] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self, cafe_name: Optional[str] = None, broadcast: bool = True) -> None:
+        """Drop cached metadata for one cafe, or for every cafe (on every worker unless `broadcast` is off)"""
+        with self._lock:
+            if cafe_name is None:
+                self._cafes.clear()
+            else:
+                self._cafes.pop(cafe_name, None)
+        if broadcast:
+            shared_cache.bump("files", {"cafe_name": cafe_name})
+
+    def _get(self, cafe_name: str) -> _CafeFiles:
+        with self._lock:
+            cached = self._cafes.get(cafe_name)
+        if cached and time.monotonic() - cached.loaded_at < self.ttl_seconds:
+            return cached
+
+        rows, after_id = [], None
+        while True:
+            query = supabase.table('uploaded_files')\
+                .select('id, filename, storage_path, file_url, file_size, upload_timestamp')\
+                .eq('cafe_name', cafe_name)
+            if after_id is not None:
+                query = query.gt('id', after_id)
+            page = query.order('id').range(0, SELECT_PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < SELECT_PAGE_SIZE:
+                break
+            after_id = page[-1]['id']
+        cached = _CafeFiles(rows)
+        logger.info(f"Loaded {len(cached.entries)} file records for {cafe_name}")
+
+        with self._lock:
+            self._cafes[cafe_name] = cached
+        return cached
+
+    def query(
+        self,
+        cafe_name: str,
+        sort: str = "date",
+        descending: bool = True,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return one keyset-paginated page of files plus the cursor for the next one (every file without a limit)"""
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"sort must be one of {', '.join(SORT_FIELDS)}")
+        after = decode_cursor(cursor, sort) if cursor else None
+
+        cafe = self._get(cafe_name)
+        entries = cafe.sorted[sort]
+        keys = cafe.keys[sort]
+        if limit is None:
+            limit = len(entries)
+
+        start_ts = datetime.combine(date_from, dt_time.min, tzinfo=timezone.utc).timestamp() if date_from else None
+        end_ts = datetime.combine(date_to, dt_time.max, tzinfo=timezone.utc).timestamp() if date_to else None
+
+        # Position just past the cursor in the requested direction
+        if descending:
+            index = bisect.bisect_left(keys, after) - 1 if after else len(entries) - 1
+            step = -1
+        else:
+            index = bisect.bisect_right(keys, after) if after else 0
+            step = 1
+
+        page = []
+        last_key = None
+        while 0 <= index < len(entries) and len(page) < limit:
+            entry = entries[index]
+            index += step
+            if start_ts is not None and entry['uploaded_at'] < start_ts:
+                continue
+            if end_ts is not None and entry['uploaded_at'] > end_ts:
+                continue
+            if min_size is not None and entry['file_size'] < min_size:
+                continue
+            if max_size is not None and entry['file_size'] > max_size:
+                continue
+            page.append(entry['file'])
+            last_key = keys[index - step]
+
+        has_more = len(page) == limit and 0 <= index < len(entries)
+        return {
+            'files': page,
+            'next_cursor': encode_cursor(sort, last_key) if has_more and last_key is not None else None,
+            'has_more': has_more,
+            'total': len(entries),
+        }
+
+
+file_catalog = FileCatalog()
@@ -0,0 +1,281 @@
+"""Deterministic, rule-based business insights.
+
+`InsightAggregates` keeps running totals over every review: keyword counts by
+sentiment, per-aspect clause scores and ratings per day. `generate_insights`
+turns a snapshot of those totals into ranked strengths, weaknesses and actions
+in well under a millisecond, so /suggestions never has to wait on an LLM.
+"""
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from services.search_index import parse_timestamp
+
+# Evidence needed before a keyword or aspect is called out
+MIN_MENTIONS = 3
+# Share of positive (or negative) mentions for a keyword to count as a strength (or weakness)
+KEYWORD_SHARE = 0.6
+ASPECT_STRENGTH_SCORE = 0.2
+ASPECT_WEAKNESS_SCORE = -0.05
+ASPECT_WEAKNESS_SHARE = 0.35
+TREND_WINDOW_DAYS = 30
+# Change in average rating between windows that counts as a trend
+TREND_DELTA = 0.3
+MAX_ITEMS = 5
+
+ASPECT_ACTIONS = {
+    "service": "Coach staff on greeting and follow-up; review recent service complaints in the next team meeting",
+    "coffee": "Audit recipes, grind and brew settings so drinks come out consistent on every shift",
+    "price": "Review pricing against nearby cafes or introduce value bundles and a loyalty stamp card",
+    "atmosphere": "Address seating, noise and cleanliness - schedule hourly table and restroom checks",
+    "wait": "Add a barista at peak hours or offer mobile pre-ordering to shorten the queue",
+}
+ASPECT_PROMOTIONS = {
+    "service": "Feature your team in social posts - customers notice the friendly service",
+    "coffee": "Promote your signature drinks; coffee quality is what customers praise most",
+    "price": "Highlight your value for money in local listings",
+    "atmosphere": "Market the space as a place to stay - customers enjoy the atmosphere",
+    "wait": "Mention quick service in promotions aimed at the morning commute",
+}
+
+
+class InsightAggregates:
+    """Running totals that the insight rules are evaluated against"""
+
+    def __init__(self):
+        self.ready = False
+        self.total_reviews = 0
+        self.rating_sum = 0
+        # review id -> (rating, sentiment, keywords, aspects, day) as added, so removal never re-analyses
+        self._added: Dict[int, tuple] = {}
+        self._keywords: Dict[str, Dict[str, int]] = {}
+        self._aspects: Dict[str, Dict[str, float]] = {}
+        # ISO date -> [review count, rating sum]
+        self._days: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, review: Dict[str, Any], analysis: Dict[str, Any]) -> None:
+        rating = review.get("rating") or 0
+        timestamp = parse_timestamp(review.get("timestamp"))
+        day = datetime.fromtimestamp(timestamp, tz=timezone.utc).date().isoformat() if timestamp else None
+        sentiment = analysis["sentiment"]
+        keywords = tuple(analysis["keywords"])
+        aspects = tuple(analysis["aspects"].items())
+
+        with self._lock:
+            review_id = review.get("id")
+            if review_id is not None:
+                if review_id in self._added:
+                    return
+                self._added[review_id] = (rating, sentiment, keywords, aspects, day)
+
+            self.total_reviews += 1
+            self.rating_sum += rating
+
+            for keyword in keywords:
+                counts = self._keywords.setdefault(keyword, {"positive": 0, "negative": 0, "neutral": 0})
+                counts[sentiment] = counts.get(sentiment, 0) + 1
+
+            for aspect, score in aspects:
+                totals = self._aspects.setdefault(aspect, {"mentions": 0, "score_sum": 0.0, "positive": 0, "negative": 0})
+                totals["mentions"] += 1
+                totals["score_sum"] += score
+                if score >= 0.05:
+                    totals["positive"] += 1
+                elif score <= -0.05:
+                    totals["negative"] += 1
+
+            if day:
+                bucket = self._days.setdefault(day, [0, 0])
+                bucket[0] += 1
+                bucket[1] += rating
+
+    def remove(self, review_id: int) -> None:
+        """Take a deleted review back out of the totals, exactly as it was added"""
+        with self._lock:
+            added = self._added.pop(review_id, None)
+            if added is None:
+                return
+            rating, sentiment, keywords, aspects, day = added
+
+            self.total_reviews -= 1
+            self.rating_sum -= rating
+
+            for keyword in keywords:
+                counts = self._keywords.get(keyword)
+                if counts is not None:
+                    counts[sentiment] = max(0, counts.get(sentiment, 0) - 1)
+                    if not any(counts.values()):
+                        del self._keywords[keyword]
+
+            for aspect, score in aspects:
+                totals = self._aspects.get(aspect)
+                if totals is None:
+                    continue
+                totals["mentions"] -= 1
+                totals["score_sum"] -= score
+                if score >= 0.05:
+                    totals["positive"] -= 1
+                elif score <= -0.05:
+                    totals["negative"] -= 1
+                if totals["mentions"] <= 0:
+                    del self._aspects[aspect]
+
+            if day:
+                bucket = self._days.get(day)
+                if bucket is not None:
+                    bucket[0] -= 1
+                    bucket[1] -= rating
+                    if bucket[0] <= 0:
+                        del self._days[day]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "total_reviews": self.total_reviews,
+                "rating_sum": self.rating_sum,
+                "keywords": {k: dict(v) for k, v in self._keywords.items()},
+                "aspects": {k: dict(v) for k, v in self._aspects.items()},
+                "days": {k: tuple(v) for k, v in self._days.items()},
+            }
+
+
+def rating_trend(days: Dict[str, tuple], now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """Average rating over the last window vs the window before it"""
+    if not days:
+        return None
+    end = (now or datetime.now(timezone.utc)).date()
+    # Quiet cafes: anchor on the latest review rather than on today
+    latest = datetime.fromisoformat(max(days)).date()
+    if (end - latest).days > TREND_WINDOW_DAYS:
+        end = latest
+    recent_start = end - timedelta(days=TREND_WINDOW_DAYS - 1)
+    previous_start = recent_start - timedelta(days=TREND_WINDOW_DAYS)
+
+    windows = {"recent": [0, 0], "previous": [0, 0]}
+    for day, (count, rating_sum) in days.items():
+        date = datetime.fromisoformat(day).date()
+        if recent_start <= date <= end:
+            window = windows["recent"]
+        elif previous_start <= date < recent_start:
+            window = windows["previous"]
+        else:
+            continue
+        window[0] += count
+        window[1] += rating_sum
+
+    (recent_count, recent_sum), (previous_count, previous_sum) = windows["recent"], windows["previous"]
+    if recent_count < MIN_MENTIONS or previous_count < MIN_MENTIONS:
+        return None
+    recent_avg, previous_avg = recent_sum / recent_count, previous_sum / previous_count
+    delta = recent_avg - previous_avg
+    return {
+        "recent_average": round(recent_avg, 2),
+        "previous_average": round(previous_avg, 2),
+        "recent_reviews": recent_count,
+        "previous_reviews": previous_count,
+        "change": round(delta, 2),
+        "direction": "up" if delta >= TREND_DELTA else "down" if delta <= -TREND_DELTA else "flat",
+    }
+
+
+def _weight(share: float, mentions: int) -> float:
+    """Rank by how one-sided the feedback is, scaled by how often it comes up"""
+    return round(share * math.log1p(mentions), 3)
+
+
+def generate_insights(aggregates: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Ranked strengths, weaknesses and actions from an `InsightAggregates.snapshot()`"""
+    started = time.perf_counter()
+    strengths, weaknesses, actions = [], [], []
+
+    for aspect, totals in aggregates["aspects"].items():
+        mentions = totals["mentions"]
+        if mentions < MIN_MENTIONS:
+            continue
+        average = totals["score_sum"] / mentions
+        positive_share, negative_share = totals["positive"] / mentions, totals["negative"] / mentions
+        if average >= ASPECT_STRENGTH_SCORE:
+            strengths.append({
+                "type": "aspect", "name": aspect, "score": _weight(positive_share, mentions),
+                "evidence": f"{totals['positive']} of {mentions} mentions of {aspect} are positive (avg {average:+.2f})",
+            })
+            actions.append({"action": ASPECT_PROMOTIONS[aspect], "reason": f"{aspect} is a strength",
+                            "priority": "low", "score": _weight(positive_share, mentions) / 2})
+        elif average <= ASPECT_WEAKNESS_SCORE or negative_share >= ASPECT_WEAKNESS_SHARE:
+            score = _weight(negative_share, mentions)
+            weaknesses.append({
+                "type": "aspect", "name": aspect, "score": score,
+                "evidence": f"{totals['negative']} of {mentions} mentions of {aspect} are negative (avg {average:+.2f})",
+            })
+            actions.append({"action": ASPECT_ACTIONS[aspect], "reason": f"{aspect} draws complaints",
+                            "priority": "high" if negative_share >= 0.5 else "medium", "score": score})
+
+    for keyword, counts in aggregates["keywords"].items():
+        mentions = sum(counts.values())
+        if mentions < MIN_MENTIONS:
+            continue
+        positive_share, negative_share = counts["positive"] / mentions, counts["negative"] / mentions
+        if positive_share >= KEYWORD_SHARE:
+            strengths.append({
+                "type": "keyword", "name": keyword, "score": _weight(positive_share, mentions),
+                "evidence": f'"{keyword}" appears in {counts["positive"]} positive reviews',
+            })
+        elif negative_share >= KEYWORD_SHARE:
+            score = _weight(negative_share, mentions)
+            weaknesses.append({
+                "type": "keyword", "name": keyword, "score": score,
+                "evidence": f'"{keyword}" appears in {counts["negative"]} negative reviews',
+            })
+            actions.append({"action": f'Look into recurring complaints mentioning "{keyword}"',
+                            "reason": f'{counts["negative"]} negative reviews', "priority": "medium", "score": score})
+
+    trend = rating_trend(aggregates["days"], now)
+    if trend and trend["direction"] == "down":
+        score = round(abs(trend["change"]) * math.log1p(trend["recent_reviews"]), 3)
+        weaknesses.append({
+            "type": "trend", "name": "rating", "score": score,
+            "evidence": f"Average rating fell from {trend['previous_average']} to {trend['recent_average']} over the last {TREND_WINDOW_DAYS} days",
+        })
+        actions.append({"action": "Find out what changed recently (staff, menu, suppliers, hours) - ratings are dropping",
+                        "reason": "declining rating trend", "priority": "high", "score": score + 10})
+    elif trend and trend["direction"] == "up":
+        strengths.append({
+            "type": "trend", "name": "rating", "score": round(trend["change"] * math.log1p(trend["recent_reviews"]), 3),
+            "evidence": f"Average rating rose from {trend['previous_average']} to {trend['recent_average']} over the last {TREND_WINDOW_DAYS} days",
+        })
+
+    priority_rank = {"high": 0, "medium": 1, "low": 2}
+    strengths.sort(key=lambda item: item["score"], reverse=True)
+    weaknesses.sort(key=lambda item: item["score"], reverse=True)
+    actions.sort(key=lambda item: (priority_rank[item["priority"]], -item["score"]))
+
+    total = aggregates["total_reviews"]
+    return {
+        "total_reviews": total,
+        "average_rating": round(aggregates["rating_sum"] / total, 2) if total else 0,
+        "rating_trend": trend,
+        "strengths": strengths[:MAX_ITEMS],
+        "weaknesses": weaknesses[:MAX_ITEMS],
+        "actions": actions[:MAX_ITEMS],
+        "took_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def format_insights(insights: Dict[str, Any]) -> str:
+    """Plain-text version in the numbered layout the dashboard already parses"""
+    if not insights["total_reviews"]:
+        return "No reviews available for analysis yet. Once customers start leaving reviews, I'll provide personalized business suggestions based on their feedback."
+
+    lines = [f"Based on {insights['total_reviews']} reviews (average {insights['average_rating']}/5):", "", "1. Customers love:"]
+    lines += [f"- {item['evidence']}" for item in insights["strengths"]] or ["- Not enough consistent praise yet to single anything out"]
+    lines += ["", "2. Areas that need improvement:"]
+    lines += [f"- {item['evidence']}" for item in insights["weaknesses"]] or ["- No recurring complaints stand out"]
+    lines += ["", "3. Specific actionable recommendations:"]
+    lines += [f"- {item['action']}" for item in insights["actions"]] or ["- Keep doing what works and keep collecting reviews"]
+    return "\n".join(lines)
+
+
+insight_aggregates = InsightAggregates()
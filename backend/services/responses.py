@@ -0,0 +1,101 @@
+"""Fast JSON responses for large, already JSON-shaped payloads.
+
+Returning a Response instance from a route bypasses FastAPI's
+`jsonable_encoder` walk, so these are meant for dicts/lists of plain values
+(e.g. Supabase rows). orjson and brotli are used when installed, with the
+stdlib json/gzip as fallbacks.
+"""
+import gzip
+import json
+from typing import Any, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional speedup
+    brotli = None
+
+# Below this size compression costs more than it saves
+MIN_COMPRESS_BYTES = 1024
+GZIP_LEVEL = 1
+BROTLI_QUALITY = 4
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize plain JSON data to UTF-8 bytes"""
+    if orjson is not None:
+        return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported content-coding from an Accept-Encoding header"""
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip()] = quality
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips jsonable_encoder and negotiates compression"""
+
+    media_type = "application/json"
+
+    def __init__(
+        self,
+        content: Any,
+        status_code: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        accept_encoding: str = "",
+        **kwargs
+    ):
+        self.content_encoding = None
+        self._accept_encoding = accept_encoding
+        super().__init__(content, status_code=status_code, headers=headers, **kwargs)
+        self.headers["vary"] = "Accept-Encoding"
+        if self.content_encoding:
+            self.headers["content-encoding"] = self.content_encoding
+
+    def render(self, content: Any) -> bytes:
+        body = dumps(content)
+        if len(body) < MIN_COMPRESS_BYTES:
+            return body
+
+        encoding = choose_encoding(self._accept_encoding)
+        if encoding == "br":
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        elif encoding == "gzip":
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        self.content_encoding = encoding
+        return body
+
+
+def fast_json(request: Request, content: Any, status_code: int = 200) -> FastJSONResponse:
+    """Build a FastJSONResponse, compressed according to the request's Accept-Encoding"""
+    return FastJSONResponse(
+        content,
+        status_code=status_code,
+        accept_encoding=request.headers.get("accept-encoding", "")
+    )
@@ -0,0 +1,76 @@
+"""In-process hooks fired whenever reviews are stored or deleted.
+
+Modules that keep derived state about reviews (live feeds, indexes, caches)
+register a listener here instead of being wired into `submit_review` and the
+dedupe endpoint one by one. Reviews stored by other workers are published here
+too, except to the `on_local_review_inserted` listeners that announce this
+worker's own writes to the others.
+"""
+import inspect
+import logging
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+ReviewListener = Callable[[Dict[str, Any]], Any]
+DeletionListener = Callable[[List[Dict[str, Any]]], Any]
+
+_listeners: List[ReviewListener] = []
+_local_listeners: List[ReviewListener] = []
+_deletion_listeners: List[DeletionListener] = []
+_version = 0
+
+
+def on_review_inserted(listener: ReviewListener) -> ReviewListener:
+    """Register a (sync or async) callback for newly inserted reviews. Usable as a decorator."""
+    _listeners.append(listener)
+    return listener
+
+
+def on_local_review_inserted(listener: ReviewListener) -> ReviewListener:
+    """Like `on_review_inserted`, but only for reviews stored through this worker"""
+    _local_listeners.append(listener)
+    return listener
+
+
+def on_reviews_deleted(listener: DeletionListener) -> DeletionListener:
+    """Register a (sync or async) callback for deleted review rows. Usable as a decorator."""
+    _deletion_listeners.append(listener)
+    return listener
+
+
+def reviews_version() -> int:
+    """Counter bumped on every published review, handy as a cache key component"""
+    return _version
+
+
+async def publish_review(review: Dict[str, Any], remote: bool = False) -> None:
+    """Notify every listener about a freshly inserted review row (`remote`: stored by another worker)"""
+    global _version
+    _version += 1
+
+    listeners = list(_listeners) if remote else _listeners + _local_listeners
+    for listener in listeners:
+        try:
+            result = listener(review)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            # A broken listener must never fail the review submission itself
+            logger.error(f"Review listener {getattr(listener, '__name__', listener)} failed: {e}")
+
+
+async def publish_reviews_deleted(reviews: List[Dict[str, Any]]) -> None:
+    """Notify every deletion listener about review rows that were removed from the table"""
+    global _version
+    if not reviews:
+        return
+    _version += 1
+
+    for listener in list(_deletion_listeners):
+        try:
+            result = listener(reviews)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.error(f"Review deletion listener {getattr(listener, '__name__', listener)} failed: {e}")
@@ -0,0 +1,353 @@
+"""Process-wide, compact in-memory copy of the reviews table.
+
+Analytics routes used to pull the whole table as PostgREST dicts on every
+request. The snapshot keeps one copy instead, stored as columns:
+
+* ``array`` columns for id (int64), rating (int8) and timestamp (float64 epoch)
+* every review text UTF-8 encoded into one ``bytearray``, addressed by an
+  ``array`` of offsets
+
+That is roughly 30 bytes per review plus the text itself, against 1KB+ for a
+list of dicts. Rows are kept in id order, so lookups by id are a bisect, and
+incremental refreshes only fetch ids above the fetched-through watermark. When the text buffer
+grows past its cap, the oldest texts are dropped; their numeric columns stay so
+counts and ratings remain complete. Evicted texts come back as None: text-based
+aggregates keep what they derived before the eviction and otherwise leave the
+review out, reporting how many they left out as `text_evicted`.
+"""
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from supabase_client import supabase
+from services.search_index import parse_timestamp
+
+logger = logging.getLogger(__name__)
+
+REVIEW_SNAPSHOT_TEXT_MB = float(os.getenv("REVIEW_SNAPSHOT_TEXT_MB", "256"))
+# How stale the snapshot may get before a reader triggers a delta refresh
+REVIEW_SNAPSHOT_MAX_AGE_SECONDS = float(os.getenv("REVIEW_SNAPSHOT_MAX_AGE_SECONDS", "30"))
+# Reviews younger than this are fetched again on the next refresh, in case a
+# concurrent insert with a lower id commits after them
+REVIEW_SNAPSHOT_SETTLE_SECONDS = float(os.getenv("REVIEW_SNAPSHOT_SETTLE_SECONDS", "120"))
+REFRESH_PAGE_SIZE = 1000
+# Eviction trims the text buffer to this fraction of the cap so it does not run on every insert
+EVICTION_TARGET = 0.9
+
+
+def format_timestamp(epoch: float) -> Optional[str]:
+    if not epoch:
+        return None
+    return datetime.fromtimestamp(epoch, tz=timezone.utc).isoformat()
+
+
+class ReviewRecord:
+    """One review row, materialized on demand"""
+
+    __slots__ = ("id", "review_text", "rating", "epoch")
+
+    def __init__(self, review_id: int, review_text: Optional[str], rating: int, epoch: float):
+        self.id = review_id
+        self.review_text = review_text
+        self.rating = rating
+        self.epoch = epoch
+
+    @property
+    def timestamp(self) -> Optional[str]:
+        # Formatted lazily: most scans never look at it
+        return format_timestamp(self.epoch)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """dict-style access, so record-consuming code can take either"""
+        value = getattr(self, key, None)
+        return default if value is None else value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "review_text": self.review_text, "rating": self.rating, "timestamp": self.timestamp}
+
+
+class _Columns:
+    """One consistent view of the snapshot.
+
+    Writers append to the arrays in place and publish a new view with the
+    higher `count` last, or build fresh arrays (out-of-order inserts, text
+    eviction) and publish them as a new view. A reader takes `_columns` once
+    and only looks at slots below its `count`, so it never sees an id whose
+    offsets or text are not there yet.
+    """
+
+    __slots__ = ("ids", "ratings", "timestamps", "offsets", "origin", "text", "deleted", "count")
+
+    def __init__(self, ids: array, ratings: array, timestamps: array, offsets: array,
+                 origin: int, text: bytearray, deleted: set, count: int):
+        self.ids = ids
+        self.ratings = ratings
+        self.timestamps = timestamps
+        # Absolute end offset of each review's text; review i spans offsets[i]..offsets[i + 1]
+        self.offsets = offsets
+        # Absolute offset of text[0]; everything before it has been evicted
+        self.origin = origin
+        self.text = text
+        self.deleted = deleted
+        self.count = count
+
+    def replace(self, **changes) -> "_Columns":
+        values = {name: changes.get(name, getattr(self, name)) for name in self.__slots__}
+        return _Columns(**values)
+
+    def slot(self, review_id: int) -> Optional[int]:
+        slot = bisect.bisect_left(self.ids, review_id, 0, self.count)
+        if slot < self.count and self.ids[slot] == review_id:
+            return slot
+        return None
+
+    def text_at(self, slot: int) -> Optional[str]:
+        start = self.offsets[slot]
+        if start < self.origin:
+            return None
+        return self.text[start - self.origin:self.offsets[slot + 1] - self.origin].decode("utf-8")
+
+
+class ReviewSnapshot:
+    """Columnar review store with watermark refresh and capped text"""
+
+    def __init__(self, text_cap_bytes: int = int(REVIEW_SNAPSHOT_TEXT_MB * 1024 * 1024),
+                 settle_seconds: float = REVIEW_SNAPSHOT_SETTLE_SECONDS):
+        self.text_cap_bytes = text_cap_bytes
+        self.settle_seconds = settle_seconds
+        self.ready = False
+        self.refreshed_at = 0.0
+        # Every id up to here has been fetched from the database. Only `refresh`
+        # moves it: reviews added locally (or fetched while younger than the
+        # settle window) can sit above ids another worker's insert has not
+        # committed yet, so they must not skip those ids.
+        self.complete_through = 0
+        self._columns = _Columns(array("q"), array("b"), array("d"), array("Q", [0]), 0, bytearray(), set(), 0)
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        columns = self._columns
+        return columns.count - len(columns.deleted)
+
+    @property
+    def watermark(self) -> Optional[str]:
+        """Highest review id held"""
+        columns = self._columns
+        return str(columns.ids[columns.count - 1]) if columns.count else None
+
+    @property
+    def text_evicted(self) -> int:
+        """Number of oldest reviews whose text has been dropped"""
+        columns = self._columns
+        return bisect.bisect_left(columns.offsets, columns.origin, 0, columns.count) if columns.origin else 0
+
+    # -- writes ---------------------------------------------------------------
+
+    def _append(self, rows: Iterable[Dict[str, Any]]) -> int:
+        added = 0
+        with self._lock:
+            columns = self._columns
+            ids, count = columns.ids, columns.count
+            for row in rows:
+                review_id = row.get("id")
+                if not isinstance(review_id, int):
+                    continue
+                if count and review_id <= ids[count - 1]:
+                    if columns.slot(review_id) is None:
+                        columns = self._insert(columns, row)
+                        ids, count = columns.ids, columns.count
+                        added += 1
+                    continue
+                encoded = (row.get("review_text") or "").encode("utf-8")
+                # Text and offsets first, the id last: the id is what makes a slot visible
+                columns.text += encoded
+                columns.offsets.append(columns.offsets[count] + len(encoded))
+                columns.ratings.append(int(row.get("rating") or 0))
+                columns.timestamps.append(parse_timestamp(row.get("timestamp")))
+                ids.append(review_id)
+                count += 1
+                added += 1
+            columns = columns.replace(count=count)
+            if len(columns.text) > self.text_cap_bytes:
+                columns = self._evict_text(columns)
+            self._columns = columns
+        return added
+
+    def _insert(self, columns: _Columns, row: Dict[str, Any]) -> _Columns:
+        """Place a review that arrived out of id order into its sorted slot.
+
+        Rare (a worker saw its own insert before a refresh caught up with
+        other workers' older ids), so it copies the columns rather than
+        complicating the append path; readers keep the old copy until the
+        new view is published.
+        """
+        slot = bisect.bisect_left(columns.ids, row["id"], 0, columns.count)
+        offsets = columns.offsets
+        start = offsets[slot]
+        encoded = (row.get("review_text") or "").encode("utf-8")
+        if start < columns.origin:
+            # Lands among the evicted texts: keep the numbers, drop the text
+            encoded = b""
+        text = bytearray(columns.text)
+        text[start - columns.origin:start - columns.origin] = encoded
+        shift = len(encoded)
+        new_offsets = offsets[:slot + 1]
+        new_offsets.append(start + shift)
+        new_offsets.extend(offset + shift for offset in offsets[slot + 1:columns.count + 1])
+
+        ids = columns.ids[:columns.count]
+        ratings = columns.ratings[:columns.count]
+        timestamps = columns.timestamps[:columns.count]
+        ids.insert(slot, row["id"])
+        ratings.insert(slot, int(row.get("rating") or 0))
+        timestamps.insert(slot, parse_timestamp(row.get("timestamp")))
+        deleted = {deleted_slot + 1 if deleted_slot >= slot else deleted_slot for deleted_slot in columns.deleted}
+        return _Columns(ids, ratings, timestamps, new_offsets, columns.origin, text, deleted, columns.count + 1)
+
+    def _evict_text(self, columns: _Columns) -> _Columns:
+        """Drop the oldest texts until the buffer is back under the target size"""
+        origin, text = columns.origin, columns.text
+        target = int(self.text_cap_bytes * EVICTION_TARGET)
+        # First review whose text starts at or after the cut keeps its text
+        first_kept = bisect.bisect_left(columns.offsets, origin + len(text) - target, 0, columns.count)
+        cut = columns.offsets[first_kept] - origin
+        logger.info(f"Review snapshot evicted {cut} bytes of old review text ({first_kept} reviews without text)")
+        return columns.replace(origin=origin + cut, text=text[cut:])
+
+    def add(self, review: Dict[str, Any]) -> None:
+        """Add a freshly inserted review"""
+        self._append([review])
+
+    def discard(self, review_ids: Iterable[int]) -> None:
+        """Hide deleted reviews"""
+        with self._lock:
+            columns = self._columns
+            for review_id in review_ids:
+                slot = columns.slot(review_id)
+                if slot is not None:
+                    columns.deleted.add(slot)
+
+    def refresh(self) -> int:
+        """Fetch reviews above the fetched-through watermark, a page at a time"""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            # Rows younger than this may still have older ids committing behind them
+            settled_before = time.time() - self.settle_seconds
+            after = self.complete_through
+            complete_through = after
+            settled = True
+            added = 0
+            while True:
+                query = supabase.table("reviews").select("id, review_text, rating, timestamp")
+                if after:
+                    query = query.gt("id", after)
+                rows = query.order("id").range(0, REFRESH_PAGE_SIZE - 1).execute().data or []
+                added += self._append(rows)
+                for row in rows:
+                    settled = settled and parse_timestamp(row.get("timestamp")) <= settled_before
+                    if settled:
+                        complete_through = row["id"]
+                if rows:
+                    after = rows[-1]["id"]
+                if len(rows) < REFRESH_PAGE_SIZE:
+                    break
+            self.complete_through = complete_through
+            self.ready = True
+            self.refreshed_at = time.monotonic()
+            if added:
+                logger.info(f"Review snapshot refreshed: {added} new, {len(self)} total in {time.perf_counter() - started:.2f}s")
+            return added
+
+    def mark_stale(self) -> None:
+        """Make the next `ensure_fresh` fetch, e.g. after another worker stored a review"""
+        self.refreshed_at = 0.0
+
+    def ensure_fresh(self, max_age: float = REVIEW_SNAPSHOT_MAX_AGE_SECONDS) -> None:
+        """Refresh if the snapshot was never loaded or is older than `max_age` seconds"""
+        if not self.ready or time.monotonic() - self.refreshed_at > max_age:
+            self.refresh()
+
+    # -- reads ----------------------------------------------------------------
+
+    def text(self, slot: int) -> Optional[str]:
+        """Review text, or None if it has been evicted"""
+        return self._columns.text_at(slot)
+
+    def record(self, slot: int) -> ReviewRecord:
+        columns = self._columns
+        return ReviewRecord(columns.ids[slot], columns.text_at(slot), columns.ratings[slot], columns.timestamps[slot])
+
+    def get(self, review_id: int) -> Optional[ReviewRecord]:
+        columns = self._columns
+        slot = columns.slot(review_id)
+        if slot is None or slot in columns.deleted:
+            return None
+        return ReviewRecord(review_id, columns.text_at(slot), columns.ratings[slot], columns.timestamps[slot])
+
+    def slots(self, since: Optional[str] = None, newest_first: bool = False) -> List[int]:
+        """Live slots, optionally only those newer than a `since` watermark (review id or ISO timestamp)"""
+        return self._slots(self._columns, since, newest_first)
+
+    @staticmethod
+    def _slots(columns: _Columns, since: Optional[str], newest_first: bool) -> List[int]:
+        count = columns.count
+        start = 0
+        if since:
+            since = since.strip()
+            if since.isdigit():
+                start = bisect.bisect_right(columns.ids, int(since), 0, count)
+        selected = range(start, count)
+        if since and not since.isdigit():
+            threshold = parse_timestamp(since)
+            timestamps = columns.timestamps
+            selected = [slot for slot in selected if timestamps[slot] > threshold]
+        deleted = columns.deleted
+        result = [slot for slot in selected if slot not in deleted] if deleted else list(selected)
+        if newest_first:
+            # Ids follow insertion order, which is timestamp order for reviews
+            result.reverse()
+        return result
+
+    def ids(self, since: Optional[str] = None, newest_first: bool = False) -> List[int]:
+        """Ids of the live reviews, selected like `slots`"""
+        columns = self._columns
+        ids = columns.ids
+        return [ids[slot] for slot in self._slots(columns, since, newest_first)]
+
+    def rows(self, since: Optional[str] = None, newest_first: bool = False) -> Iterator[ReviewRecord]:
+        columns = self._columns
+        ids, ratings, timestamps, offsets = columns.ids, columns.ratings, columns.timestamps, columns.offsets
+        origin, text = columns.origin, columns.text
+        for slot in self._slots(columns, since, newest_first):
+            start = offsets[slot]
+            review_text = text[start - origin:offsets[slot + 1] - origin].decode("utf-8") if start >= origin else None
+            yield ReviewRecord(ids[slot], review_text, ratings[slot], timestamps[slot])
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Bytes held by the snapshot, and the same scaled to 100k reviews"""
+        c = self._columns
+        columns = sum(column.itemsize * len(column) for column in (c.ids, c.ratings, c.timestamps, c.offsets))
+        text = len(c.text)
+        overhead = sys.getsizeof(c.deleted)
+        total = columns + text + overhead
+        count = c.count
+        return {
+            "reviews": count,
+            "bytes": total,
+            "column_bytes": columns,
+            "text_bytes": text,
+            "text_cap_bytes": self.text_cap_bytes,
+            "text_evicted_reviews": self.text_evicted,
+            "complete_through": self.complete_through,
+            "bytes_per_100k_reviews": int(total / count * 100_000) if count else 0,
+        }
+
+
+review_snapshot = ReviewSnapshot()
@@ -0,0 +1,236 @@
+"""In-process job scheduler.
+
+Modules register named jobs (optionally periodic) with `@scheduled_job`, the
+FastAPI lifespan starts the scheduler and drains it on shutdown. Every run,
+periodic or on demand, goes through one bounded worker pool: blocking jobs run
+on its threads, coroutine jobs on the event loop, and a semaphore caps how
+many of either run at once. Submitting a job that is already waiting with the
+same arguments returns the pending run instead of queueing a second one.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+SCHEDULER_DRAIN_SECONDS = float(os.getenv("SCHEDULER_DRAIN_SECONDS", "30"))
+JOB_HISTORY_SIZE = 200
+
+PENDING, RUNNING, SUCCEEDED, FAILED, CANCELLED = "pending", "running", "succeeded", "failed", "cancelled"
+
+
+class JobDefinition:
+    __slots__ = ("name", "func", "interval_seconds", "run_on_start", "manual", "description")
+
+    def __init__(self, name: str, func: Callable, interval_seconds: Optional[float], run_on_start: bool,
+                 manual: bool, description: str):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.run_on_start = run_on_start
+        self.manual = manual
+        self.description = description
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "interval_seconds": self.interval_seconds,
+            "run_on_start": self.run_on_start,
+            "manual": self.manual,
+        }
+
+
+class Job:
+    __slots__ = ("job_id", "name", "key", "trigger", "args", "status", "created", "started", "finished", "result", "error", "_future")
+
+    def __init__(self, name: str, key: str, trigger: str, args: tuple):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.key = key
+        self.trigger = trigger
+        self.args = args
+        self.status = PENDING
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self._future: Optional[asyncio.Task] = None
+
+    async def wait(self) -> None:
+        """Wait for the run to finish; cancelling the waiter leaves the run alone"""
+        if self._future is not None:
+            await asyncio.shield(self._future)
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = None
+        if self.started is not None:
+            duration = round((self.finished or time.time()) - self.started, 3)
+        return {
+            "job_id": self.job_id,
+            "name": self.name,
+            "key": self.key,
+            "trigger": self.trigger,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "duration_seconds": duration,
+            "result": self.result if isinstance(self.result, (dict, list, str, int, float, bool, type(None))) else str(self.result),
+            "error": self.error,
+        }
+
+
+class JobScheduler:
+    """Registry of jobs plus the pool they run on"""
+
+    def __init__(self, max_workers: int = SCHEDULER_WORKERS, history_size: int = JOB_HISTORY_SIZE):
+        self.max_workers = max_workers
+        self.history_size = history_size
+        self.running = False
+        self._definitions: Dict[str, JobDefinition] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending: Dict[tuple, Job] = {}
+        self._periodic_tasks: List[asyncio.Task] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def register(self, name: str, func: Callable, interval_seconds: Optional[float] = None,
+                 run_on_start: bool = False, manual: bool = True, description: str = "") -> None:
+        self._definitions[name] = JobDefinition(
+            name, func, interval_seconds if interval_seconds and interval_seconds > 0 else None,
+            run_on_start, manual, description or (func.__doc__ or "").strip().split("\n")[0],
+        )
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        return [definition.to_dict() for definition in self._definitions.values()]
+
+    def start(self) -> None:
+        """Spin up the pool and the periodic loops; call from the running event loop"""
+        if self.running:
+            return
+        self.running = True
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="job")
+        self._slots = asyncio.Semaphore(self.max_workers)
+        for definition in self._definitions.values():
+            if definition.interval_seconds or definition.run_on_start:
+                self._periodic_tasks.append(asyncio.create_task(self._run_periodically(definition)))
+        logger.info(f"Job scheduler started with {self.max_workers} workers and {len(self._definitions)} jobs")
+
+    async def _run_periodically(self, definition: JobDefinition) -> None:
+        if not definition.run_on_start:
+            await asyncio.sleep(definition.interval_seconds)
+        while self.running:
+            self.submit(definition.name, trigger="periodic")
+            if not definition.interval_seconds:
+                return
+            await asyncio.sleep(definition.interval_seconds)
+
+    def submit(self, name: str, *args, trigger: str = "on_demand") -> Job:
+        """Queue a run; an identical run that has not started yet is returned instead of duplicated"""
+        if name not in self._definitions:
+            raise KeyError(f"Unknown job: {name}")
+        if not self.running:
+            raise RuntimeError("Job scheduler is not running")
+
+        key = repr(args) if args else ""
+        pending = self._pending.get((name, key))
+        if pending is not None:
+            return pending
+
+        job = Job(name, key, trigger, args)
+        self._pending[(name, key)] = job
+        self._jobs[job.job_id] = job
+        while len(self._jobs) > self.history_size:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in (PENDING, RUNNING):
+                break
+            del self._jobs[oldest_id]
+        job._future = asyncio.create_task(self._execute(job))
+        return job
+
+    async def _execute(self, job: Job) -> None:
+        definition = self._definitions[job.name]
+        try:
+            async with self._slots:
+                self._pending.pop((job.name, job.key), None)
+                job.status = RUNNING
+                job.started = time.time()
+                if inspect.iscoroutinefunction(definition.func):
+                    job.result = await definition.func(*job.args)
+                else:
+                    loop = asyncio.get_running_loop()
+                    job.result = await loop.run_in_executor(self._executor, functools.partial(definition.func, *job.args))
+                job.status = SUCCEEDED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            raise
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e)
+            logger.error(f"Job {job.name} ({job.job_id}) failed: {e}")
+        finally:
+            self._pending.pop((job.name, job.key), None)
+            job.finished = time.time()
+
+    def submit_or_join(self, name: str, *args, trigger: str = "on_demand") -> Job:
+        """Like `submit`, but also joins a run of the same job that has already started"""
+        key = repr(args) if args else ""
+        for job in self._jobs.values():
+            if job.name == name and job.key == key and job.status == RUNNING:
+                return job
+        return self.submit(name, *args, trigger=trigger)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def jobs(self, name: Optional[str] = None, status: Optional[str] = None) -> List[Job]:
+        """Most recent first"""
+        return [
+            job for job in reversed(self._jobs.values())
+            if (name is None or job.name == name) and (status is None or job.status == status)
+        ]
+
+    async def drain(self, timeout: float = SCHEDULER_DRAIN_SECONDS) -> None:
+        """Stop scheduling, let queued and running jobs finish (up to `timeout`), then cancel the rest"""
+        if not self.running:
+            return
+        self.running = False
+        for task in self._periodic_tasks:
+            task.cancel()
+        self._periodic_tasks.clear()
+
+        outstanding = [job._future for job in self._jobs.values() if job._future and not job._future.done()]
+        if outstanding:
+            logger.info(f"Draining {len(outstanding)} jobs (timeout {timeout}s)...")
+            done, not_done = await asyncio.wait(outstanding, timeout=timeout)
+            for task in not_done:
+                task.cancel()
+            if not_done:
+                logger.warning(f"{len(not_done)} jobs did not finish before shutdown and were cancelled")
+                await asyncio.gather(*not_done, return_exceptions=True)
+
+        # Threads of cancelled blocking jobs are left to finish on their own
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        logger.info("Job scheduler stopped")
+
+
+scheduler = JobScheduler()
+
+
+def scheduled_job(name: str, interval_seconds: Optional[float] = None, run_on_start: bool = False,
+                  manual: bool = True, description: str = ""):
+    """Register a function with the shared scheduler. Usable as a decorator."""
+    def decorator(func: Callable) -> Callable:
+        scheduler.register(name, func, interval_seconds, run_on_start, manual, description)
+        return func
+    return decorator
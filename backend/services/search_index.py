@@ -0,0 +1,225 @@
+"""In-memory faceted review search.
+
+Every review gets a dense slot number in timestamp order. Each term and facet
+value maps to a bitmap of slots, stored as a Python int, so combining filters
+is a handful of C-level AND/OR operations and facet counts are `bit_count()`
+calls. Newest-first pagination walks the highest set bits, with the last slot
+returned used as a keyset cursor.
+"""
+import bisect
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+FACETS = ("rating", "sentiment", "keyword", "aspect")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall((text or "").lower())
+
+
+def parse_timestamp(value: Optional[str]) -> float:
+    if not value:
+        return 0.0
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return 0.0
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _bitmap_from_slots(slots: Sequence[int], size: int) -> int:
+    """Build a bitmap in one go (OR-ing bit by bit would be quadratic)"""
+    buffer = bytearray((size + 7) // 8)
+    for slot in slots:
+        buffer[slot >> 3] |= 1 << (slot & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _range_mask(lo: int, hi: int) -> int:
+    """Bits lo..hi-1 set"""
+    if hi <= lo:
+        return 0
+    return ((1 << hi) - 1) ^ ((1 << lo) - 1)
+
+
+class ReviewSearchIndex:
+    """Inverted index plus facet bitmaps, maintained incrementally"""
+
+    def __init__(self):
+        self.ready = False
+        self._docs: List[tuple] = []
+        self._timestamps: List[float] = []
+        self._time_ordered = True
+        self._slots_by_id: Dict[int, int] = {}
+        self._terms: Dict[str, int] = {}
+        self._facets: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        # Slots of deleted reviews; masked out of every search instead of rewriting each bitmap
+        self._removed = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs) - self._removed.bit_count()
+
+    def __contains__(self, review_id) -> bool:
+        return review_id in self._slots_by_id
+
+    @staticmethod
+    def _fields(review: Dict[str, Any], analysis: Dict[str, Any]) -> Dict[str, List[str]]:
+        return {
+            "rating": [str(review.get("rating"))] if review.get("rating") is not None else [],
+            "sentiment": [analysis["sentiment"]],
+            "keyword": list(analysis["keywords"]),
+            "aspect": list(analysis["aspects"]),
+        }
+
+    def _store(self, review: Dict[str, Any], analysis: Dict[str, Any]) -> int:
+        slot = len(self._docs)
+        timestamp = parse_timestamp(review.get("timestamp"))
+        if self._timestamps and timestamp < self._timestamps[-1]:
+            self._time_ordered = False
+        self._docs.append((
+            review.get("id"),
+            review.get("review_text", ""),
+            review.get("rating"),
+            review.get("timestamp"),
+            analysis["sentiment"],
+        ))
+        self._timestamps.append(timestamp)
+        if review.get("id") is not None:
+            self._slots_by_id[review["id"]] = slot
+        return slot
+
+    def build(self, items: Iterable[tuple]) -> None:
+        """Bulk-load (review, analysis) pairs; pass them oldest first"""
+        term_slots: Dict[str, List[int]] = {}
+        facet_slots: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+
+        with self._lock:
+            for review, analysis in items:
+                if review.get("id") in self._slots_by_id:
+                    continue
+                slot = self._store(review, analysis)
+                for term in set(tokenize(review.get("review_text", ""))):
+                    term_slots.setdefault(term, []).append(slot)
+                for facet, values in self._fields(review, analysis).items():
+                    for value in values:
+                        facet_slots[facet].setdefault(value, []).append(slot)
+
+            size = len(self._docs)
+            for term, slots in term_slots.items():
+                self._terms[term] = self._terms.get(term, 0) | _bitmap_from_slots(slots, size)
+            for facet, values in facet_slots.items():
+                bitmaps = self._facets[facet]
+                for value, slots in values.items():
+                    bitmaps[value] = bitmaps.get(value, 0) | _bitmap_from_slots(slots, size)
+            self.ready = True
+
+    def add(self, review: Dict[str, Any], analysis: Dict[str, Any]) -> None:
+        """Index one new review"""
+        with self._lock:
+            if review.get("id") in self._slots_by_id:
+                return
+            slot = self._store(review, analysis)
+            bit = 1 << slot
+            for term in set(tokenize(review.get("review_text", ""))):
+                self._terms[term] = self._terms.get(term, 0) | bit
+            for facet, values in self._fields(review, analysis).items():
+                bitmaps = self._facets[facet]
+                for value in values:
+                    bitmaps[value] = bitmaps.get(value, 0) | bit
+
+    def remove(self, review_ids: Iterable[int]) -> None:
+        """Hide deleted reviews from results and facet counts"""
+        with self._lock:
+            for review_id in review_ids:
+                slot = self._slots_by_id.get(review_id)
+                if slot is not None:
+                    self._removed |= 1 << slot
+
+    def _date_mask(self, date_from: Optional[float], date_to: Optional[float]) -> int:
+        size = len(self._docs)
+        lo_ts = date_from if date_from is not None else float("-inf")
+        hi_ts = date_to if date_to is not None else float("inf")
+        if self._time_ordered:
+            lo = bisect.bisect_left(self._timestamps, lo_ts)
+            hi = bisect.bisect_right(self._timestamps, hi_ts)
+            return _range_mask(lo, hi)
+        slots = [slot for slot, ts in enumerate(self._timestamps) if lo_ts <= ts <= hi_ts]
+        return _bitmap_from_slots(slots, size)
+
+    def search(
+        self,
+        text: str = "",
+        filters: Optional[Dict[str, List[str]]] = None,
+        date_from: Optional[float] = None,
+        date_to: Optional[float] = None,
+        limit: int = 20,
+        cursor: Optional[int] = None,
+        facet_limit: int = 20,
+    ) -> Dict[str, Any]:
+        """AND of all terms and facet groups (values within a group are OR-ed)"""
+        filters = {facet: values for facet, values in (filters or {}).items() if values}
+
+        with self._lock:
+            size = len(self._docs)
+            base = ((1 << size) - 1) & ~self._removed
+            for term in set(tokenize(text)):
+                base &= self._terms.get(term, 0)
+            if date_from is not None or date_to is not None:
+                base &= self._date_mask(date_from, date_to)
+
+            group_masks = {}
+            for facet, values in filters.items():
+                bitmaps = self._facets.get(facet, {})
+                mask = 0
+                for value in values:
+                    mask |= bitmaps.get(value, 0)
+                group_masks[facet] = mask
+
+            result = base
+            for mask in group_masks.values():
+                result &= mask
+
+            # Disjunctive facet counts: each facet ignores its own filter
+            facets = {}
+            for facet in FACETS:
+                scope = base
+                for other, mask in group_masks.items():
+                    if other != facet:
+                        scope &= mask
+                counts = {
+                    value: (scope & bitmap).bit_count()
+                    for value, bitmap in self._facets[facet].items()
+                }
+                ranked = sorted(((v, c) for v, c in counts.items() if c), key=lambda item: item[1], reverse=True)
+                facets[facet] = dict(ranked[:facet_limit])
+
+            total = result.bit_count()
+            if cursor is not None:
+                result &= (1 << max(cursor, 0)) - 1
+
+            hits = []
+            remaining = result
+            while remaining and len(hits) < limit:
+                slot = remaining.bit_length() - 1
+                remaining ^= 1 << slot
+                review_id, review_text, rating, timestamp, sentiment = self._docs[slot]
+                hits.append({
+                    "id": review_id,
+                    "review_text": review_text,
+                    "rating": rating,
+                    "timestamp": timestamp,
+                    "sentiment": sentiment,
+                    "_slot": slot,
+                })
+
+        next_cursor = hits[-1]["_slot"] if hits and remaining else None
+        for hit in hits:
+            del hit["_slot"]
+        return {"results": hits, "total": total, "next_cursor": next_cursor, "facets": facets}
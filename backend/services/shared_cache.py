@@ -0,0 +1,355 @@
+"""Cache tier shared by every worker process.
+
+With several uvicorn workers each process would otherwise compute and cache
+the same aggregates and LLM answers on its own. `shared_cache` stores JSON
+values under string keys in one of three backends, picked by
+SHARED_CACHE_BACKEND:
+
+* ``local``  - in-process dict; the default and fine for a single worker
+* ``sqlite`` - a SQLite file in WAL mode (SHARED_CACHE_PATH) shared by all
+  workers on the host
+* ``redis``  - a Redis-compatible server (REDIS_URL), needs the `redis` package
+
+Invalidation works by generations: cache keys embed a counter
+(`generation("reviews")`) and writers `bump()` it, so stale entries are never
+read again and simply expire. `bump` also publishes an event that other
+workers receive through `subscribe`, so they can drop their in-process state
+(snapshots, answer caches) too.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from services.responses import dumps
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_BACKEND = os.getenv("SHARED_CACHE_BACKEND", "local").lower()
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "shared_cache.db"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+SHARED_CACHE_POLL_SECONDS = float(os.getenv("SHARED_CACHE_POLL_SECONDS", "0.5"))
+DEFAULT_TTL_SECONDS = 300
+# Events older than this are pruned from the SQLite event log
+EVENT_RETENTION_SECONDS = 3600
+KEY_PREFIX = "smartcafe:"
+
+EventHandler = Callable[[str, Dict[str, Any]], None]
+
+
+class SharedCache(ABC):
+    """Interface every backend implements"""
+
+    name = "base"
+
+    def __init__(self):
+        # Identifies this process, so it can ignore the events it published itself
+        self.origin = uuid.uuid4().hex
+        self._handlers: Dict[str, List[EventHandler]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # -- values ---------------------------------------------------------------
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str) -> int:
+        ...
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: float = DEFAULT_TTL_SECONDS):
+        """(value, hit) - computes and stores on a miss"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value, True
+        self.misses += 1
+        value = compute()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value, False
+
+    async def get_or_compute_async(self, key: str, compute: Callable[[], Awaitable[Any]],
+                                   ttl: float = DEFAULT_TTL_SECONDS,
+                                   cacheable: Callable[[Any], bool] = lambda value: True):
+        """`get_or_compute` for a coroutine; cache I/O runs in worker threads"""
+        value = await asyncio.to_thread(self.get, key)
+        if value is not None:
+            self.hits += 1
+            return value, True
+        self.misses += 1
+        value = await compute()
+        if value is not None and cacheable(value):
+            await asyncio.to_thread(self.set, key, value, ttl)
+        return value, False
+
+    # -- generations and events -----------------------------------------------
+
+    def generation(self, namespace: str) -> int:
+        value = self.get(f"generation:{namespace}")
+        return int(value) if value is not None else 0
+
+    def bump(self, namespace: str, message: Optional[Dict[str, Any]] = None) -> int:
+        """Invalidate every key built on `namespace` and tell the other workers"""
+        value = self.incr(f"generation:{namespace}")
+        self.publish(namespace, dict(message or {}, generation=value))
+        return value
+
+    def subscribe(self, channel: str, handler: EventHandler) -> None:
+        """Call `handler(channel, message)` for events published by other workers"""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    @abstractmethod
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        ...
+
+    def _dispatch(self, channel: str, message: Dict[str, Any], origin: Optional[str]) -> None:
+        if origin == self.origin:
+            return
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(channel, message)
+            except Exception as e:
+                logger.error(f"Shared cache handler for {channel} failed: {e}")
+
+    def start(self) -> None:
+        """Begin receiving other workers' events"""
+
+    def close(self) -> None:
+        """Stop receiving events and release connections"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "hits": self.hits, "misses": self.misses}
+
+
+class LocalCache(SharedCache):
+    """Single-process fallback: a dict with expiry times"""
+
+    name = "local"
+
+    def __init__(self):
+        super().__init__()
+        self._values: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._values.get(key)
+        if entry is None:
+            return None
+        value, expires = entry
+        if expires and expires < time.time():
+            self._values.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: str, value: Any, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        with self._lock:
+            # Drop expired entries now and then so abandoned generations do not pile up
+            if len(self._values) > 1024:
+                now = time.time()
+                self._values = {k: v for k, v in self._values.items() if not v[1] or v[1] >= now}
+            self._values[key] = (value, time.time() + ttl if ttl else 0)
+
+    def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            value = int((self._values.get(key) or (0, 0))[0]) + 1
+            self._values[key] = (value, 0)
+            return value
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        # No other workers to tell
+        return None
+
+
+class SQLiteCache(SharedCache):
+    """SQLite (WAL) file shared by the workers on one host; events are a polled log table"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str = SHARED_CACHE_PATH):
+        super().__init__()
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._poller: Optional[threading.Thread] = None
+        db = self._db()
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, message TEXT NOT NULL, origin TEXT, created REAL NOT NULL)"
+        )
+        db.commit()
+        row = db.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()
+        # Only events published after this worker started are relevant
+        self._last_event = row[0]
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections must not be shared across threads"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._db().execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        if expires and expires < time.time():
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        self._db().execute(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, dumps(value).decode("utf-8"), time.time() + ttl if ttl else 0),
+        )
+
+    def delete(self, key: str) -> None:
+        self._db().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def incr(self, key: str) -> int:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT value FROM cache WHERE key = ?", (key,)).fetchone()
+            value = int(json.loads(row[0])) + 1 if row else 1
+            db.execute("INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, 0)", (key, str(value)))
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return value
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._db().execute(
+            "INSERT INTO events (channel, message, origin, created) VALUES (?, ?, ?, ?)",
+            (channel, dumps(message).decode("utf-8"), self.origin, time.time()),
+        )
+
+    def _poll(self) -> None:
+        last_prune = 0.0
+        while not self._stop.wait(SHARED_CACHE_POLL_SECONDS):
+            try:
+                db = self._db()
+                rows = db.execute(
+                    "SELECT id, channel, message, origin FROM events WHERE id > ? ORDER BY id", (self._last_event,)
+                ).fetchall()
+                for event_id, channel, message, origin in rows:
+                    self._last_event = event_id
+                    self._dispatch(channel, json.loads(message), origin)
+
+                now = time.time()
+                if now - last_prune > 60:
+                    last_prune = now
+                    db.execute("DELETE FROM events WHERE created < ?", (now - EVENT_RETENTION_SECONDS,))
+                    db.execute("DELETE FROM cache WHERE expires > 0 AND expires < ?", (now,))
+            except Exception as e:
+                logger.error(f"Shared cache event poll failed: {e}")
+
+    def start(self) -> None:
+        if self._poller is None:
+            self._stop.clear()
+            self._poller = threading.Thread(target=self._poll, name="shared-cache-events", daemon=True)
+            self._poller.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join(timeout=2)
+            self._poller = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats["path"] = self.path
+        stats["entries"] = self._db().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        return stats
+
+
+class RedisCache(SharedCache):
+    """Redis-compatible server; events use native pub/sub"""
+
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL):
+        super().__init__()
+        if redis is None:
+            raise RuntimeError("SHARED_CACHE_BACKEND=redis requires the 'redis' package")
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._listener: Optional[threading.Thread] = None
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._client.get(KEY_PREFIX + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        # Milliseconds, so sub-second TTLs do not truncate to "no expiry"
+        self._client.set(KEY_PREFIX + key, dumps(value), px=max(1, int(ttl * 1000)) if ttl else None)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(KEY_PREFIX + key)
+
+    def incr(self, key: str) -> int:
+        return int(self._client.incr(KEY_PREFIX + key))
+
+    def publish(self, channel: str, message: Dict[str, Any]) -> None:
+        self._client.publish(KEY_PREFIX + channel, dumps({"origin": self.origin, "message": message}))
+
+    def _on_message(self, event) -> None:
+        channel = event["channel"].decode("utf-8")[len(KEY_PREFIX):]
+        payload = json.loads(event["data"])
+        self._dispatch(channel, payload["message"], payload.get("origin"))
+
+    def start(self) -> None:
+        if self._listener is None and self._handlers:
+            self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(**{KEY_PREFIX + channel: self._on_message for channel in self._handlers})
+            self._listener = self._pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+        if self._pubsub is not None:
+            self._pubsub.close()
+            self._pubsub = None
+
+
+def create_shared_cache(backend: str = SHARED_CACHE_BACKEND) -> SharedCache:
+    if backend == "redis":
+        return RedisCache()
+    if backend == "sqlite":
+        return SQLiteCache()
+    return LocalCache()
+
+
+shared_cache = create_shared_cache()
@@ -0,0 +1,209 @@
+"""Pluggable object storage for uploaded files.
+
+`get_storage(bucket)` returns the configured backend for a bucket:
+
+- STORAGE_BACKEND=supabase (default): Supabase Storage, as before.
+- STORAGE_BACKEND=local: files under LOCAL_STORAGE_ROOT/<bucket>/, written by
+  streaming copy and read through mmap, so analytics and tests can work on
+  uploads without a network round trip.
+
+All methods are blocking; call them via `asyncio.to_thread` from handlers.
+"""
+import io
+import mmap
+import os
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, List, Optional
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+LOCAL_STORAGE_ROOT = os.getenv("LOCAL_STORAGE_ROOT", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage"))
+LOCAL_STORAGE_PUBLIC_URL = os.getenv("LOCAL_STORAGE_PUBLIC_URL", "/files/content")
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Interface shared by every storage backend"""
+
+    def __init__(self, bucket: str):
+        self.bucket = bucket
+
+    @abstractmethod
+    def upload(self, path: str, data: bytes, content_type: str = "text/csv") -> None:
+        ...
+
+    def upload_fileobj(self, path: str, fileobj: BinaryIO, content_type: str = "text/csv") -> None:
+        """Store a file-like object; backends that can stream override this"""
+        self.upload(path, fileobj.read(), content_type)
+
+    @abstractmethod
+    def remove(self, paths: List[str]) -> None:
+        ...
+
+    @abstractmethod
+    def public_url(self, path: str) -> str:
+        ...
+
+    @abstractmethod
+    def read(self, path: str) -> bytes:
+        ...
+
+    def read_range(self, path: str, start: int, end: Optional[int] = None) -> bytes:
+        """Bytes [start, end) of an object (end=None reads to the end)"""
+        data = self.read(path)
+        return data[start:end]
+
+    def size(self, path: str) -> int:
+        return len(self.read(path))
+
+    def open_read(self, path: str) -> BinaryIO:
+        """Binary file object for sequential reads"""
+        return io.BytesIO(self.read(path))
+
+    @contextmanager
+    def open_mmap(self, path: str) -> Iterator[memoryview]:
+        """Read-only buffer over the object; zero-copy where the backend allows it"""
+        yield memoryview(self.read(path))
+
+
+class SupabaseStorage(StorageBackend):
+    """Supabase Storage bucket"""
+
+    def __init__(self, bucket: str):
+        super().__init__(bucket)
+        from supabase_client import supabase
+        self._bucket = supabase.storage.from_(bucket)
+
+    def upload(self, path: str, data: bytes, content_type: str = "text/csv") -> None:
+        self._bucket.upload(
+            path=path,
+            file=data,
+            file_options={
+                "content-type": content_type,
+                "upsert": False
+            }
+        )
+
+    def remove(self, paths: List[str]) -> None:
+        self._bucket.remove(paths)
+
+    def public_url(self, path: str) -> str:
+        return self._bucket.get_public_url(path)
+
+    def read(self, path: str) -> bytes:
+        return self._bucket.download(path)
+
+
+class LocalStorage(StorageBackend):
+    """Directory on local disk laid out like the bucket"""
+
+    def __init__(self, bucket: str, root: str = LOCAL_STORAGE_ROOT):
+        super().__init__(bucket)
+        self.root = os.path.realpath(os.path.join(root, bucket))
+        os.makedirs(self.root, exist_ok=True)
+
+    def _resolve(self, path: str) -> str:
+        full_path = os.path.realpath(os.path.join(self.root, path.lstrip("/")))
+        if os.path.commonpath([full_path, self.root]) != self.root:
+            raise ValueError(f"Path escapes storage root: {path}")
+        return full_path
+
+    def upload(self, path: str, data: bytes, content_type: str = "text/csv") -> None:
+        self.upload_fileobj(path, _BytesReader(data), content_type)
+
+    def upload_fileobj(self, path: str, fileobj: BinaryIO, content_type: str = "text/csv") -> None:
+        full_path = self._resolve(path)
+        if os.path.exists(full_path):
+            raise FileExistsError(f"Object already exists: {path}")
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+
+        # Stream into a temp file and rename so readers never see partial objects
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                shutil.copyfileobj(fileobj, out, COPY_CHUNK_SIZE)
+            os.replace(tmp_path, full_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def remove(self, paths: List[str]) -> None:
+        for path in paths:
+            try:
+                os.unlink(self._resolve(path))
+            except FileNotFoundError:
+                pass
+
+    def public_url(self, path: str) -> str:
+        return f"{LOCAL_STORAGE_PUBLIC_URL}/{self.bucket}/{path.lstrip('/')}"
+
+    def local_path(self, path: str) -> str:
+        return self._resolve(path)
+
+    def read(self, path: str) -> bytes:
+        with open(self._resolve(path), "rb") as f:
+            return f.read()
+
+    def read_range(self, path: str, start: int, end: Optional[int] = None) -> bytes:
+        with open(self._resolve(path), "rb") as f:
+            f.seek(start)
+            return f.read(-1 if end is None else max(end - start, 0))
+
+    def size(self, path: str) -> int:
+        return os.path.getsize(self._resolve(path))
+
+    def open_read(self, path: str) -> BinaryIO:
+        return open(self._resolve(path), "rb")
+
+    @contextmanager
+    def open_mmap(self, path: str) -> Iterator[memoryview]:
+        with open(self._resolve(path), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+                mapped.close()
+
+
+class _BytesReader:
+    """Minimal file-like wrapper so byte uploads share the streaming path"""
+
+    def __init__(self, data: bytes):
+        self._view = memoryview(data)
+        self._pos = 0
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = len(self._view) - self._pos
+        chunk = self._view[self._pos:self._pos + size]
+        self._pos += len(chunk)
+        return bytes(chunk)
+
+
+_backends: Dict[str, StorageBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_storage(bucket: str = "csv-uploads") -> StorageBackend:
+    """Configured storage backend for a bucket (created once per process)"""
+    with _backends_lock:
+        backend = _backends.get(bucket)
+        if backend is None:
+            if STORAGE_BACKEND == "local":
+                backend = LocalStorage(bucket)
+            elif STORAGE_BACKEND == "supabase":
+                backend = SupabaseStorage(bucket)
+            else:
+                raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND}")
+            _backends[bucket] = backend
+        return backend
@@ -0,0 +1,192 @@
+"""Incremental topic clustering of review texts.
+
+Reviews become hashed TF-IDF vectors (unigrams + bigrams folded into a fixed
+number of buckets) and are clustered with an online, spherical variant of
+mini-batch k-means. Each new batch only touches the centres it is assigned to,
+so the model keeps absorbing reviews without refitting. A review that is far
+from every existing centre opens a new topic (up to MAX_TOPICS), which is how
+new themes such as a new menu item or parking complaints show up.
+"""
+import math
+import re
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+N_FEATURES = 1 << 14
+MAX_TOPICS = 12
+# Cosine similarity below which a review starts a new topic
+NEW_TOPIC_THRESHOLD = 0.12
+# Floor on the centre learning rate so old topics keep tracking drift
+MIN_LEARNING_RATE = 0.02
+TOP_TERMS = 6
+
+_TOKEN_RE = re.compile(r"[a-z][a-z']+")
+STOPWORDS = {
+    "a", "about", "after", "again", "all", "also", "am", "an", "and", "any", "are", "as", "at",
+    "be", "because", "been", "but", "by", "can", "could", "did", "do", "does", "for", "from",
+    "get", "got", "had", "has", "have", "he", "her", "here", "him", "his", "how", "i", "if", "in",
+    "into", "is", "it", "its", "it's", "just", "me", "more", "my", "of", "on", "one", "or", "our",
+    "out", "so", "some", "than", "that", "the", "their", "them", "then", "there", "they", "this",
+    "to", "too", "us", "very", "was", "we", "were", "what", "when", "which", "while", "who",
+    "will", "with", "would", "you", "your", "place", "cafe", "really", "im", "i'm",
+}
+
+
+def terms(text: str) -> List[str]:
+    """Content words and their bigrams"""
+    words = [w for w in _TOKEN_RE.findall((text or "").lower()) if w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _bucket(term: str) -> int:
+    return zlib.crc32(term.encode()) % N_FEATURES
+
+
+class _Centre:
+    """Sparse centre stored as scale * weights, so decaying it is O(1)"""
+
+    __slots__ = ("scale", "weights", "norm2", "count")
+
+    def __init__(self, vector: Dict[int, float]):
+        self.scale = 1.0
+        self.weights = dict(vector)
+        self.norm2 = sum(v * v for v in vector.values())
+        self.count = 1
+
+    def cosine(self, vector: Dict[int, float]) -> float:
+        if not self.norm2:
+            return 0.0
+        weights = self.weights
+        dot = sum(weights.get(k, 0.0) * v for k, v in vector.items())
+        return dot / math.sqrt(self.norm2)
+
+    def absorb(self, vector: Dict[int, float]) -> None:
+        self.count += 1
+        rate = max(1.0 / self.count, MIN_LEARNING_RATE)
+
+        # (1 - rate) * centre, applied lazily through the scale factor
+        self.scale *= 1.0 - rate
+        if self.scale < 1e-6:
+            self._renormalize()
+
+        weights, step = self.weights, rate / self.scale
+        for k, v in vector.items():
+            old = weights.get(k, 0.0)
+            new = old + step * v
+            weights[k] = new
+            self.norm2 += new * new - old * old
+
+    def _renormalize(self) -> None:
+        scale = self.scale
+        self.weights = {k: v * scale for k, v in self.weights.items() if abs(v * scale) > 1e-9}
+        self.norm2 = sum(v * v for v in self.weights.values())
+        self.scale = 1.0
+
+    def top_buckets(self, n: int) -> List[Tuple[int, float]]:
+        top = sorted(self.weights.items(), key=lambda item: item[1], reverse=True)[:n]
+        return [(k, v * self.scale) for k, v in top]
+
+
+class TopicModel:
+    """Online hashed TF-IDF + spherical mini-batch k-means"""
+
+    def __init__(self, max_topics: int = MAX_TOPICS):
+        self.max_topics = max_topics
+        self.documents = 0
+        self.ready = False
+        self._doc_freq: Counter = Counter()
+        self._term_freq: Counter = Counter()
+        self._bucket_terms: Dict[int, str] = {}
+        self._centres: List[_Centre] = []
+        self._assignments: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def _vectorize(self, text: str) -> Dict[int, float]:
+        """Update document frequencies with `text` and return its unit TF-IDF vector"""
+        counts = Counter(terms(text))
+        if not counts:
+            return {}
+
+        self.documents += 1
+        buckets: Counter = Counter()
+        for term, count in counts.items():
+            bucket = _bucket(term)
+            buckets[bucket] += count
+            self._term_freq[term] += 1
+            # Label each bucket with its most common term
+            current = self._bucket_terms.get(bucket)
+            if current is None or self._term_freq[term] > self._term_freq[current]:
+                self._bucket_terms[bucket] = term
+
+        for bucket in buckets:
+            self._doc_freq[bucket] += 1
+
+        vector = {
+            bucket: (1 + math.log(count)) * (math.log((1 + self.documents) / (1 + self._doc_freq[bucket])) + 1)
+            for bucket, count in buckets.items()
+        }
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {k: v / norm for k, v in vector.items()}
+
+    def partial_fit(self, reviews: Iterable[Dict]) -> None:
+        """Absorb a batch of reviews (dicts with `id` and `review_text`); ids seen before are skipped"""
+        with self._lock:
+            for review in reviews:
+                review_id = review.get("id")
+                if review_id is not None and review_id in self._assignments:
+                    # Seeding and the insert listener can both deliver the same review
+                    continue
+                vector = self._vectorize(review.get("review_text", ""))
+                if not vector:
+                    continue
+
+                best, best_score = None, -1.0
+                for index, centre in enumerate(self._centres):
+                    score = centre.cosine(vector)
+                    if score > best_score:
+                        best, best_score = index, score
+
+                if best is None or (best_score < NEW_TOPIC_THRESHOLD and len(self._centres) < self.max_topics):
+                    self._centres.append(_Centre(vector))
+                    best = len(self._centres) - 1
+                else:
+                    self._centres[best].absorb(vector)
+
+                if review_id is not None:
+                    self._assignments[review_id] = best
+
+    def remove(self, review_ids: Iterable[int]) -> None:
+        """Drop deleted reviews from the member counts.
+
+        Centres keep what they learned from them; with the learning-rate floor
+        that influence fades as new reviews arrive.
+        """
+        with self._lock:
+            for review_id in review_ids:
+                if self._assignments.pop(review_id, None) is not None:
+                    self.documents -= 1
+
+    def topics(self, top_terms: int = TOP_TERMS) -> List[Dict]:
+        """Clusters ordered by size, with their highest-weighted terms"""
+        with self._lock:
+            members = Counter(self._assignments.values())
+            result = []
+            for index, centre in enumerate(self._centres):
+                top = [
+                    {"term": self._bucket_terms.get(bucket, f"#{bucket}"), "weight": round(weight, 4)}
+                    for bucket, weight in centre.top_buckets(top_terms)
+                    if weight > 0
+                ]
+                result.append({
+                    "id": index,
+                    "label": ", ".join(t["term"] for t in top[:3]),
+                    "top_terms": top,
+                    "member_count": members.get(index, 0),
+                })
+            result.sort(key=lambda topic: topic["member_count"], reverse=True)
+            return result
+
+    def topic_of(self, review_id: int) -> Optional[int]:
+        return self._assignments.get(review_id)
@@ -0,0 +1,120 @@
+"""Shared fixtures: import path, dummy Supabase settings and an in-memory Supabase fake."""
+import datetime
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# supabase_client refuses to import without these; nothing is ever sent to them
+os.environ.setdefault("SUPABASE_URL", "https://example.supabase.co")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.test")
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """The subset of the PostgREST query builder the backend uses"""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = []
+        self.operation = "select"
+        self.payload = None
+        self.ordering = None
+        self.row_range = None
+        self.row_limit = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def insert(self, payload):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def delete(self):
+        self.operation = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def gt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) > value)
+        return self
+
+    def lt(self, column, value):
+        self.filters.append(lambda row: row.get(column) is not None and row.get(column) < value)
+        return self
+
+    def like(self, column, pattern):
+        prefix = pattern.rstrip("%")
+        self.filters.append(lambda row: str(row.get(column, "")).startswith(prefix))
+        return self
+
+    def in_(self, column, values):
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self.ordering = (column, desc)
+        return self
+
+    def range(self, start, end):
+        self.row_range = (start, end)
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        self.db.queries.append(self)
+        if self.operation == "insert":
+            inserted = []
+            for item in self.payload if isinstance(self.payload, list) else [self.payload]:
+                row = dict(item)
+                row.setdefault("id", max([r["id"] for r in rows] + [0]) + 1)
+                row.setdefault("timestamp", datetime.datetime.now(datetime.timezone.utc).isoformat())
+                rows.append(row)
+                inserted.append(dict(row))
+            return FakeResponse(inserted)
+        matched = [row for row in rows if all(check(row) for check in self.filters)]
+        if self.operation == "delete":
+            self.db.tables[self.table] = [row for row in rows if row not in matched]
+            return FakeResponse(matched)
+        if self.ordering:
+            column, desc = self.ordering
+            matched.sort(key=lambda row: row.get(column), reverse=desc)
+        if self.row_range:
+            matched = matched[self.row_range[0]:self.row_range[1] + 1]
+        if self.row_limit is not None:
+            matched = matched[:self.row_limit]
+        # PostgREST's max-rows setting silently truncates every response
+        matched = matched[:self.db.max_rows]
+        return FakeResponse([dict(row) for row in matched], len(matched))
+
+
+class FakeSupabase:
+    def __init__(self, max_rows=1000):
+        self.tables = {}
+        self.queries = []
+        self.max_rows = max_rows
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def fake_supabase():
+    return FakeSupabase()
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import pytest
+
+from services import admission
+from services.admission import RequestGuardMiddleware, RoutePolicy
+from services.deadlines import run_blocking
+
+release = threading.Event()
+
+
+async def slow_app(scope, receive, send):
+    await receive()
+    await run_blocking(release.wait)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+@pytest.fixture
+def guard(monkeypatch):
+    monkeypatch.setitem(admission.ROUTE_POLICIES, ("GET", "/slow"),
+                        RoutePolicy(deadline_seconds=0.1, max_in_flight=1, max_queue=0))
+    monkeypatch.setattr(admission, "route_gates", {})
+    release.clear()
+    yield RequestGuardMiddleware(slow_app, enabled=True)
+    release.set()
+
+
+async def call(app, headers=()):
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(10)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/slow", "headers": list(headers)}
+    await app(scope, receive, send)
+    start = next(message for message in sent if message["type"] == "http.response.start")
+    return start["status"], dict(start["headers"])
+
+
+def test_slot_is_held_until_the_abandoned_thread_finishes(guard):
+    async def scenario():
+        assert (await call(guard))[0] == 504
+        gate = admission.route_gates[("GET", "/slow")]
+        # The handler timed out but its thread is still running: newcomers are shed
+        assert gate.in_flight == 1
+        status, headers = await call(guard)
+        assert status == 503 and b"retry-after" in headers
+
+        release.set()
+        for _ in range(100):
+            if not gate.in_flight:
+                break
+            await asyncio.sleep(0.01)
+        assert gate.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_client_timeout_header_shortens_the_deadline(guard, monkeypatch):
+    monkeypatch.setitem(admission.ROUTE_POLICIES, ("GET", "/slow"),
+                        RoutePolicy(deadline_seconds=30, max_in_flight=1, max_queue=0))
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        status, _ = await call(guard, headers=[(b"x-request-timeout", b"0.1")])
+        elapsed = loop.time() - started
+        # asyncio.run waits for the abandoned thread on the way out
+        release.set()
+        return status, elapsed
+
+    status, elapsed = asyncio.run(scenario())
+    assert status == 504 and elapsed < 5
+
+
+def test_cors_allows_the_timeout_header():
+    from fastapi.testclient import TestClient
+    import main
+
+    response = TestClient(main.app).options("/dashboard", headers={
+        "Origin": "http://localhost:5173",
+        "Access-Control-Request-Method": "GET",
+        "Access-Control-Request-Headers": "X-Request-Timeout",
+    })
+    assert response.status_code == 200
+    assert "x-request-timeout" in response.headers["access-control-allow-headers"].lower()
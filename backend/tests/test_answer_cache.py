@@ -0,0 +1,58 @@
+import pytest
+
+from services.answer_cache import AnswerCache, normalize_question
+
+
+@pytest.fixture
+def cache():
+    cache = AnswerCache()
+    cache.put("What do customers love?", "SmartCafe", 1, "The cat")
+    return cache
+
+
+def test_paraphrase_hits(cache):
+    assert cache.get("what do my customers love most", "SmartCafe", 1) == "The cat"
+    assert cache.get("What do customers LOVE??", "smartcafe ", 1) == "The cat"
+
+
+def test_domain_nouns_are_not_filler(cache):
+    assert cache.get("What do customers love about the coffee?", "SmartCafe", 1) is None
+    assert cache.get("What do customers love about my coffee shop?", "SmartCafe", 1) is None
+    assert normalize_question("the coffee shop") == "coffee shop"
+
+
+def test_negation_must_match():
+    cache = AnswerCache()
+    cache.put("what should we improve", None, 1, "Speed")
+    assert cache.get("what should we not improve", None, 1) is None
+    assert cache.get("what shouldn't we improve", None, 1) is None
+    assert cache.get("what should we improve?", None, 1) == "Speed"
+
+
+def test_periods_and_numbers_must_match():
+    cache = AnswerCache()
+    cache.put("how were reviews this week", None, 1, "Good")
+    cache.put("top 3 complaints", None, 1, "Three")
+    assert cache.get("how were reviews this month", None, 1) is None
+    assert cache.get("how were reviews last week", None, 1) is None
+    assert cache.get("how were the reviews this week?", None, 1) == "Good"
+    assert cache.get("top 5 complaints", None, 1) is None
+
+
+def test_scope_and_version(cache):
+    assert cache.get("What do customers love?", "Other Cafe", 1) is None
+    assert cache.get("What do customers love?", "SmartCafe", 2) is None
+    cache.invalidate(current_version=2)
+    assert len(cache) == 0
+
+
+def test_ttl_and_lru():
+    cache = AnswerCache(max_entries=2, ttl_seconds=0)
+    cache.put("first question", None, 1, "a")
+    assert cache.get("first question", None, 1) is None
+
+    cache = AnswerCache(max_entries=2)
+    for question in ("alpha question", "beta question", "gamma question"):
+        cache.put(question, None, 1, question)
+    assert cache.get("alpha question", None, 1) is None
+    assert cache.get("gamma question", None, 1) == "gamma question"
@@ -0,0 +1,75 @@
+import pytest
+
+from routes import aspects
+from routes.aspects import analyze_review, aspect_sia, split_clauses
+from services import review_snapshot as snapshot_module
+from services.review_snapshot import ReviewSnapshot
+from routes.sentiment import classify_sentiment, sia
+
+REVIEWS = [
+    "Great coffee but the service was painfully slow.",
+    "The latte was AMAZING!!! Staff were friendly.",
+    "I loved the atmosphere; however the espresso was bitter.",
+    "Terrible experience, rude barista, never coming back!",
+    "The cappuccino was not bad at all, and the seating is comfortable.",
+]
+
+
+def test_cafe_lexicon_stays_out_of_the_stock_analyzer():
+    assert aspect_sia is not sia
+    assert "slow" not in sia.lexicon
+    assert classify_sentiment("The service was slow", 3) == ("neutral", 0.0)
+    assert analyze_review("The service was slow", 3)["aspects"]["service"] < 0
+
+
+@pytest.mark.parametrize("text", REVIEWS)
+def test_overall_score_matches_whole_text_vader(text):
+    analysis = analyze_review(text, 4)
+    label, compound = classify_sentiment(text, 4)
+    assert analysis["compound"] == pytest.approx(compound, abs=1e-3)
+    assert analysis["sentiment"] == label
+
+
+@pytest.mark.parametrize("text", [
+    "It was not bad. Great",
+    "Never again. Good coffee though",
+    "The coffee was NOT good. AWFUL service!!!",
+    "I don't think so. The latte was nice",
+])
+def test_negation_and_emphasis_cross_clause_boundaries(text):
+    analysis = analyze_review(text, 3)
+    assert (analysis["sentiment"], analysis["compound"]) == classify_sentiment(text, 3)
+
+
+def test_only_aspect_clauses_are_scored_separately(monkeypatch):
+    calls = []
+    original = aspect_sia.polarity_scores
+    monkeypatch.setattr(aspect_sia, "polarity_scores", lambda text: calls.append(text) or original(text))
+
+    analyze_review("Great day. The staff were friendly but the music was awful", 5)
+    assert calls == ["The staff were friendly", "the music was awful"]
+
+
+def test_clauses_split_at_sentences_and_contrasts():
+    assert split_clauses("Nice decor. Good tea But slow service, but cheap") == [
+        "Nice decor", "Good tea", "slow service", "cheap",
+    ]
+    assert split_clauses("Good tea; however slow service") == ["Good tea", "slow service"]
+
+
+def test_seeding_skips_evicted_texts(fake_supabase, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "supabase", fake_supabase)
+    fake_supabase.tables["reviews"] = [
+        {"id": i, "review_text": f"the staff were rude, visit {i}", "rating": 1, "timestamp": f"2025-01-0{i}T09:00:00+00:00"}
+        for i in range(1, 6)
+    ]
+    snapshot = ReviewSnapshot(text_cap_bytes=60)
+    monkeypatch.setattr(aspects, "review_snapshot", snapshot)
+    monkeypatch.setattr(aspects, "aspect_store", aspects.AspectStore())
+    snapshot.refresh()
+
+    aspects.seed_aspect_store()
+    evicted = snapshot.text_evicted
+    assert evicted and aspects.aspect_store.unscored == evicted
+    service = next(item for item in aspects.aspect_store.summary() if item["aspect"] == "service")
+    assert service["mentions"] == 5 - evicted and service["negative"] == 5 - evicted
@@ -0,0 +1,34 @@
+import asyncio
+import json
+
+from services.broadcaster import DROPPED, Broadcaster, next_message
+
+
+def test_every_subscriber_gets_the_same_payload():
+    broadcaster = Broadcaster()
+    first, second = broadcaster.subscribe(), broadcaster.subscribe()
+    assert broadcaster.publish({"type": "review", "id": 1}) == 2
+    payload = first.get_nowait()
+    assert payload is second.get_nowait()
+    assert json.loads(payload) == {"type": "review", "id": 1}
+
+    broadcaster.unsubscribe(second)
+    assert broadcaster.publish({"type": "review", "id": 2}) == 1
+
+
+def test_slow_subscribers_are_dropped():
+    broadcaster = Broadcaster(max_queue_size=2)
+    slow, fast = broadcaster.subscribe(), broadcaster.subscribe()
+    for i in range(2):
+        broadcaster.publish({"id": i})
+        fast.get_nowait()
+    assert broadcaster.publish({"id": 2}) == 1
+
+    assert broadcaster.subscriber_count == 1 and broadcaster.dropped_clients == 1
+    # The backlog is discarded; the client is told it was dropped
+    assert slow.get_nowait() is DROPPED and slow.empty()
+
+
+def test_idle_waits_return_a_keepalive():
+    queue = Broadcaster().subscribe()
+    assert asyncio.run(next_message(queue, timeout=0.01)) == ""
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+from pydantic import ValidationError
+
+from routes import uploadcsv
+
+
+class FakeStorage:
+    def __init__(self):
+        self.removed = []
+
+    def remove(self, paths):
+        self.removed.extend(paths)
+
+
+@pytest.fixture
+def storage(fake_supabase, monkeypatch):
+    fake_supabase.tables["uploaded_files"] = [
+        {"id": i, "storage_path": f"{'orders' if i % 2 else 'menu'}/file_{i}.csv", "cafe_name": "SmartCafe AI",
+         "upload_timestamp": "2024-01-01T00:00:00"}
+        for i in range(1, 2501)
+    ]
+    storage = FakeStorage()
+    monkeypatch.setattr(uploadcsv, "supabase", fake_supabase)
+    monkeypatch.setattr(uploadcsv, "get_storage", lambda bucket: storage)
+    monkeypatch.setattr(uploadcsv, "remove_sidecar", lambda path: None)
+    monkeypatch.setattr(uploadcsv.file_catalog, "invalidate", lambda cafe, broadcast=True: None)
+    return storage
+
+
+def test_older_than_days_must_be_positive():
+    for days in (0, -3):
+        with pytest.raises(ValidationError):
+            uploadcsv.BulkDeleteRequest(older_than_days=days)
+    assert uploadcsv.BulkDeleteRequest(older_than_days=1).older_than_days == 1
+
+
+def test_retention_prunes_past_the_select_row_cap(fake_supabase, storage):
+    summary = asyncio.run(uploadcsv.prune_old_uploads(retention_days=30))
+    assert summary["deleted"] == 1250
+    assert all(path.startswith("orders/") for path in storage.removed)
+    assert all(not row["storage_path"].startswith("orders/") for row in fake_supabase.tables["uploaded_files"])
+
+    deletes = [query for query in fake_supabase.queries if query.operation == "delete"]
+    assert len(deletes) == -(-1250 // uploadcsv.METADATA_DELETE_BATCH_SIZE)
+
+
+def test_large_id_lists_are_chunked(fake_supabase, storage):
+    summary = asyncio.run(uploadcsv.bulk_delete_files(file_ids=list(range(1, 1201))))
+    assert summary["deleted"] == 1200
+    assert len(fake_supabase.tables["uploaded_files"]) == 1300
@@ -0,0 +1,41 @@
+from services import chat_sessions
+from services.chat_sessions import ChatSessionStore
+
+
+def test_old_turns_fold_into_the_summary():
+    store = ChatSessionStore()
+    session = store.get_or_create(None, shop="north")
+    for i in range(chat_sessions.MAX_RECENT_TURNS + 2):
+        session.add_turn(i % 2 == 0, f"Message {i}. More detail that is not kept.")
+
+    messages = session.messages()
+    assert messages[0]["role"] == "system"
+    assert "Owner asked: Message 0." in messages[0]["content"]
+    assert "You answered: Message 1." in messages[0]["content"]
+    assert "More detail" not in messages[0]["content"]
+    assert len(messages) == chat_sessions.MAX_RECENT_TURNS + 1
+    assert messages[-1]["content"].startswith(f"Message {chat_sessions.MAX_RECENT_TURNS + 1}.")
+
+
+def test_summary_stays_within_its_cap():
+    session = ChatSessionStore().get_or_create("s1")
+    for i in range(200):
+        session.add_turn(True, f"Question number {i} about the espresso machine " + "x" * 100)
+    assert len(session.summary) <= chat_sessions.MAX_SUMMARY_CHARS
+    assert "Question number 191" in session.summary
+
+
+def test_evicted_sessions_reload_from_disk(tmp_path):
+    store = ChatSessionStore(max_sessions=1, db_path=str(tmp_path / "sessions.db"))
+    first = store.get_or_create("first", shop="north")
+    first.add_turn(True, "How are the reviews this week?")
+    store.save(first)
+
+    store.get_or_create("second")
+    assert len(store) == 1
+    reloaded = store.get_or_create("first")
+    assert reloaded is not first
+    assert reloaded.shop == "north" and list(reloaded.turns) == [(True, "How are the reviews this week?")]
+
+    assert store.delete("first") is True
+    assert not store.get_or_create("first").turns
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+import pytest
+
+from routes import files
+from services import columnar
+from services.storage import LocalStorage, StorageBackend
+
+CSV = (
+    "order_id,big,price,ratio,item\n"
+    "1,12,3.50,0.5,latte\n"
+    "2,99999999999999999999,4.25,inf,mocha\n"
+    "3,7,,1.5,latte\n"
+)
+
+
+class RemoteStorage(StorageBackend):
+    """In-memory stand-in for a remote bucket that counts downloads"""
+
+    def __init__(self, data: bytes):
+        super().__init__("csv-uploads")
+        self.data = data
+        self.downloads = 0
+
+    def upload(self, path, data, content_type="text/csv"):
+        self.data = data
+
+    def remove(self, paths):
+        pass
+
+    def public_url(self, path):
+        return f"memory://{path}"
+
+    def read(self, path):
+        self.downloads += 1
+        return self.data
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "COLUMNAR_CACHE_DIR", str(tmp_path / "columnar"))
+
+
+def column(stats, name):
+    return next(column for column in stats["columns"] if column["name"] == name)
+
+
+def test_remote_csv_is_downloaded_once():
+    storage = RemoteStorage(CSV.encode())
+    stats = columnar.ingest_csv(storage, "orders/1.csv")
+    assert storage.downloads == 1
+    assert stats["row_count"] == 3
+
+
+def test_out_of_range_values_degrade_the_column_type(tmp_path):
+    storage = LocalStorage("csv-uploads", root=str(tmp_path / "storage"))
+    storage.upload("orders/1.csv", CSV.encode())
+    stats = columnar.ingest_csv(storage, "orders/1.csv")
+
+    assert column(stats, "order_id")["type"] == "int"
+    # Beyond int64: kept as numbers, in a float column
+    big = column(stats, "big")
+    assert big["type"] == "float" and big["max"] == pytest.approx(1e20)
+    # "inf" is not a usable number: the column is text and its stats stay valid JSON
+    assert column(stats, "ratio")["type"] == "string"
+    json.dumps(stats, allow_nan=False)
+
+
+def test_read_rows_maps_only_the_requested_columns():
+    columnar.ingest_csv(RemoteStorage(CSV.encode()), "orders/1.csv")
+    page = columnar.read_rows("orders/1.csv", ["item", "price"], offset=1, limit=5)
+    assert page["columns"] == ["item", "price"]
+    # The missing price comes back as null rather than NaN
+    assert page["rows"] == [["mocha", 4.25], ["latte", None]]
+    assert page["has_more"] is False
+
+    with pytest.raises(ValueError):
+        columnar.read_rows("orders/1.csv", ["nope"])
+
+
+def test_rows_endpoint_pages_the_sidecar(fake_supabase, monkeypatch):
+    fake_supabase.tables["uploaded_files"] = [{"id": 1, "storage_path": "orders/1.csv"}]
+    monkeypatch.setattr(files, "supabase", fake_supabase)
+    monkeypatch.setattr(files, "get_storage", lambda bucket: RemoteStorage(CSV.encode()))
+
+    result = asyncio.run(files.get_file_rows(file_id=1, columns=["order_id"], offset=0, limit=2))
+    assert result["rows"] == [[1], [2]] and result["has_more"] is True
+
+    response = asyncio.run(files.get_file_rows(file_id=1, columns=["nope"], offset=0, limit=2))
+    assert response.status_code == 400
+    assert asyncio.run(files.get_file_rows(file_id=2, columns=None, offset=0, limit=2)).status_code == 404
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from routes import dashboard
+from services.deadlines import DeadlineExceeded, request_deadline
+from services.review_snapshot import ReviewRecord
+
+
+def records(count):
+    return [ReviewRecord(i, "great coffee and friendly staff" if i % 2 else "slow service, cold coffee", 5 if i % 2 else 2, 0.0)
+            for i in range(count, 0, -1)]
+
+
+def test_analyze_reviews_builds_every_widget():
+    result = dashboard.analyze_reviews(records(4), recent_limit=2)
+    assert result["total_reviews"] == 4
+    assert [review["id"] for review in result["recent_reviews"]] == [4, 3]
+    assert sum(result["sentiment"]["counts"].values()) == 4
+    assert result["ratings"]["distribution"]["5"] == 2
+    assert result["ratings"]["distribution"]["2"] == 2
+
+
+def test_analyze_reviews_stops_at_the_request_deadline():
+    token = request_deadline.set(time.monotonic() - 1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            dashboard.analyze_reviews(records(10))
+    finally:
+        request_deadline.reset(token)
+
+
+def test_build_dashboard_does_not_block_the_event_loop(monkeypatch):
+    def slow_analysis(reviews, recent_limit):
+        time.sleep(0.3)
+        return {"total_reviews": 0}
+
+    monkeypatch.setattr(dashboard, "fetch_all_reviews", lambda: [])
+    monkeypatch.setattr(dashboard.file_catalog, "query", lambda cafe: {"files": []})
+    monkeypatch.setattr(dashboard, "analyze_reviews", slow_analysis)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        result = await dashboard.build_dashboard("SmartCafe AI", 10, include_suggestions=False)
+        task.cancel()
+        return result, ticks
+
+    result, ticks = asyncio.run(main())
+    assert result["status"] == "success"
+    assert ticks >= 10
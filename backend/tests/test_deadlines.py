@@ -0,0 +1,62 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from services.deadlines import (
+    BlockingCalls, DeadlineExceeded, call_timeout, remaining, request_calls, request_deadline, run_blocking,
+)
+
+
+def test_call_timeout_is_capped_by_the_request():
+    assert remaining(5) == 5
+    assert call_timeout(30) == 30
+
+    token = request_deadline.set(time.monotonic() + 3)
+    try:
+        assert 2 < call_timeout(30) <= 3
+    finally:
+        request_deadline.reset(token)
+
+    token = request_deadline.set(time.monotonic() - 1)
+    try:
+        with pytest.raises(DeadlineExceeded):
+            call_timeout(30)
+    finally:
+        request_deadline.reset(token)
+
+
+def test_abandoned_threads_stay_counted_until_they_finish():
+    release = threading.Event()
+    idle = []
+
+    async def scenario():
+        calls = BlockingCalls()
+        request_calls.set(calls)
+        request_deadline.set(time.monotonic() + 0.05)
+        with pytest.raises(DeadlineExceeded):
+            await run_blocking(release.wait)
+        calls.when_idle(lambda: idle.append(True))
+        # The request gave up, the thread did not
+        assert calls.running == 1 and not idle
+
+        release.set()
+        for _ in range(100):
+            if idle:
+                break
+            await asyncio.sleep(0.01)
+        assert calls.running == 0 and idle == [True]
+
+    asyncio.run(scenario())
+
+
+def test_finished_calls_leave_nothing_running():
+    async def scenario():
+        calls = BlockingCalls()
+        request_calls.set(calls)
+        assert await run_blocking(sum, [1, 2, 3]) == 6
+        await asyncio.sleep(0)
+        return calls.running
+
+    assert asyncio.run(scenario()) == 0
@@ -0,0 +1,63 @@
+import asyncio
+
+from routes import review_dedup
+from services import review_snapshot as snapshot_module
+from services.dedup import DuplicateIndex, find_duplicate_groups
+from services.review_snapshot import review_snapshot
+
+ORIGINAL = "the coffee here is great and the staff are very friendly every morning"
+VARIANT = "the coffee here is great and the staff are very friendly every morning too"
+
+
+def test_near_duplicates_are_found():
+    index = DuplicateIndex()
+    index.add(1, ORIGINAL)
+    review_id, score = index.find_duplicate(VARIANT)
+    assert review_id == 1 and score >= index.threshold
+    assert index.find_duplicate("cold tea, rude cashier and a long wait for a table") is None
+
+
+def test_short_reviews_are_never_duplicates():
+    index = DuplicateIndex()
+    index.add(1, "Great coffee!")
+    assert index.find_duplicate("Great coffee!") is None
+
+
+def test_removed_reviews_stop_matching():
+    index = DuplicateIndex()
+    index.add(1, ORIGINAL)
+    index.add(2, VARIANT)
+    index.remove([1])
+    assert len(index) == 1
+    assert index.find_duplicate(ORIGINAL)[0] == 2
+
+    index.remove([2, 99])
+    assert len(index) == 0
+    assert index.find_duplicate(VARIANT) is None
+
+
+def test_batch_groups_keep_the_oldest_copy():
+    reviews = [{"id": 1, "review_text": ORIGINAL}, {"id": 2, "review_text": "totally different words about tea and cake"},
+               {"id": 3, "review_text": VARIANT}]
+    duplicates = find_duplicate_groups(reviews)
+    assert list(duplicates) == [3]
+    assert duplicates[3][0] == 1
+
+
+def test_dedupe_deletes_in_bounded_batches(fake_supabase, monkeypatch):
+    fake_supabase.tables["reviews"] = [
+        {"id": i, "review_text": ORIGINAL, "rating": 5, "timestamp": "2025-01-01T09:00:00+00:00"}
+        for i in range(1, 452)
+    ]
+    monkeypatch.setattr(review_dedup, "supabase", fake_supabase)
+    monkeypatch.setattr(snapshot_module, "supabase", fake_supabase)
+    monkeypatch.setattr(review_dedup, "bump_reviews", lambda message: None)
+    review_snapshot.__init__()
+
+    result = asyncio.run(review_dedup.dedupe_reviews(dry_run=False))
+
+    assert result["deleted"] == 450
+    deletes = [query for query in fake_supabase.queries if query.operation == "delete"]
+    assert len(deletes) == 3
+    assert [row["id"] for row in fake_supabase.tables["reviews"]] == [1]
+    assert len(review_snapshot) == 1
@@ -0,0 +1,22 @@
+from services.delta import apply_since, next_watermark
+
+ROWS = [
+    {"id": 1, "timestamp": "2025-01-01T09:00:00+00:00"},
+    {"id": 2, "timestamp": "2025-01-02T09:00:00+00:00"},
+    {"id": 3, "timestamp": "2025-01-03T09:00:00+00:00"},
+]
+
+
+def test_since_accepts_ids_and_timestamps(fake_supabase):
+    fake_supabase.tables["reviews"] = list(ROWS)
+    by_id = apply_since(fake_supabase.table("reviews").select("*"), " 1 ").execute().data
+    assert [row["id"] for row in by_id] == [2, 3]
+    by_time = apply_since(fake_supabase.table("reviews").select("*"), "2025-01-02T09:00:00+00:00").execute().data
+    assert [row["id"] for row in by_time] == [3]
+    assert len(apply_since(fake_supabase.table("reviews").select("*"), None).execute().data) == 3
+
+
+def test_watermark_advances_only_with_new_rows():
+    assert next_watermark(ROWS, "0") == "3"
+    assert next_watermark([{"timestamp": "2025-01-04T00:00:00Z"}], "3") == "2025-01-04T00:00:00Z"
+    assert next_watermark([], "3") == "3"
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from routes import files
+from services import file_catalog as catalog_module
+from services.file_catalog import FileCatalog
+
+
+@pytest.fixture
+def catalog(fake_supabase, monkeypatch):
+    fake_supabase.tables["uploaded_files"] = [
+        {"id": i, "filename": f"orders_{i:03}.csv", "storage_path": f"orders/{i}.csv", "file_url": "",
+         "file_size": 1000 * (i % 7), "upload_timestamp": f"2024-01-{i % 28 + 1:02}T10:00:00Z",
+         "cafe_name": "SmartCafe AI"}
+        for i in range(1, 2501)
+    ]
+    monkeypatch.setattr(catalog_module, "supabase", fake_supabase)
+    catalog = FileCatalog()
+    monkeypatch.setattr(files, "file_catalog", catalog)
+    return catalog
+
+
+def test_every_file_is_listed_without_a_limit(catalog, fake_supabase):
+    # More rows than one PostgREST response returns
+    page = catalog.query("SmartCafe AI")
+    assert len(page["files"]) == 2500 and page["total"] == 2500
+    assert page["has_more"] is False and page["next_cursor"] is None
+    assert len(fake_supabase.queries) == 3
+
+
+@pytest.mark.parametrize("sort", ["date", "size", "name"])
+def test_pages_cover_every_file_once(catalog, sort):
+    seen, cursor = [], None
+    while True:
+        page = catalog.query("SmartCafe AI", sort=sort, limit=400, cursor=cursor)
+        seen.extend(item["id"] for item in page["files"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == list(range(1, 2501))
+
+
+def test_cursor_from_another_sort_is_rejected(catalog):
+    cursor = catalog.query("SmartCafe AI", sort="name", limit=10)["next_cursor"]
+    with pytest.raises(ValueError):
+        catalog.query("SmartCafe AI", sort="date", limit=10, cursor=cursor)
+
+    response = asyncio.run(files.get_uploaded_files(
+        request=None, cafe_name="SmartCafe AI", limit=10, cursor=cursor, sort="size", order="desc",
+        date_from=None, date_to=None, min_size=None, max_size=None,
+    ))
+    assert response.status_code == 400
+    assert json.loads(response.body)["status"] == "error"
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "bnVsbA==", "WyJkYXRlIiwgImEiLCAiYiJd"])
+def test_malformed_cursor_is_rejected(catalog, cursor):
+    with pytest.raises(ValueError):
+        catalog.query("SmartCafe AI", sort="date", limit=10, cursor=cursor)
@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from services import insights
+from services.insights import InsightAggregates, generate_insights, rating_trend
+
+NOW = datetime(2025, 6, 30, 12, tzinfo=timezone.utc)
+
+
+def review(review_id, rating=4, days_ago=0):
+    return {"id": review_id, "rating": rating, "timestamp": (NOW - timedelta(days=days_ago)).isoformat()}
+
+
+def analysis(sentiment="neutral", keywords=(), aspects=None):
+    return {"sentiment": sentiment, "keywords": list(keywords), "aspects": aspects or {}}
+
+
+def names(items):
+    return [item["name"] for item in items]
+
+
+def test_aspects_need_enough_one_sided_mentions():
+    aggregates = InsightAggregates()
+    for i in range(4):
+        aggregates.add(review(i), analysis(aspects={"coffee": 0.6, "wait": -0.4}))
+    for i in range(4, 6):
+        # Strongly negative, but below the evidence threshold
+        aggregates.add(review(i), analysis(aspects={"price": -0.9}))
+    for i in range(6, 12):
+        # Mild on average, yet over a third of the mentions are complaints
+        aggregates.add(review(i), analysis(aspects={"atmosphere": -0.3 if i % 2 else 0.3}))
+
+    result = generate_insights(aggregates.snapshot(), now=NOW)
+    assert names(result["strengths"]) == ["coffee"]
+    assert names(result["weaknesses"]) == ["wait", "atmosphere"]
+    assert "price" not in names(result["weaknesses"])
+
+
+def test_keywords_rank_by_share_and_volume():
+    aggregates = InsightAggregates()
+    sentiments = {"latte": ["positive"] * 8, "pastries": ["positive"] * 3 + ["neutral"],
+                  "queue": ["negative"] * 5, "music": ["positive", "negative", "neutral", "negative"],
+                  "parking": ["negative"] * 2}
+    review_id = 0
+    for keyword, labels in sentiments.items():
+        for label in labels:
+            review_id += 1
+            aggregates.add(review(review_id), analysis(label, keywords=[keyword]))
+
+    result = generate_insights(aggregates.snapshot(), now=NOW)
+    assert names(result["strengths"]) == ["latte", "pastries"]
+    # Split opinions and thin evidence are not called out
+    assert names(result["weaknesses"]) == ["queue"]
+    assert result["strengths"][0]["score"] > result["strengths"][1]["score"]
+
+
+@pytest.mark.parametrize("previous, recent, direction", [(2, 5, "up"), (5, 2, "down"), (4, 4, "flat")])
+def test_rating_trend_direction(previous, recent, direction):
+    aggregates = InsightAggregates()
+    for i in range(4):
+        aggregates.add(review(i, previous, days_ago=40 + i), analysis())
+        aggregates.add(review(10 + i, recent, days_ago=i), analysis())
+
+    trend = rating_trend(aggregates.snapshot()["days"], now=NOW)
+    assert trend["direction"] == direction
+    assert trend["recent_reviews"] == trend["previous_reviews"] == 4
+
+
+def test_trend_needs_reviews_in_both_windows():
+    aggregates = InsightAggregates()
+    for i in range(5):
+        aggregates.add(review(i, 5, days_ago=i), analysis())
+    assert rating_trend(aggregates.snapshot()["days"], now=NOW) is None
+
+
+def test_actions_are_ordered_by_priority_then_score():
+    aggregates = InsightAggregates()
+    for i in range(4):
+        aggregates.add(review(i, 5, days_ago=40 + i), analysis(aspects={"coffee": 0.6}))
+        aggregates.add(review(10 + i, 1, days_ago=i), analysis(aspects={"service": -0.5}))
+    for i in range(20, 26):
+        aggregates.add(review(i, 3, days_ago=50), analysis("negative", keywords=["parking"],
+                                                           aspects={"wait": -0.3 if i % 3 else 0.3}))
+
+    actions = generate_insights(aggregates.snapshot(), now=NOW)["actions"]
+    priorities = [action["priority"] for action in actions]
+    assert priorities == sorted(priorities, key=["high", "medium", "low"].index)
+    # The falling rating outranks every other high-priority action
+    assert actions[0]["reason"] == "declining rating trend"
+    assert actions[-1]["action"] == insights.ASPECT_PROMOTIONS["coffee"]
+
+
+def test_remove_undoes_add():
+    aggregates = InsightAggregates()
+    aggregates.add(review(1, 5, days_ago=3), analysis("positive", ["latte"], {"coffee": 0.7}))
+    before = aggregates.snapshot()
+
+    aggregates.add(review(2, 1, days_ago=3), analysis("negative", ["latte", "queue"], {"coffee": -0.4, "wait": -0.6}))
+    aggregates.add(review(2, 1, days_ago=3), analysis("negative", ["queue"]))
+    aggregates.remove(2)
+    assert aggregates.snapshot() == before
+
+    aggregates.remove(2)
+    aggregates.remove(1)
+    assert aggregates.snapshot() == InsightAggregates().snapshot()
@@ -0,0 +1,27 @@
+import gzip
+import json
+
+from services import responses
+from services.responses import FastJSONResponse, choose_encoding
+
+ROWS = [{"id": i, "review_text": "great coffee " * 5, "rating": 5} for i in range(100)]
+
+
+def test_encoding_negotiation_respects_quality():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("") is None
+
+
+def test_large_bodies_are_compressed(monkeypatch):
+    monkeypatch.setattr(responses, "brotli", None)
+    response = FastJSONResponse(ROWS, accept_encoding="br, gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.body)) == ROWS
+
+
+def test_small_bodies_are_sent_as_is():
+    response = FastJSONResponse({"status": "success"}, accept_encoding="gzip")
+    assert "content-encoding" not in response.headers
+    assert json.loads(response.body) == {"status": "success"}
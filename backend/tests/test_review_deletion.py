@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+# Importing the routers registers their review listeners, as main.py does
+from routes import aspects, review_dedup, search, snapshot, topics  # noqa: F401
+from services import review_snapshot as snapshot_module
+from services.insights import insight_aggregates
+from services.review_snapshot import review_snapshot
+
+ORIGINAL = "the coffee here is great and the staff are very friendly every morning"
+VARIANT = "the coffee here is great and the staff are very friendly every morning too"
+
+
+@pytest.fixture
+def db(fake_supabase, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "supabase", fake_supabase)
+    monkeypatch.setattr(review_dedup, "supabase", fake_supabase)
+    fake_supabase.tables["reviews"] = [
+        {"id": 1, "review_text": ORIGINAL, "rating": 5, "timestamp": "2025-01-01T09:00:00+00:00"},
+        {"id": 2, "review_text": "slow service and the latte was cold when it arrived", "rating": 2, "timestamp": "2025-01-02T09:00:00+00:00"},
+        {"id": 3, "review_text": VARIANT, "rating": 5, "timestamp": "2025-01-03T09:00:00+00:00"},
+    ]
+    # Module-level singletons: start every test from empty state
+    for state in (review_snapshot, review_dedup.duplicate_index, search.search_index, aspects.aspect_store,
+                  insight_aggregates, topics.topic_model):
+        state.__init__()
+    monkeypatch.setattr(search, "_rollup_watermark", None)
+    return fake_supabase
+
+
+def test_dedupe_deletion_reaches_every_derived_index(db):
+    review_dedup.seed_duplicate_index()
+    search.seed_review_analyses()
+    topics.seed_topic_model()
+    assert search.search_index.search(text="morning")["total"] == 2
+
+    result = asyncio.run(review_dedup.dedupe_reviews(dry_run=False))
+    assert result["deleted"] == 1
+    assert [row["id"] for row in db.tables["reviews"]] == [1, 2]
+
+    assert review_snapshot.get(3) is None
+    assert len(review_snapshot) == 2
+    # The deleted copy no longer answers for new submissions
+    assert review_dedup.duplicate_index.find_duplicate(VARIANT)[0] == 1
+    assert search.search_index.search(text="morning")["total"] == 1
+    assert aspects.aspect_store.for_review(3) is None
+    assert insight_aggregates.snapshot()["total_reviews"] == 2
+    assert topics.topic_model.topic_of(3) is None
+    assert topics.topic_model.documents == 2
+
+
+def test_dry_run_changes_nothing(db):
+    result = asyncio.run(review_dedup.dedupe_reviews(dry_run=True))
+    assert result["duplicate_count"] == 1 and result["deleted"] == 0
+    assert len(db.tables["reviews"]) == 3
+    assert review_snapshot.get(3) is not None
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from services import review_snapshot as snapshot_module
+from services.review_snapshot import ReviewSnapshot
+
+OLD = "2025-01-01T12:00:00+00:00"
+
+
+def review(review_id, text="good coffee", rating=4, timestamp=OLD):
+    return {"id": review_id, "review_text": text, "rating": rating, "timestamp": timestamp}
+
+
+@pytest.fixture
+def db(fake_supabase, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "supabase", fake_supabase)
+    return fake_supabase
+
+
+def ids(snapshot):
+    return [record.id for record in snapshot.rows()]
+
+
+def test_refresh_pages_through_the_table(db, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "REFRESH_PAGE_SIZE", 2)
+    db.tables["reviews"] = [review(i) for i in range(1, 6)]
+    snapshot = ReviewSnapshot()
+    assert snapshot.refresh() == 5
+    assert ids(snapshot) == [1, 2, 3, 4, 5]
+    assert snapshot.complete_through == 5
+
+
+def test_local_add_does_not_skip_ids_other_workers_inserted(db):
+    db.tables["reviews"] = [review(i) for i in range(1, 6)]
+    snapshot = ReviewSnapshot()
+    snapshot.refresh()
+
+    # Another worker stores 6, this worker stores 7 and hears about it first
+    db.tables["reviews"] += [review(6, "from another worker"), review(7, "local")]
+    snapshot.add(review(7, "local"))
+    assert snapshot.watermark == "7"
+    assert snapshot.complete_through == 5
+
+    snapshot.refresh()
+    assert ids(snapshot) == [1, 2, 3, 4, 5, 6, 7]
+    assert snapshot.get(6).review_text == "from another worker"
+    assert snapshot.get(7).review_text == "local"
+
+
+def test_recent_rows_are_refetched_until_they_settle(db):
+    now = time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+    db.tables["reviews"] = [review(1), review(3, timestamp=now)]
+    snapshot = ReviewSnapshot(settle_seconds=60)
+    snapshot.refresh()
+    assert snapshot.complete_through == 1
+
+    # 2 was allocated before 3 but committed after the first refresh
+    db.tables["reviews"].append(review(2, "slow commit", timestamp=now))
+    snapshot.refresh()
+    assert ids(snapshot) == [1, 2, 3]
+    assert snapshot.get(2).review_text == "slow commit"
+
+
+def test_out_of_order_insert_keeps_deleted_and_evicted_slots_aligned():
+    snapshot = ReviewSnapshot(text_cap_bytes=40)
+    snapshot._append([review(1, "a" * 20), review(2, "b" * 20), review(4, "d" * 10), review(5, "e" * 10)])
+    assert snapshot.get(1).review_text is None  # evicted
+    snapshot.discard([4])
+
+    # Pushes the buffer over the cap again, so 2 loses its text too
+    snapshot.add(review(3, "c" * 5))
+    assert ids(snapshot) == [1, 2, 3, 5]
+    assert snapshot.get(2).review_text is None
+    assert snapshot.get(3).review_text == "ccccc"
+    assert snapshot.get(5).review_text == "e" * 10
+    assert snapshot.get(4) is None
+
+    # Lands among evicted texts: counted, but without text
+    snapshot.add(review(0, "zero"))
+    assert snapshot.get(0).review_text is None
+    assert ids(snapshot) == [0, 1, 2, 3, 5]
+    assert snapshot.get(3).review_text == "ccccc"
+
+
+def test_duplicate_rows_are_ignored():
+    snapshot = ReviewSnapshot()
+    snapshot._append([review(1), review(2)])
+    assert snapshot._append([review(1), review(2)]) == 0
+    assert len(snapshot) == 2
+
+
+def test_since_and_newest_first():
+    snapshot = ReviewSnapshot()
+    snapshot._append([review(1, timestamp="2025-01-01T00:00:00+00:00"), review(2, timestamp="2025-02-01T00:00:00+00:00"),
+                      review(3, timestamp="2025-03-01T00:00:00+00:00")])
+    assert [r.id for r in snapshot.rows(since="1")] == [2, 3]
+    assert [r.id for r in snapshot.rows(since="2025-01-15T00:00:00+00:00", newest_first=True)] == [3, 2]
+
+
+def test_readers_never_see_half_appended_rows():
+    snapshot = ReviewSnapshot(text_cap_bytes=4096)
+    errors = []
+    done = threading.Event()
+
+    def read():
+        while not done.is_set():
+            try:
+                for record in snapshot.rows():
+                    assert record.review_text is None or record.review_text.startswith("review")
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    for i in range(1, 3000):
+        snapshot.add(review(i * 2, f"review {i}"))
+        if i % 7 == 0:
+            snapshot.add(review(i * 2 - 1, f"review {i} late"))
+    done.set()
+    reader.join()
+    assert not errors
@@ -0,0 +1,82 @@
+import asyncio
+import threading
+
+import pytest
+
+from services.scheduler import CANCELLED, FAILED, SUCCEEDED, JobScheduler
+
+
+def test_pending_duplicates_are_coalesced():
+    calls = []
+
+    def refresh(shop):
+        calls.append(shop)
+        return {"shop": shop}
+
+    async def scenario():
+        scheduler = JobScheduler(max_workers=1)
+        scheduler.register("refresh", refresh)
+        scheduler.start()
+        first = scheduler.submit("refresh", "north")
+        # Not started yet: the same arguments join it, different ones queue separately
+        assert scheduler.submit("refresh", "north") is first
+        other = scheduler.submit("refresh", "south")
+        assert other is not first
+        await first.wait()
+        await other.wait()
+        await scheduler.drain()
+        return first, other
+
+    first, other = asyncio.run(scenario())
+    assert calls == ["north", "south"]
+    assert first.status == other.status == SUCCEEDED
+    assert first.to_dict()["result"] == {"shop": "north"}
+
+
+def test_failures_are_recorded_and_the_pool_is_bounded():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        threading.Event().wait(0.02)
+        with lock:
+            running[0] -= 1
+
+    def broken():
+        raise RuntimeError("database unavailable")
+
+    async def scenario():
+        scheduler = JobScheduler(max_workers=2)
+        scheduler.register("work", work)
+        scheduler.register("broken", broken)
+        scheduler.start()
+        jobs = [scheduler.submit("work", i) for i in range(6)]
+        failed = scheduler.submit("broken")
+        await asyncio.gather(*(job.wait() for job in jobs + [failed]))
+        await scheduler.drain()
+        return failed
+
+    failed = asyncio.run(scenario())
+    assert peak[0] <= 2
+    assert failed.status == FAILED and failed.error == "database unavailable"
+
+
+def test_drain_cancels_jobs_that_overrun():
+    async def stuck():
+        await asyncio.sleep(10)
+
+    async def scenario():
+        scheduler = JobScheduler()
+        scheduler.register("stuck", stuck)
+        scheduler.start()
+        job = scheduler.submit("stuck")
+        await asyncio.sleep(0)
+        await scheduler.drain(timeout=0.05)
+        with pytest.raises(RuntimeError):
+            scheduler.submit("stuck")
+        return job
+
+    assert asyncio.run(scenario()).status == CANCELLED
@@ -0,0 +1,63 @@
+import pytest
+
+from services.search_index import ReviewSearchIndex, parse_timestamp
+
+REVIEWS = [
+    ({"id": 1, "review_text": "Great coffee and friendly staff", "rating": 5, "timestamp": "2025-01-01T09:00:00Z"},
+     {"sentiment": "positive", "keywords": ["coffee"], "aspects": ["staff"]}),
+    ({"id": 2, "review_text": "Coffee was cold", "rating": 2, "timestamp": "2025-01-02T09:00:00Z"},
+     {"sentiment": "negative", "keywords": ["coffee"], "aspects": []}),
+    ({"id": 3, "review_text": "Cold croissant, rude staff", "rating": 1, "timestamp": "2025-01-03T09:00:00Z"},
+     {"sentiment": "negative", "keywords": ["croissant"], "aspects": ["staff"]}),
+    ({"id": 4, "review_text": "Lovely coffee", "rating": 5, "timestamp": "2025-01-04T09:00:00Z"},
+     {"sentiment": "positive", "keywords": ["coffee"], "aspects": []}),
+]
+
+
+@pytest.fixture
+def index():
+    index = ReviewSearchIndex()
+    index.build(REVIEWS[:3])
+    index.add(*REVIEWS[3])
+    return index
+
+
+def ids(result):
+    return [hit["id"] for hit in result["results"]]
+
+
+def test_terms_and_filters_are_combined(index):
+    assert ids(index.search("coffee")) == [4, 2, 1]
+    assert ids(index.search("cold coffee")) == [2]
+    assert ids(index.search(filters={"rating": ["1", "2"], "aspect": ["staff"]})) == [3]
+
+
+def test_facet_counts_ignore_their_own_filter(index):
+    result = index.search("coffee", filters={"sentiment": ["negative"]})
+    assert result["total"] == 1
+    # Other sentiments stay visible so the UI can offer them
+    assert result["facets"]["sentiment"] == {"positive": 2, "negative": 1}
+    assert result["facets"]["rating"] == {"2": 1}
+
+
+def test_cursor_pages_newest_first(index):
+    seen, cursor = [], None
+    while True:
+        page = index.search(limit=3, cursor=cursor)
+        seen.extend(ids(page))
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [4, 3, 2, 1]
+
+
+def test_date_range_and_removal(index):
+    in_range = index.search(date_from=parse_timestamp("2025-01-02T00:00:00Z"),
+                            date_to=parse_timestamp("2025-01-03T23:59:59Z"))
+    assert ids(in_range) == [3, 2]
+
+    index.remove([3])
+    result = index.search("staff")
+    assert ids(result) == [1]
+    assert result["facets"]["aspect"] == {"staff": 1}
+    assert len(index) == 3
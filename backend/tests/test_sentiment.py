@@ -0,0 +1,108 @@
+import asyncio
+
+import pytest
+
+from routes import dashboard, keywords, live_reviews, sentiment
+from services import review_snapshot as snapshot_module
+from services.review_snapshot import review_snapshot
+
+TEXTS = ["Wonderful coffee", "Terrible service", "It was not bad. Great", "Great pastries", "Awful wait"]
+
+
+@pytest.fixture
+def reviews(fake_supabase, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "supabase", fake_supabase)
+    fake_supabase.tables["reviews"] = [
+        {"id": i, "review_text": text, "rating": 3, "timestamp": f"2025-01-0{i}T09:00:00+00:00"}
+        for i, text in enumerate(TEXTS, start=1)
+    ]
+    review_snapshot.__init__()
+    review_snapshot.refresh()
+    sentiment.sentiment_labels.__init__()
+    monkeypatch.setattr(live_reviews, "_counts_seeded", False)
+
+
+def test_aggregate_mode_has_no_labels(reviews):
+    result = sentiment.compute_sentiment(None, False, 1, 2)
+    assert "labels" not in result
+    assert result["total"] == 5 and sum(result["counts"].values()) == 5
+    assert result["watermark"] == "5"
+
+
+def test_labels_are_paged_newest_first(reviews):
+    result = sentiment.compute_sentiment(None, True, 2, 2)
+    assert [label["id"] for label in result["labels"]] == [3, 2]
+    assert result["has_more"] is True
+    assert sum(result["counts"].values()) == 5
+
+    last = sentiment.compute_sentiment(None, True, 3, 2)
+    assert [label["id"] for label in last["labels"]] == [1] and last["has_more"] is False
+
+
+def test_since_limits_the_scan(reviews):
+    result = sentiment.compute_sentiment("3", True, 1, 10)
+    assert result["delta"] is True and result["total"] == 2
+    assert [label["id"] for label in result["labels"]] == [5, 4]
+    assert sentiment.compute_sentiment("5", False, 1, 10) == sentiment.empty_sentiment_result("5", False, 1, 10)
+
+
+def test_counts_sum_stored_labels(reviews, monkeypatch):
+    first = sentiment.compute_sentiment(None, False, 1, 10)
+    assert len(sentiment.sentiment_labels) == 5
+
+    monkeypatch.setattr(sentiment, "classify_sentiment", lambda text, rating: pytest.fail("already labelled"))
+    assert sentiment.compute_sentiment(None, False, 1, 10) == first
+    assert sentiment.compute_sentiment(None, True, 1, 2)["labels"][0]["id"] == 5
+
+
+def test_review_events_keep_the_labels_current(reviews):
+    review = {"id": 6, "review_text": "Wonderful staff", "rating": 5, "timestamp": "2025-01-06T09:00:00+00:00"}
+    before = sentiment.sentiment_labels.counts()
+    sentiment.label_new_review(review)
+    assert sentiment.sentiment_labels.get(6) == sentiment.classify_sentiment("Wonderful staff", 5)
+    assert sentiment.sentiment_labels.counts()["positive"] == before["positive"] + 1
+
+    sentiment.unlabel_deleted_reviews([review])
+    assert sentiment.sentiment_labels.get(6) is None
+    assert sentiment.sentiment_labels.counts() == before
+
+
+def test_dashboard_and_live_counts_match_sentiment(reviews):
+    counts = sentiment.compute_sentiment(None, False, 1, 10)["counts"]
+    rows = list(review_snapshot.rows(newest_first=True))
+    assert dashboard.analyze_reviews(rows)["sentiment"]["counts"] == counts
+    assert live_reviews._load_sentiment_counts() == counts
+
+
+def test_live_counts_return_to_the_seed_after_insert_and_delete(reviews, monkeypatch):
+    seed = live_reviews._load_sentiment_counts()
+    monkeypatch.setattr(live_reviews, "_counts_seeded", True)
+    review = {"id": 6, "review_text": "It was not bad. Great", "rating": 3, "timestamp": "2025-01-06T09:00:00+00:00"}
+
+    asyncio.run(live_reviews.broadcast_new_review(review))
+    assert sum(sentiment.sentiment_labels.counts().values()) == sum(seed.values()) + 1
+    live_reviews.broadcast_deleted_reviews([review])
+    assert sentiment.sentiment_labels.counts() == seed
+
+
+def test_evicted_reviews_are_left_out_rather_than_scored_as_empty(reviews):
+    # Reviews 1 and 2 are labelled while their text is still there
+    sentiment.compute_sentiment(None, False, 1, 10)
+    sentiment.sentiment_labels.remove([3])
+    review_snapshot.text_cap_bytes = 30
+    review_snapshot.add({"id": 6, "review_text": "Lovely", "rating": 5, "timestamp": "2025-01-06T09:00:00+00:00"})
+    assert review_snapshot.get(3).review_text is None
+
+    result = sentiment.compute_sentiment(None, False, 1, 10)
+    # 1 and 2 keep their stored labels; 3 lost its text before it was labelled again
+    assert result["text_evicted"] == 1 and result["total"] == 5
+    assert result["counts"] == {"positive": 1, "neutral": 2, "negative": 2}
+
+    rows = list(review_snapshot.rows(newest_first=True))
+    board = dashboard.analyze_reviews(rows)
+    assert board["sentiment"]["counts"] == result["counts"]
+    evicted = review_snapshot.text_evicted
+    assert board["text_evicted"] == evicted and board["keywords"]["total_reviews"] == 6 - evicted
+
+    trends = keywords.compute_keyword_trends()
+    assert trends["text_evicted"] == evicted and trends["total_reviews"] == 6 - evicted
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+# Importing the routers registers their review listeners, as main.py does
+from routes import cache_sync, review_dedup, topics
+from services import review_snapshot as snapshot_module
+from services.review_snapshot import review_snapshot
+from services.shared_cache import LocalCache, RedisCache, SharedCache, shared_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.calls = []
+
+    def set(self, key, value, **kwargs):
+        self.calls.append(kwargs)
+
+
+def test_redis_keeps_sub_second_ttls():
+    cache = object.__new__(RedisCache)
+    cache._client = FakeRedis()
+    cache.set("answer", 1, ttl=0.25)
+    cache.set("answer", 1, ttl=90)
+    cache.set("answer", 1, ttl=0)
+    assert cache._client.calls == [{"px": 250}, {"px": 90000}, {"px": None}]
+
+
+def test_incomplete_backends_fail_when_created():
+    class GetOnly(SharedCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnly()
+
+
+def test_async_get_or_compute_counts_hits_and_misses():
+    cache = LocalCache()
+    computed = []
+
+    async def compute():
+        computed.append(1)
+        return {"status": "error"} if len(computed) == 1 else {"status": "success"}
+
+    def cacheable(value):
+        return value["status"] == "success"
+
+    async def scenario():
+        # Not cached: failures are recomputed
+        assert (await cache.get_or_compute_async("k", compute, cacheable=cacheable))[1] is False
+        assert (await cache.get_or_compute_async("k", compute, cacheable=cacheable))[1] is False
+        value, hit = await cache.get_or_compute_async("k", compute, cacheable=cacheable)
+        assert hit and value == {"status": "success"}
+
+    asyncio.run(scenario())
+    assert len(computed) == 2
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+
+@pytest.fixture
+def db(fake_supabase, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "supabase", fake_supabase)
+    fake_supabase.tables["reviews"] = [
+        {"id": 1, "review_text": "the espresso is rich and the croissants are fresh", "rating": 5,
+         "timestamp": "2025-01-01T09:00:00+00:00"},
+    ]
+    for state in (review_snapshot, review_dedup.duplicate_index, topics.topic_model):
+        state.__init__()
+    monkeypatch.setattr(cache_sync, "_synced_generation", None)
+    return fake_supabase
+
+
+def test_cache_keys_follow_the_applied_generation(db):
+    published = shared_cache.generation("reviews")
+    key = cache_sync.review_cache_key("sentiment", 1)
+    assert key == f"sentiment:{published}:1"
+
+    # Announced by another worker but not yet received here: keep the old key
+    shared_cache.incr("generation:reviews")
+    assert cache_sync.review_cache_key("sentiment", 1) == key
+
+    cache_sync._on_remote_reviews("reviews", {"id": 2, "generation": published + 1})
+    assert cache_sync.review_cache_key("sentiment", 1) == f"sentiment:{published + 1}:1"
+
+
+def test_reviews_from_other_workers_reach_local_indexes(db):
+    review_snapshot.refresh()
+    generation = shared_cache.generation("reviews")
+    db.tables["reviews"].append({"id": 2, "review_text": "parking is impossible around the block every weekend",
+                                 "rating": 2, "timestamp": "2025-01-02T09:00:00+00:00"})
+
+    asyncio.run(cache_sync.absorb_remote_review(2))
+
+    assert review_snapshot.get(2) is not None
+    assert review_dedup.duplicate_index.find_duplicate("parking is impossible around the block every weekend")[0] == 2
+    assert topics.topic_model.topic_of(2) is not None
+    # Only this worker's own inserts are announced again
+    assert shared_cache.generation("reviews") == generation
@@ -0,0 +1,49 @@
+import pytest
+
+from services.storage import LocalStorage, StorageBackend
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage("csv-uploads", root=str(tmp_path))
+
+
+def test_objects_round_trip(storage):
+    storage.upload("2025/orders.csv", b"id,item\n1,latte\n")
+    assert storage.size("2025/orders.csv") == 16
+    assert storage.read_range("2025/orders.csv", 3, 7) == b"item"
+    assert storage.read_range("2025/orders.csv", 8) == b"1,latte\n"
+    with storage.open_mmap("2025/orders.csv") as view:
+        assert bytes(view[:2]) == b"id"
+    with storage.open_read("2025/orders.csv") as f:
+        assert f.readline() == b"id,item\n"
+
+
+def test_existing_objects_are_not_overwritten(storage):
+    storage.upload("orders.csv", b"first")
+    with pytest.raises(FileExistsError):
+        storage.upload("orders.csv", b"second")
+    assert storage.read("orders.csv") == b"first"
+
+
+def test_paths_cannot_escape_the_bucket(storage):
+    with pytest.raises(ValueError):
+        storage.upload("../other-bucket/orders.csv", b"x")
+    with pytest.raises(ValueError):
+        storage.read("../../etc/passwd")
+
+
+def test_removing_missing_objects_is_not_an_error(storage):
+    storage.upload("orders.csv", b"x")
+    storage.remove(["orders.csv", "never-uploaded.csv"])
+    with pytest.raises(FileNotFoundError):
+        storage.read("orders.csv")
+
+
+def test_incomplete_backends_fail_when_created():
+    class ReadOnly(StorageBackend):
+        def read(self, path):
+            return b""
+
+    with pytest.raises(TypeError):
+        ReadOnly("csv-uploads")
@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from routes import review_suggestions
+from services.scheduler import scheduler
+from services.shared_cache import shared_cache
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    """LLM stand-in that fails until told otherwise; records every call"""
+    calls = []
+    replies = {"text": None}
+
+    def generate(insights=None):
+        calls.append(insights)
+        return replies["text"]
+
+    monkeypatch.setattr(review_suggestions, "OPENROUTER_API_KEY", "test-key")
+    monkeypatch.setattr(review_suggestions, "generate_suggestions", generate)
+    monkeypatch.setattr(review_suggestions, "build_suggestions", lambda: {"suggestions": "", "insights": {}, "source": "rules"})
+    for key in (review_suggestions.ENRICHMENT_CACHE_KEY, review_suggestions.ENRICHMENT_FAILURE_KEY):
+        shared_cache.delete(key)
+    yield calls, replies
+    for key in (review_suggestions.ENRICHMENT_CACHE_KEY, review_suggestions.ENRICHMENT_FAILURE_KEY):
+        shared_cache.delete(key)
+
+
+def test_failed_enrichment_backs_off(llm, monkeypatch):
+    calls, replies = llm
+    first = review_suggestions.precompute_suggestions()
+    assert first["enriched"] is False and len(calls) == 1
+
+    # Within the backoff, even for a newer review generation, no further call is made
+    shared_cache.bump("reviews")
+    assert review_suggestions.precompute_suggestions()["retry_at"] == first["retry_at"]
+    assert len(calls) == 1
+
+    # Consecutive failures double the wait
+    monkeypatch.setattr(review_suggestions.time, "time", lambda: first["retry_at"] + 1)
+    second = review_suggestions.precompute_suggestions()
+    assert len(calls) == 2
+    assert second["retry_at"] - (first["retry_at"] + 1) == pytest.approx(2 * review_suggestions.ENRICHMENT_RETRY_SECONDS)
+
+    # A success clears the failure record
+    replies["text"] = "Keep the espresso, fix the queue"
+    monkeypatch.setattr(review_suggestions.time, "time", lambda: second["retry_at"] + 1)
+    assert review_suggestions.precompute_suggestions()["enriched"] is True
+    assert shared_cache.get(review_suggestions.ENRICHMENT_FAILURE_KEY) is None
+
+
+def test_polling_during_backoff_does_not_resubmit(llm, monkeypatch):
+    review_suggestions.precompute_suggestions()
+    submitted = []
+    monkeypatch.setattr(scheduler, "running", True)
+    monkeypatch.setattr(scheduler, "submit", lambda name, *args, **kwargs: submitted.append(name))
+
+    for _ in range(3):
+        result = asyncio.run(review_suggestions.get_suggestions(enrich=True))
+        assert result["enrichment"] == "failed"
+        assert "enrichment_retry_at" in result
+    assert submitted == []
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from routes import topics
+from services.scheduler import JobScheduler
+from services.topics import TopicModel
+
+REVIEWS = [
+    {"id": 1, "review_text": "The espresso is rich and the latte art is beautiful"},
+    {"id": 2, "review_text": "Parking is impossible, we circled the block for twenty minutes"},
+    {"id": 3, "review_text": "Great espresso, lovely latte and friendly baristas"},
+]
+
+
+def test_partial_fit_skips_known_ids():
+    model = TopicModel()
+    model.partial_fit(REVIEWS)
+    model.partial_fit(REVIEWS[:2])
+    assert model.documents == 3
+    assert sum(topic["member_count"] for topic in model.topics()) == 3
+
+
+def test_new_themes_open_new_topics():
+    model = TopicModel()
+    model.partial_fit(REVIEWS)
+    assert model.topic_of(1) == model.topic_of(3)
+    assert model.topic_of(2) != model.topic_of(1)
+
+
+def test_get_topics_joins_the_running_seed(monkeypatch):
+    model = TopicModel()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def seed():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        model.partial_fit(REVIEWS)
+        model.ready = True
+
+    scheduler = JobScheduler(max_workers=2)
+    scheduler.register("seed_topic_model", seed, run_on_start=True, manual=False)
+    monkeypatch.setattr(topics, "topic_model", model)
+    monkeypatch.setattr(topics, "scheduler", scheduler)
+
+    async def main():
+        scheduler.start()
+        await asyncio.to_thread(started.wait, 5)
+        request = asyncio.create_task(topics.get_topics(top_terms=6, min_members=1))
+        await asyncio.sleep(0.05)
+        release.set()
+        result = await request
+        await scheduler.drain()
+        return result
+
+    result = asyncio.run(main())
+    assert calls == [1]
+    assert result["status"] == "success"
+    assert result["total_reviews"] == 3
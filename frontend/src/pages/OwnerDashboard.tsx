@@ -70,6 +70,7 @@ const [loadingFiles, setLoadingFiles] = useState(true);
   const [chatMessages, setChatMessages] = useState<ChatMessage[]>([]);
   const [currentMessage, setCurrentMessage] = useState('');
   const [loadingChatbot, setLoadingChatbot] = useState(false);
+  const [chatSessionId, setChatSessionId] = useState<string | null>(null);
   // Add this useEffect to fetch uploaded files
 useEffect(() => {
   const fetchUploadedFiles = async () => {
@@ -326,12 +327,7 @@ useEffect(() => {
     setLoadingChatbot(true);
 
     try {
-      // Send the entire chat history for context
-      const chatHistory = [...chatMessages, userMessage].map(msg => ({
-        role: msg.type === 'user' ? 'user' : 'assistant',
-        content: msg.content
-      }));
-
+      // The server keeps the conversation; only the new question is sent
       const response = await fetch(`${API_BASE_URL}/chatbot/reviews`, {
         method: 'POST',
         headers: {
@@ -339,7 +335,7 @@ useEffect(() => {
         },
         body: JSON.stringify({ 
           question: messageToSend,
-          chat_history: chatHistory,
+          session_id: chatSessionId,
           coffee_shop_name: "SmartCafe AI" // You can make this dynamic
         }),
       });
@@ -350,6 +346,10 @@ useEffect(() => {
 
       const data = await response.json();
       
+      if (data.session_id) {
+        setChatSessionId(data.session_id);
+      }
+
       if (data.status === 'success' && data.answer) {
         const botMessage: ChatMessage = {
           id: Date.now().toString() + '-bot',